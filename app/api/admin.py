@@ -1,10 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.db.database import get_db
-from app.models.user import User, UserRole
-from app.schemas.user import UserResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import insert, select, update, delete, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
+from typing import List, NoReturn, Optional
+from app.db.database import get_db, get_engine
+from app.db.pool import pool_status
+from app.db.replicas import get_read_db, get_replica_router
+from app.db.slow_query_log import read_slow_queries
+from app.models.user import User, UserRole, UserDeletionJob
+from app.schemas.user import (
+    UserResponse, BulkUserCreateRequest, BulkUserCreateResponse, BulkUserResult, UserDeletionJobResponse,
+    BulkRoleUpdateRequest, BulkUserDeleteRequest, BulkUserOutcome, BulkUserOutcomeResponse
+)
+from app.models.resource import Resource
+from app.core.config import settings
+from app.core.profiling import (
+    diff_snapshots, list_profile_reports, read_profile_report,
+    start_tracemalloc, stop_tracemalloc, take_snapshot, tracemalloc_status
+)
 from app.api.deps import get_current_user
+from app.core.security import hash_passwords, UNUSABLE_PASSWORD_HASH
+from app.db.user_deletion import owns_many_resources, retry_user_deletion, submit_user_deletion
+from app.db.user_directory import DEFAULT_LIMIT, LISTING_DESCRIPTION, MAX_LIMIT, user_directory_response
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -24,29 +42,352 @@ def require_admin(current_user: User = Depends(get_current_user)):
     return current_user
 
 
-@router.get("/users", response_model=List[UserResponse])
+def admins_remain_without(db: Session, user_ids: list):
+    """SQL condition that is true while an admin outside user_ids exists.
+    
+    Embedded in the WHERE clause of the UPDATE/DELETE that removes admins,
+    so the check and the write happen in one statement. The count is served
+    by the (role, email) index and only touches admin entries. On MSSQL the
+    subquery takes update locks so concurrent demotions (which would
+    otherwise read the same row-versioned snapshot under RCSI) serialise on
+    the admin key range instead of both succeeding.
+    """
+    admins = aliased(User, name="admins")
+    admin_count = (
+        select(func.count())
+        .select_from(admins)
+        .where(admins.role == UserRole.admin, admins.id.not_in(user_ids))
+    )
+    if db.get_bind().dialect.name == "mssql":
+        admin_count = admin_count.with_hint(admins, "WITH (UPDLOCK, HOLDLOCK)", "mssql")
+    return admin_count.scalar_subquery() >= 1
+
+
+def guarded_role_update(db: Session, user_ids: list, new_role: UserRole) -> int:
+    """Set the role of unprotected users, never removing the last admin.
+    
+    A demotion batch that would leave no admin changes nothing for the
+    admins in it. Returns the number of rows changed. Does not commit.
+    """
+    stmt = update(User).where(User.id.in_(user_ids), User.is_protected == False)  # noqa: E712
+    if new_role != UserRole.admin:
+        stmt = stmt.where((User.role != UserRole.admin) | admins_remain_without(db, user_ids))
+    result = db.execute(
+        stmt.values(role=new_role).execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def guarded_user_delete(db: Session, user_ids: list) -> int:
+    """Delete unprotected users, never the last admin.
+    
+    Resources go with them through the database-side cascade. Returns the
+    number of users deleted. Does not commit.
+    """
+    result = db.execute(
+        delete(User)
+        .where(
+            User.id.in_(user_ids),
+            User.is_protected == False,  # noqa: E712
+            (User.role != UserRole.admin) | admins_remain_without(db, user_ids)
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def refuse_guarded_write(db: Session, user_id, detail: str) -> NoReturn:
+    """Raise the error for a guarded write on one user that changed no row.
+    
+    The guards also miss a user deleted or protected since it was loaded;
+    those get 404 / the protected 403, and only a real last-admin refusal
+    gets detail.
+    """
+    is_protected = db.scalar(select(User.is_protected).where(User.id == user_id))
+    if is_protected is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    if is_protected:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="This user is protected and cannot be modified."
+        )
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail=detail
+    )
+
+
+@router.get("/users", response_model=List[UserResponse], description=LISTING_DESCRIPTION)
 def list_all_users(
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    cursor: Optional[str] = None,
+    role: Optional[UserRole] = None,
+    email_prefix: Optional[str] = Query(None, min_length=1, max_length=255),
+    current_user: User = Depends(require_admin),
+    db: Session = Depends(get_read_db)
+):
+    """List users page by page - accessible by admin only"""
+    return user_directory_response(db, limit, cursor, role, email_prefix)
+
+
+@router.post("/users/bulk", response_model=BulkUserCreateResponse, status_code=status.HTTP_201_CREATED)
+def bulk_create_users(
+    bulk_request: BulkUserCreateRequest,
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
-    """Get all users - accessible by admin only"""
-    users = db.query(User).all()
-    
-    # Convert UUIDs to strings
-    return [
-        UserResponse(
-            id=str(user.id),
-            email=user.email,
-            display_name=user.display_name,
-            tagline=user.tagline,
-            bio=user.bio,
-            avatar_url=user.avatar_url,
-            role=user.role,
-            is_protected=user.is_protected,
-            created_at=user.created_at
+    """Provision many users at once - accessible by admin only.
+    
+    Duplicates are detected with a single IN query, passwords are hashed in
+    parallel and all new rows go out in one executemany INSERT. No access
+    tokens are issued: the provisioned users sign in themselves.
+    """
+    emails = [u.email for u in bulk_request.users]
+    existing_emails = set(db.scalars(select(User.email).where(User.email.in_(set(emails)))).all())
+    
+    results: List[BulkUserResult] = []
+    to_create = []
+    seen = set()
+    for user_data in bulk_request.users:
+        if user_data.email in existing_emails:
+            results.append(BulkUserResult(email=user_data.email, status="already_exists", detail="Email already registered"))
+        elif user_data.email in seen:
+            results.append(BulkUserResult(email=user_data.email, status="duplicate_in_request", detail="Email listed more than once"))
+        else:
+            seen.add(user_data.email)
+            results.append(BulkUserResult(email=user_data.email, status="created"))
+            to_create.append(user_data)
+    
+    if to_create:
+        hashed_passwords = hash_passwords([u.password for u in to_create])
+        rows = [
+            {
+                "email": u.email,
+                "hashed_password": hashed,
+                "display_name": u.display_name,
+                "tagline": u.tagline,
+                "bio": u.bio,
+                "avatar_url": u.avatar_url,
+                "role": u.role,
+                "is_protected": False
+            }
+            for u, hashed in zip(to_create, hashed_passwords)
+        ]
+        try:
+            db.execute(insert(User), rows)
+            db.commit()
+        except IntegrityError:
+            # A concurrent signup grabbed one of the emails after our IN check
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Some emails were registered concurrently. Please retry the request."
+            )
+        
+        created_users = {
+            user.email: user
+            for user in db.scalars(select(User).where(User.email.in_(seen))).all()
+        }
+        for result in results:
+            if result.status == "created":
+                user = created_users[result.email]
+                result.user = UserResponse(
+                    id=str(user.id),
+                    email=user.email,
+                    display_name=user.display_name,
+                    tagline=user.tagline,
+                    bio=user.bio,
+                    avatar_url=user.avatar_url,
+                    role=user.role,
+                    is_protected=user.is_protected,
+                    created_at=user.created_at
+                )
+    
+    return BulkUserCreateResponse(
+        created=len(to_create),
+        skipped=len(results) - len(to_create),
+        results=results
+    )
+
+
+def _load_bulk_targets(db: Session, user_ids: List[str], action: str):
+    """Fetch all targets in one query and pre-screen them.
+    
+    Returns (targets, outcomes): targets maps requested id -> row for users
+    that may be changed; outcomes holds the rejections.
+    """
+    rows = db.execute(
+        select(User.id, User.role, User.is_protected).where(User.id.in_(user_ids))
+    ).all()
+    found = {str(row.id): row for row in rows}
+    
+    targets = {}
+    outcomes = {}
+    for user_id in user_ids:
+        row = found.get(user_id)
+        if row is None:
+            outcomes[user_id] = BulkUserOutcome(user_id=user_id, status="not_found", detail="User not found")
+        elif row.is_protected:
+            outcomes[user_id] = BulkUserOutcome(
+                user_id=user_id, status="protected", detail=f"This user is protected and cannot be {action}."
+            )
+        else:
+            targets[user_id] = row
+    return targets, outcomes
+
+
+def _bulk_response(user_ids: List[str], outcomes: dict, success_statuses: set) -> BulkUserOutcomeResponse:
+    results = [outcomes[user_id] for user_id in user_ids]
+    succeeded = sum(1 for r in results if r.status in success_statuses)
+    return BulkUserOutcomeResponse(succeeded=succeeded, failed=len(results) - succeeded, results=results)
+
+
+@router.patch("/users/bulk/role", response_model=BulkUserOutcomeResponse)
+def bulk_update_user_roles(
+    bulk_request: BulkRoleUpdateRequest,
+    current_user: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Change many users' roles in one transaction - accessible by admin only.
+    
+    Targets are loaded with one query, promotions and demotions are each one
+    guarded UPDATE, and the last-admin rule is checked once for the whole
+    demotion batch. A second query confirms per-user outcomes.
+    """
+    # Last entry wins when a user is listed more than once
+    requested = {change.user_id: change.role for change in bulk_request.changes}
+    user_ids = list(requested)
+    
+    try:
+        targets, outcomes = _load_bulk_targets(db, user_ids, "modified")
+        
+        by_role = {UserRole.admin: [], UserRole.user: []}
+        for user_id, row in targets.items():
+            new_role = requested[user_id]
+            if user_id == str(current_user.id) and new_role != UserRole.admin:
+                outcomes[user_id] = BulkUserOutcome(
+                    user_id=user_id, status="self",
+                    detail="You cannot demote yourself. Ask another admin to change your role."
+                )
+            elif row.role == new_role:
+                outcomes[user_id] = BulkUserOutcome(user_id=user_id, status="unchanged")
+            else:
+                by_role[new_role].append(row.id)
+        
+        # Promote first so new admins count towards the demotion guard
+        if by_role[UserRole.admin]:
+            guarded_role_update(db, by_role[UserRole.admin], UserRole.admin)
+        if by_role[UserRole.user]:
+            guarded_role_update(db, by_role[UserRole.user], UserRole.user)
+        
+        changed_ids = by_role[UserRole.admin] + by_role[UserRole.user]
+        if changed_ids:
+            current_roles = {
+                str(row.id): row.role
+                for row in db.execute(select(User.id, User.role).where(User.id.in_(changed_ids))).all()
+            }
+            for user_id in map(str, changed_ids):
+                if current_roles.get(user_id) == requested[user_id]:
+                    outcomes[user_id] = BulkUserOutcome(user_id=user_id, status="updated")
+                elif targets[user_id].role == UserRole.admin and user_id in current_roles:
+                    outcomes[user_id] = BulkUserOutcome(
+                        user_id=user_id, status="last_admin",
+                        detail="Cannot demote the last admin. At least one admin must remain."
+                    )
+                else:
+                    outcomes[user_id] = BulkUserOutcome(
+                        user_id=user_id, status="conflict", detail="User was modified or deleted concurrently"
+                    )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to update user roles: {str(e)}"
         )
-        for user in users
-    ]
+    
+    return _bulk_response(user_ids, outcomes, {"updated", "unchanged"})
+
+
+@router.post("/users/bulk/delete", response_model=BulkUserOutcomeResponse)
+def bulk_delete_users(
+    bulk_request: BulkUserDeleteRequest,
+    current_user: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Delete many users in one transaction - accessible by admin only.
+    
+    One guarded DELETE removes every eligible user (resources follow through
+    the database cascade). At most USER_DELETE_SYNC_MAX_RESOURCES resources
+    are removed per batch: users past that budget are reported as
+    requires_background_delete - retry them in another batch, or delete them
+    individually so large owners run as a background job.
+    """
+    user_ids = list(dict.fromkeys(bulk_request.user_ids))
+    
+    try:
+        targets, outcomes = _load_bulk_targets(db, user_ids, "deleted")
+        
+        if str(current_user.id) in targets:
+            del targets[str(current_user.id)]
+            outcomes[str(current_user.id)] = BulkUserOutcome(
+                user_id=str(current_user.id), status="self", detail="You cannot delete yourself."
+            )
+        
+        if targets:
+            # The cascade of the one DELETE is bounded for the whole batch, not
+            # only per user: users are admitted in request order until their
+            # resources add up to the inline budget
+            resource_counts = dict(db.execute(
+                select(Resource.user_id, func.count())
+                .where(Resource.user_id.in_(list(targets)))
+                .group_by(Resource.user_id)
+            ).all())
+            budget = settings.USER_DELETE_SYNC_MAX_RESOURCES
+            for user_id in list(targets):
+                resource_count = resource_counts.get(user_id, 0)
+                if resource_count > settings.USER_DELETE_SYNC_MAX_RESOURCES:
+                    detail = f"User owns {resource_count} resources; delete them individually."
+                elif resource_count > budget:
+                    detail = f"User owns {resource_count} resources; over this batch's budget, retry in another request."
+                else:
+                    budget -= resource_count
+                    continue
+                del targets[user_id]
+                outcomes[user_id] = BulkUserOutcome(
+                    user_id=user_id, status="requires_background_delete", detail=detail
+                )
+        
+        if targets:
+            guarded_user_delete(db, [row.id for row in targets.values()])
+            remaining = {
+                str(user_id)
+                for user_id in db.scalars(select(User.id).where(User.id.in_([row.id for row in targets.values()])))
+            }
+            for user_id, row in targets.items():
+                if user_id not in remaining:
+                    outcomes[user_id] = BulkUserOutcome(user_id=user_id, status="deleted")
+                elif row.role == UserRole.admin:
+                    outcomes[user_id] = BulkUserOutcome(
+                        user_id=user_id, status="last_admin",
+                        detail="Cannot delete the last admin. At least one admin must remain."
+                    )
+                else:
+                    outcomes[user_id] = BulkUserOutcome(
+                        user_id=user_id, status="conflict", detail="User was modified concurrently"
+                    )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to delete users: {str(e)}"
+        )
+    
+    return _bulk_response(user_ids, outcomes, {"deleted"})
 
 
 @router.patch("/users/{user_id}/role", response_model=UserResponse)
@@ -66,8 +407,7 @@ def update_user_role(
         )
     
     try:
-        # Find user with row-level lock (SELECT FOR UPDATE)
-        user = db.query(User).filter(User.id == user_id).with_for_update().first()
+        user = db.query(User).filter(User.id == user_id).first()
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -81,22 +421,10 @@ def update_user_role(
                 detail="This user is protected and cannot be modified."
             )
         
-        # If demoting from admin, ensure at least one admin remains
-        if user.role == UserRole.admin and role_update.role != UserRole.admin:
-            # Lock ALL admin rows and count them in application code to prevent race condition
-            # This ensures we get an accurate, locked count before committing
-            locked_admins = db.query(User).filter(User.role == UserRole.admin).with_for_update().all()
-            admin_count = len(locked_admins)
-            
-            # Recheck after acquiring locks on all admin rows
-            if admin_count <= 1:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Cannot demote the last admin. At least one admin must remain."
-                )
-        
-        # Update role
-        user.role = role_update.role
+        # The last-admin check runs inside the UPDATE itself, so concurrent
+        # demotions cannot both pass it
+        if guarded_role_update(db, [user.id], role_update.role) != 1:
+            refuse_guarded_write(db, user.id, "Cannot demote the last admin. At least one admin must remain.")
         db.commit()
         db.refresh(user)
         
@@ -126,10 +454,15 @@ def update_user_role(
 @router.delete("/users/{user_id}")
 def delete_user(
     user_id: str,
+    response: Response,
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
-    """Delete a user - accessible by admin only"""
+    """Delete a user - accessible by admin only.
+    
+    Users owning many resources are deleted by a chunked background job;
+    the response is then 202 with a job id to poll.
+    """
     
     # Prevent admin from deleting themselves
     if str(user_id) == str(current_user.id):
@@ -139,8 +472,7 @@ def delete_user(
         )
     
     try:
-        # Find user with row-level lock
-        user = db.query(User).filter(User.id == user_id).with_for_update().first()
+        user = db.query(User).filter(User.id == user_id).first()
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -154,23 +486,40 @@ def delete_user(
                 detail="This user is protected and cannot be deleted."
             )
         
-        # If deleting an admin, ensure at least one admin remains
-        if user.role == UserRole.admin:
-            # Lock ALL admin rows and count them
-            locked_admins = db.query(User).filter(User.role == UserRole.admin).with_for_update().all()
-            admin_count = len(locked_admins)
+        user_email = user.email
+        
+        if owns_many_resources(db, user.id):
+            # Demote (guarded) and lock the account now, so the last-admin rule
+            # holds and the user cannot sign in while the job runs
+            if guarded_role_update(db, [user.id], UserRole.user) != 1:
+                refuse_guarded_write(db, user.id, "Cannot delete the last admin. At least one admin must remain.")
+            db.execute(
+                update(User)
+                .where(User.id == user.id)
+                .values(hashed_password=UNUSABLE_PASSWORD_HASH)
+                .execution_options(synchronize_session=False)
+            )
+            job = UserDeletionJob(user_id=str(user.id), user_email=user_email)
+            db.add(job)
+            db.flush()
+            job_id = job.id
+            db.commit()
+            submit_user_deletion(job_id)
             
-            if admin_count <= 1:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Cannot delete the last admin. At least one admin must remain."
-                )
+            response.status_code = status.HTTP_202_ACCEPTED
+            return {
+                "success": True,
+                "message": f"Deletion of user {user_email} scheduled",
+                "job_id": job_id
+            }
         
-        # Delete user (cascades to resources due to relationship configuration)
-        db.delete(user)
+        # Resources are removed by the database cascade; the last-admin check
+        # runs inside the user DELETE
+        if guarded_user_delete(db, [user.id]) != 1:
+            refuse_guarded_write(db, user.id, "Cannot delete the last admin. At least one admin must remain.")
         db.commit()
         
-        return {"success": True, "message": f"User {user.email} deleted successfully"}
+        return {"success": True, "message": f"User {user_email} deleted successfully"}
         
     except HTTPException:
         db.rollback()
@@ -181,3 +530,123 @@ def delete_user(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to delete user: {str(e)}"
         )
+
+
+@router.get("/user-deletions/{job_id}", response_model=UserDeletionJobResponse)
+def get_user_deletion_job(
+    job_id: str,
+    current_user: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Progress of a background user deletion - accessible by admin only"""
+    job = db.get(UserDeletionJob, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Deletion job not found"
+        )
+    return job
+
+
+@router.post("/user-deletions/{job_id}/retry", response_model=UserDeletionJobResponse, status_code=status.HTTP_202_ACCEPTED)
+def retry_user_deletion_job(
+    job_id: str,
+    current_user: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Resume a failed background user deletion where it stopped - accessible by admin only"""
+    job = db.get(UserDeletionJob, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Deletion job not found"
+        )
+    if not retry_user_deletion(db, job_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Only failed jobs can be retried (job is {job.status})"
+        )
+    db.refresh(job)
+    return job
+
+
+@router.get("/db/pool")
+def get_db_pool_status(current_user: User = Depends(require_admin)):
+    """Connection pool occupancy and wait statistics for this worker - accessible by admin only"""
+    return {**pool_status(get_engine()), "replicas": get_replica_router().status()}
+
+
+@router.get("/db/slow-queries")
+def get_slow_queries(
+    limit: int = Query(100, ge=1, le=1000),
+    endpoint: Optional[str] = Query(None, description='e.g. "GET /api/resources/"'),
+    min_ms: float = Query(0, ge=0),
+    current_user: User = Depends(require_admin)
+):
+    """Recent slow statements with their plans, newest first - accessible by admin only"""
+    return read_slow_queries(limit, endpoint, min_ms)
+
+
+@router.get("/debug/profiles")
+def get_profile_reports(current_user: User = Depends(require_admin)):
+    """Request profiles written for X-Profile: 1, newest first - accessible by admin only"""
+    return list_profile_reports()
+
+
+@router.get("/debug/profiles/{name}", response_class=PlainTextResponse)
+def get_profile_report(name: str, current_user: User = Depends(require_admin)):
+    """The cumulative-time summary of one request profile - accessible by admin only"""
+    report = read_profile_report(name)
+    if report is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile report not found"
+        )
+    return report
+
+
+@router.get("/debug/tracemalloc")
+def get_tracemalloc_status(current_user: User = Depends(require_admin)):
+    """Whether this worker is tracing allocations, and its snapshots - accessible by admin only"""
+    return tracemalloc_status()
+
+
+@router.post("/debug/tracemalloc/start")
+def start_memory_tracing(
+    frames: int = Query(1, ge=1, le=50, description="Stack frames kept per allocation"),
+    current_user: User = Depends(require_admin)
+):
+    """Start tracemalloc in this worker - accessible by admin only"""
+    return start_tracemalloc(frames)
+
+
+@router.post("/debug/tracemalloc/stop")
+def stop_memory_tracing(current_user: User = Depends(require_admin)):
+    """Stop tracemalloc in this worker; snapshots are kept - accessible by admin only"""
+    return stop_tracemalloc()
+
+
+@router.post("/debug/tracemalloc/snapshots")
+def take_memory_snapshot(
+    limit: int = Query(20, ge=1, le=200),
+    current_user: User = Depends(require_admin)
+):
+    """Snapshot traced allocations and return the largest - accessible by admin only"""
+    try:
+        return take_snapshot(limit)
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+
+@router.get("/debug/tracemalloc/diff")
+def diff_memory_snapshots(
+    base: int = Query(..., description="Snapshot id to compare against"),
+    target: Optional[int] = Query(None, description="Defaults to the newest snapshot"),
+    limit: int = Query(20, ge=1, le=200),
+    current_user: User = Depends(require_admin)
+):
+    """Allocation growth between two snapshots of this worker - accessible by admin only"""
+    try:
+        return diff_snapshots(base, target, limit)
+    except KeyError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=e.args[0])
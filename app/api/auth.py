@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from datetime import timedelta
 from app.db.database import get_db
@@ -6,6 +6,7 @@ from app.schemas.user import UserCreate, UserResponse, Token, RegisterResponse,
 from app.models.user import User
 from app.core.security import get_password_hash, verify_password, create_access_token
 from app.core.config import settings
+from app.core.rate_limit import login_email_limiter, login_ip_limiter, client_ip, retry_after_header
 from app.db.seed import seed_default_resources
 
 router = APIRouter()
@@ -63,7 +64,19 @@ def signup(user_data: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=Token)
-def login(login_data: LoginRequest, db: Session = Depends(get_db)):
+def login(login_data: LoginRequest, request: Request, db: Session = Depends(get_db)):
+    email_key = login_data.email.lower()
+    
+    # Admission control: reject throttled clients before any DB or bcrypt work
+    if settings.LOGIN_RATE_LIMIT_ENABLED:
+        retry_after = login_ip_limiter.hit(client_ip(request)) or login_email_limiter.hit(email_key)
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many login attempts. Please try again later.",
+                headers=retry_after_header(retry_after)
+            )
+    
     user = db.query(User).filter(User.email == login_data.email).first()
     
     if not user or not verify_password(login_data.password, user.hashed_password):
@@ -72,6 +85,10 @@ def login(login_data: LoginRequest, db: Session = Depends(get_db)):
             detail="Incorrect email or password"
         )
     
+    # Successful login clears the per-email budget so only failures accumulate
+    if settings.LOGIN_RATE_LIMIT_ENABLED:
+        login_email_limiter.reset(email_key)
+    
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user.email}, expires_delta=access_token_expires
@@ -1,12 +1,21 @@
+from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.db.database import get_db
+from app.db.database import SessionLocal, get_db
+from app.db.async_database import get_async_db
+from app.core.cache import TTLCache
+from app.core.config import settings
 from app.core.security import decode_access_token
 from app.models.user import User, UserRole
 
 security = HTTPBearer()
 
+# email -> user id, so hot read-only endpoints can skip the per-request user lookup
+user_id_cache = TTLCache("user_id", lambda: settings.USER_ID_CACHE_MAX_ENTRIES, lambda: settings.USER_ID_CACHE_TTL_SECONDS)
+
 
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
@@ -31,6 +40,80 @@ def get_current_user(
     return user
 
 
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """get_current_user for async routes; the lookup awaits instead of holding a thread"""
+    email = decode_access_token(credentials.credentials)
+    if email is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials"
+        )
+    
+    user = await db.scalar(select(User).where(User.email == email))
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
+        )
+    return user
+
+
+def get_current_user_id(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Lightweight variant of get_current_user that only resolves the user id.
+    
+    The id is cached per email for USER_ID_CACHE_TTL_SECONDS, so steady-state
+    calls do no database work. Only use it where acting on a just-deleted
+    account for that long is harmless (e.g. reading the user's own theme).
+    """
+    email = decode_access_token(credentials.credentials)
+    if email is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials"
+        )
+    
+    user_id = user_id_cache.get(email)
+    if user_id is None:
+        user_id = db.scalar(select(User.id).where(User.email == email))
+        if user_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found"
+            )
+        user_id_cache.set(email, user_id)
+    return user_id
+
+
+async def get_current_user_id_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """get_current_user_id for async routes, sharing the same email -> id cache"""
+    email = decode_access_token(credentials.credentials)
+    if email is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials"
+        )
+    
+    user_id = user_id_cache.get(email)
+    if user_id is None:
+        user_id = await db.scalar(select(User.id).where(User.email == email))
+        if user_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found"
+            )
+        user_id_cache.set(email, user_id)
+    return user_id
+
+
 def get_current_admin_user(
     current_user: User = Depends(get_current_user)
 ) -> User:
@@ -40,3 +123,30 @@ def get_current_admin_user(
             detail="Not enough permissions"
         )
     return current_user
+
+
+def get_admin_from_authorization(authorization: Optional[str]) -> User:
+    """get_current_admin_user outside dependency injection (e.g. in a middleware)"""
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated"
+        )
+    db = SessionLocal()
+    try:
+        credentials = HTTPAuthorizationCredentials(scheme=scheme, credentials=token)
+        return get_current_admin_user(get_current_user(credentials, db))
+    finally:
+        db.close()
+
+
+async def get_current_admin_user_async(
+    current_user: User = Depends(get_current_user_async)
+) -> User:
+    if current_user.role != UserRole.admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    return current_user
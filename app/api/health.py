@@ -0,0 +1,97 @@
+"""Readiness probe and Prometheus metrics for load balancers and monitoring.
+
+/health stays the cheap liveness check (the process answers). /ready also
+requires a finished bootstrap and a database round trip within
+READY_DB_TIMEOUT_SECONDS, so a worker that cannot reach the database is
+taken out of rotation. The round trip uses its own connection, not the
+pool: a busy worker with every pooled connection checked out is loaded,
+not broken, and stays ready - pool saturation is reported in the /ready
+body and as the db_pool_saturation metric instead. Both new routes are
+async and never wait for the request threadpool: they must answer
+precisely when the sync routes cannot.
+"""
+import asyncio
+import time
+import anyio
+from fastapi import APIRouter, Response, status
+from fastapi.responses import JSONResponse
+from app.core.admission import admission_controller
+from app.core.cache import all_caches
+from app.core.config import settings
+from app.core.metrics import MetricsWriter, request_metrics
+from app.core.security import bcrypt_in_progress, password_hash_queue_depth
+from app.db.bootstrap import bootstrap_status
+from app.db.database import get_engine
+from app.db.pool import pool_saturation, pool_status, start_database_ping
+from app.db.write_queue import sqlite_write_queue
+
+router = APIRouter()
+
+
+@router.get("/ready")
+async def readiness_check():
+    checks = {"bootstrap": dict(bootstrap_status)}
+    ready = bootstrap_status["state"] == "ready"
+    try:
+        started = time.perf_counter()
+        await asyncio.wait_for(
+            asyncio.shield(asyncio.wrap_future(start_database_ping(get_engine()))),
+            settings.READY_DB_TIMEOUT_SECONDS
+        )
+        checks["database"] = {"ok": True, "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+    except asyncio.TimeoutError:
+        ready = False
+        checks["database"] = {"ok": False, "error": f"no answer within {settings.READY_DB_TIMEOUT_SECONDS}s"}
+    except Exception as e:
+        ready = False
+        checks["database"] = {"ok": False, "error": str(e)[:200]}
+    # Informational only: never affects readiness
+    checks["pool"] = {"saturation": pool_saturation(pool_status(get_engine()))}
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"status": "ready" if ready else "not_ready", **checks}
+    )
+
+
+@router.get("/metrics")
+async def metrics():
+    out = MetricsWriter()
+    request_metrics.write(out)
+
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    stats = limiter.statistics()
+    out.gauge("app_threadpool_size", "Threads available to sync routes", limiter.total_tokens)
+    out.gauge("app_threadpool_busy", "Threads running sync routes and dependencies", stats.borrowed_tokens)
+    out.gauge("app_threadpool_waiting", "Calls waiting for a free thread", stats.tasks_waiting)
+
+    pool = pool_status(get_engine())
+    for key in ("size", "checked_out", "idle", "overflow"):
+        if key in pool:
+            out.gauge(f"db_pool_{key}", f"Connection pool {key.replace('_', ' ')}", pool[key])
+    for key in ("checkouts", "checkins", "connects", "invalidations", "timeouts"):
+        out.family(f"db_pool_{key}_total", "counter", f"Connection pool {key}", [({}, pool[key])])
+    out.family("db_pool_waits_total", "counter", "Checkouts timed by the pool", [({}, pool["wait_count"])])
+    out.gauge("db_pool_wait_max_seconds", "Longest wait for a connection", pool["wait_max_ms"] / 1000)
+    saturation = pool_saturation(pool)
+    if saturation is not None:
+        out.gauge("db_pool_saturation", "Checked-out connections / (pool size + max overflow)", saturation)
+
+    out.gauge("app_bcrypt_in_progress", "bcrypt hashes/verifications running now", bcrypt_in_progress.value)
+    out.gauge("app_password_hash_queue_depth", "Bulk password hashes submitted to the hash pool and not finished", password_hash_queue_depth())
+
+    caches = [(cache.name, cache.stats()) for cache in all_caches()]
+    out.family("app_cache_hits_total", "counter", "Cache hits", [({"cache": n}, s["hits"]) for n, s in caches])
+    out.family("app_cache_misses_total", "counter", "Cache misses", [({"cache": n}, s["misses"]) for n, s in caches])
+    out.family("app_cache_hit_ratio", "gauge", "Cache hits / lookups since start", [({"cache": n}, round(s["hit_ratio"], 4)) for n, s in caches])
+    out.family("app_cache_entries", "gauge", "Cached entries", [({"cache": n}, s["entries"]) for n, s in caches])
+
+    queue = sqlite_write_queue.stats()
+    out.gauge("app_sqlite_write_queue_depth", "Write units waiting for the SQLite writer", queue["queued"])
+    out.family("app_sqlite_write_batches_total", "counter", "Group commits by the SQLite writer", [({}, queue["batches"])])
+
+    if settings.ADMISSION_ENABLED:
+        admission_controller.write(out)
+
+    out.gauge("app_bootstrap_ready", "1 once this worker's startup bootstrap finished", int(bootstrap_status["state"] == "ready"),
+              {"state": bootstrap_status["state"]})
+    return Response(content=out.render(), media_type="text/plain; version=0.0.4")
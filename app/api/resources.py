@@ -1,13 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List
 from app.db.database import get_db
+from app.db.replicas import get_async_read_db, get_read_db
+from app.db.write_queue import run_write
 from app.models.user import User
 from app.models.resource import Resource
 from app.schemas.resource import ResourceCreate, ResourceUpdate, ResourceResponse
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, get_current_user_async
 
 router = APIRouter()
+# Async variants of the hot endpoints, mounted ahead of router when ASYNC_DB_ENABLED
+async_router = APIRouter()
 
 # Template resources - Azure specific
 TEMPLATE_RESOURCES = [
@@ -358,6 +364,19 @@ TEMPLATE_RESOURCES = [
 ]
 
 
+def insert_resources(db: Session, rows: List[dict]) -> List[Resource]:
+    """Insert many resources in one statement and return them in insertion order.
+    
+    Adding Resource objects and flushing costs one INSERT per row on SQLite
+    (the ORM only batches when it can match RETURNING rows to objects);
+    an ORM bulk insert sends a single multi-row INSERT ... RETURNING.
+    """
+    if not rows:
+        return []
+    resources = db.scalars(insert(Resource).returning(Resource), rows).all()
+    return sorted(resources, key=lambda r: r.id)
+
+
 @router.get("/templates")
 def get_templates():
     """Get list of available template resources"""
@@ -379,34 +398,27 @@ def import_selected_templates(
             detail="Only admins can import resources"
         )
     
-    created_resources = []
-    for template_id in template_ids:
-        if 0 <= template_id < len(TEMPLATE_RESOURCES):
-            template = TEMPLATE_RESOURCES[template_id]
-            resource = Resource(
-                user_id=current_user.id,
-                title=template["title"],
-                resource_name=template["resource_name"],
-                description=template["description"],
-                icon=template["icon"],
-                status=template["status"],
-                region=template["region"]
-            )
-            db.add(resource)
-            db.flush()
-            
-            created_resources.append(ResourceResponse(
-                id=resource.id,
-                user_id=str(resource.user_id),
-                icon=resource.icon,
-                title=resource.title,
-                resource_name=resource.resource_name,
-                description=resource.description,
-                status=resource.status,
-                region=resource.region,
-                created_at=resource.created_at,
-                updated_at=resource.updated_at
-            ))
+    rows = [
+        {"user_id": current_user.id, **TEMPLATE_RESOURCES[template_id]}
+        for template_id in template_ids
+        if 0 <= template_id < len(TEMPLATE_RESOURCES)
+    ]
+    resources = insert_resources(db, rows)
+    created_resources = [
+        ResourceResponse(
+            id=r.id,
+            user_id=str(r.user_id),
+            icon=r.icon,
+            title=r.title,
+            resource_name=r.resource_name,
+            description=r.description,
+            status=r.status,
+            region=r.region,
+            created_at=r.created_at,
+            updated_at=r.updated_at
+        )
+        for r in resources
+    ]
     
     db.commit()
     return created_resources
@@ -415,7 +427,7 @@ def import_selected_templates(
 @router.get("/", response_model=List[ResourceResponse])
 def get_user_resources(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get all resources - admin sees their own, others see admin's resources"""
     from app.models.user import UserRole
@@ -449,6 +461,40 @@ def get_user_resources(
     ]
 
 
+@async_router.get("/", response_model=List[ResourceResponse])
+async def get_user_resources_async(
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Async get_user_resources: same rules, awaiting the database instead of holding a thread"""
+    from app.models.user import UserRole
+    
+    if current_user.role == UserRole.admin:
+        owner_id = current_user.id
+    else:
+        owner_id = await db.scalar(select(User.id).where(User.role == UserRole.admin).limit(1))
+    
+    resources = []
+    if owner_id is not None:
+        resources = (await db.scalars(select(Resource).where(Resource.user_id == str(owner_id)))).all()
+    
+    return [
+        ResourceResponse(
+            id=r.id,
+            user_id=str(r.user_id),
+            icon=r.icon,
+            title=r.title,
+            resource_name=r.resource_name,
+            description=r.description,
+            status=r.status,
+            region=r.region,
+            created_at=r.created_at,
+            updated_at=r.updated_at
+        )
+        for r in resources
+    ]
+
+
 @router.post("/", response_model=ResourceResponse, status_code=status.HTTP_201_CREATED)
 def create_resource(
     resource_data: ResourceCreate,
@@ -465,22 +511,26 @@ def create_resource(
             detail="Only admins can create resources"
         )
     
-    resource = Resource(
-        user_id=current_user.id,
-        icon=resource_data.icon,
-        title=resource_data.title,
-        resource_name=resource_data.resource_name,
-        description=resource_data.description,
-        status=resource_data.status,
-        region=resource_data.region
-    )
-    # Set custom created_at if provided
-    if resource_data.created_at:
-        resource.created_at = resource_data.created_at
+    owner_id = current_user.id
     
-    db.add(resource)
-    db.commit()
-    db.refresh(resource)
+    def insert_resource(session: Session) -> Resource:
+        resource = Resource(
+            user_id=owner_id,
+            icon=resource_data.icon,
+            title=resource_data.title,
+            resource_name=resource_data.resource_name,
+            description=resource_data.description,
+            status=resource_data.status,
+            region=resource_data.region
+        )
+        # Set custom created_at if provided
+        if resource_data.created_at:
+            resource.created_at = resource_data.created_at
+        session.add(resource)
+        session.flush()
+        return resource
+    
+    resource = run_write(db, insert_resource)
     
     # Convert UUID to string for response
     return ResourceResponse(
@@ -514,27 +564,29 @@ def update_resource(
             detail="Only admins can update resources"
         )
     
-    resource = db.query(Resource).filter(Resource.id == resource_id).first()
-    
-    if not resource:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Resource not found"
-        )
-    
-    resource.icon = resource_data.icon
-    resource.title = resource_data.title
-    resource.resource_name = resource_data.resource_name
-    resource.description = resource_data.description
-    resource.status = resource_data.status
-    resource.region = resource_data.region
-    
-    # Update created_at if provided
-    if resource_data.created_at:
-        resource.created_at = resource_data.created_at
+    def apply_update(session: Session) -> Resource:
+        resource = session.query(Resource).filter(Resource.id == resource_id).first()
+        
+        if not resource:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Resource not found"
+            )
+        
+        resource.icon = resource_data.icon
+        resource.title = resource_data.title
+        resource.resource_name = resource_data.resource_name
+        resource.description = resource_data.description
+        resource.status = resource_data.status
+        resource.region = resource_data.region
+        
+        # Update created_at if provided
+        if resource_data.created_at:
+            resource.created_at = resource_data.created_at
+        session.flush()
+        return resource
     
-    db.commit()
-    db.refresh(resource)
+    resource = run_write(db, apply_update)
     
     # Convert UUID to string for response
     return ResourceResponse(
@@ -667,32 +719,22 @@ def seed_template_resources(
         }
     ]
     
-    created_resources = []
-    for template in templates:
-        resource = Resource(
-            user_id=current_user.id,
-            title=template["title"],
-            resource_name=template["resource_name"],
-            description=template["description"],
-            icon=template["icon"],
-            status=template["status"],
-            region=template["region"]
+    resources = insert_resources(db, [{"user_id": current_user.id, **template} for template in templates])
+    created_resources = [
+        ResourceResponse(
+            id=r.id,
+            user_id=str(r.user_id),
+            icon=r.icon,
+            title=r.title,
+            resource_name=r.resource_name,
+            description=r.description,
+            status=r.status,
+            region=r.region,
+            created_at=r.created_at,
+            updated_at=r.updated_at
         )
-        db.add(resource)
-        db.flush()
-        
-        created_resources.append(ResourceResponse(
-            id=resource.id,
-            user_id=str(resource.user_id),
-            icon=resource.icon,
-            title=resource.title,
-            resource_name=resource.resource_name,
-            description=resource.description,
-            status=resource.status,
-            region=resource.region,
-            created_at=resource.created_at,
-            updated_at=resource.updated_at
-        ))
+        for r in resources
+    ]
     
     db.commit()
     return created_resources
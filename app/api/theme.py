@@ -1,30 +1,229 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
+import hashlib
 import json
+import threading
 from app.db.database import get_db
+from app.db.async_database import get_async_db
+from app.db.write_queue import run_write
 from app.schemas.user import ThemeConfigResponse, ThemeConfigUpdate
 from app.models.user import ThemeConfig, User
-from app.api.deps import get_current_admin_user, get_current_user
+from app.api.deps import get_current_admin_user, get_current_user, get_current_user_id, get_current_user_id_async
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.theme_store import (
+    USER_THEME_PREFIX, GLOBAL_SCOPE, upsert_theme_config, merge_patch_theme_config, apply_merge_patch,
+    get_theme_versions, load_global_theme, theme_scope, theme_version_cache, theme_writer
+)
 
 router = APIRouter()
+# Async variants of the hot endpoints, mounted ahead of router when ASYNC_DB_ENABLED
+async_router = APIRouter()
+
+# config_key -> (user version, (JSON body bytes, ETag)) of a user's stored theme
+user_theme_cache = TTLCache("user_theme", lambda: settings.THEME_CACHE_MAX_ENTRIES, lambda: settings.THEME_CACHE_TTL_SECONDS)
+
+# config_key -> ((global version, user version), (compiled JSON bytes, ETag))
+effective_theme_cache = TTLCache(
+    "effective_theme", lambda: settings.THEME_CACHE_MAX_ENTRIES, lambda: settings.THEME_CACHE_TTL_SECONDS
+)
+
+
+def _forget_unsaved_themes(config_keys: List[str]) -> None:
+    # A debounced save that never reached the database must not stay cached
+    for config_key in config_keys:
+        user_theme_cache.invalidate(config_key)
+        effective_theme_cache.invalidate(config_key)
+
+
+theme_writer.on_unsaved = _forget_unsaved_themes
+
+# Parsed global layer for the global version it was read at
+_global_theme: Tuple[Any, Dict[str, Any]] = (None, {})
+_global_theme_lock = threading.Lock()
+
+
+def _theme_entry(body: bytes) -> Tuple[bytes, str]:
+    return body, '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+
+
+def _load_theme_entry(db: Session, config_key: str) -> Tuple[bytes, str]:
+    """Read a stored theme on cache miss; the JSON is validated once here"""
+    config_value = db.scalar(select(ThemeConfig.config_value).where(ThemeConfig.config_key == config_key))
+    if config_value:
+        try:
+            json.loads(config_value)
+            return _theme_entry(config_value.encode())
+        except json.JSONDecodeError:
+            pass
+    return _theme_entry(b"{}")
+
+
+def _user_theme_entry(db: Session, config_key: str) -> Tuple[bytes, str]:
+    """The user's theme, from cache while the user's theme version is unchanged.
+    
+    The version is the one get_theme_versions caches for
+    THEME_VERSION_TTL_SECONDS, so a save on another worker shows up within
+    that time without the steady state touching the database. A save still
+    waiting out its debounce window on this worker is newer than both.
+    """
+    pending = theme_writer.pending_value(config_key)
+    if pending is not None:
+        return _theme_entry(pending.encode())
+    version = get_theme_versions(db, [config_key])[config_key]
+    cached = user_theme_cache.get(config_key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    # Read after the version: a write in between leaves a newer body under
+    # the older version, which the next version check replaces
+    entry = _load_theme_entry(db, config_key)
+    user_theme_cache.set(config_key, (version, entry))
+    return entry
 
 
 @router.get("/")
 def get_user_theme(
+    request: Request,
+    user_id = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """Serve the stored theme JSON as-is from a per-user, version-checked cache.
+    
+    Steady-state reads do no database access and no JSON parsing or
+    re-serialisation; the ETag lets clients skip the body entirely.
+    """
+    config_key = f"{USER_THEME_PREFIX}{user_id}"
+    body, etag = _user_theme_entry(db, config_key)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+def _global_layer(db: Session, global_version: int) -> Dict[str, Any]:
+    global _global_theme
+    with _global_theme_lock:
+        if _global_theme[0] == global_version:
+            return _global_theme[1]
+    layer = load_global_theme(db)
+    with _global_theme_lock:
+        _global_theme = (global_version, layer)
+    return layer
+
+
+def _user_layer(db: Session, config_key: str) -> Dict[str, Any]:
+    # A save still waiting out its debounce window is newer than the database
+    config_value = theme_writer.pending_value(config_key)
+    if config_value is None:
+        config_value = db.scalar(select(ThemeConfig.config_value).where(ThemeConfig.config_key == config_key))
+    try:
+        value = json.loads(config_value) if config_value else {}
+    except json.JSONDecodeError:
+        value = {}
+    return value if isinstance(value, dict) else {}
+
+
+def _compile_effective_theme(db: Session, config_key: str) -> Tuple[bytes, str]:
+    versions = get_theme_versions(db, [GLOBAL_SCOPE, config_key])
+    version_key = (versions[GLOBAL_SCOPE], versions[config_key])
+    
+    cached = effective_theme_cache.get(config_key)
+    if cached is not None and cached[0] == version_key:
+        return cached[1]
+    merged = apply_merge_patch(_global_layer(db, version_key[0]), _user_layer(db, config_key))
+    entry = _theme_entry(json.dumps(merged, separators=(",", ":")).encode())
+    effective_theme_cache.set(config_key, (version_key, entry))
+    return entry
+
+
+@router.get("/effective")
+def get_effective_theme(
+    request: Request,
+    user_id = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """Global theme keys deep-merged with the user's overrides.
+    
+    The compiled JSON is cached per (global version, user version): a
+    global edit bumps one version row and every user's cached theme
+    becomes stale at once. Versions are re-read every
+    THEME_VERSION_TTL_SECONDS, so steady-state reads do no database work.
+    A null in the user's theme removes the global key (merge-patch rules).
+    """
+    config_key = f"{USER_THEME_PREFIX}{user_id}"
+    body, etag = _compile_effective_theme(db, config_key)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+@async_router.get("/")
+async def get_user_theme_async(
+    request: Request,
+    user_id = Depends(get_current_user_id_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Async get_user_theme; cache hits never touch the database"""
+    config_key = f"{USER_THEME_PREFIX}{user_id}"
+    version = theme_version_cache.get(config_key)
+    cached = user_theme_cache.get(config_key)
+    if version is not None and cached is not None and cached[0] == version and theme_writer.pending_value(config_key) is None:
+        entry = cached[1]
+    else:
+        entry = await db.run_sync(_user_theme_entry, config_key)
+    
+    body, etag = entry
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+@async_router.get("/effective")
+async def get_effective_theme_async(
+    request: Request,
+    user_id = Depends(get_current_user_id_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Async get_effective_theme, running the same version-keyed compile"""
+    config_key = f"{USER_THEME_PREFIX}{user_id}"
+    body, etag = await db.run_sync(_compile_effective_theme, config_key)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+@router.patch("/")
+def patch_user_theme(
+    patch: Dict[str, Any],
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    config_key = f"user_theme_{current_user.id}"
-    config = db.query(ThemeConfig).filter(ThemeConfig.config_key == config_key).first()
+    """Partially update the user's theme with a JSON merge patch (RFC 7396).
     
-    if config and config.config_value:
-        try:
-            return json.loads(config.config_value)
-        except json.JSONDecodeError:
-            return {}
+    Only the changed keys are sent; null removes a key. The merge runs
+    inside the database where supported, so the stored blob is not read
+    back and rewritten by the application.
+    """
+    config_key = f"{USER_THEME_PREFIX}{current_user.id}"
+    # An earlier debounced save must land before the patch applies on top of it
+    theme_writer.flush(config_key)
+    
+    try:
+        new_value = run_write(db, lambda session: merge_patch_theme_config(session, config_key, patch))
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
     
-    return {}
+    theme_version_cache.invalidate(config_key)
+    user_theme_cache.invalidate(config_key)
+    effective_theme_cache.invalidate(config_key)
+    entry = _theme_entry(new_value.encode())
+    return Response(content=entry[0], media_type="application/json", headers={"ETag": entry[1]})
 
 
 @router.put("/")
@@ -33,21 +232,18 @@ def save_user_theme(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    config_key = f"user_theme_{current_user.id}"
+    config_key = f"{USER_THEME_PREFIX}{current_user.id}"
     theme_json = json.dumps(theme_data)
     
-    config = db.query(ThemeConfig).filter(ThemeConfig.config_key == config_key).first()
-    
-    if not config:
-        config = ThemeConfig(
-            config_key=config_key,
-            config_value=theme_json
-        )
-        db.add(config)
+    if settings.THEME_SAVE_DEBOUNCE_SECONDS > 0:
+        # Rapid successive saves (slider drags) collapse into one write per window
+        theme_writer.submit(config_key, theme_json)
     else:
-        config.config_value = theme_json
-    
-    db.commit()
+        run_write(db, lambda session: upsert_theme_config(session, config_key, theme_json))
+        theme_version_cache.invalidate(config_key)
+    # Other workers notice the bumped version within THEME_VERSION_TTL_SECONDS
+    user_theme_cache.invalidate(config_key)
+    effective_theme_cache.invalidate(config_key)
     return theme_data
 
 
@@ -57,7 +253,16 @@ def get_all_theme_configs(
     db: Session = Depends(get_db)
 ):
     configs = db.query(ThemeConfig).all()
-    return configs
+    return [
+        ThemeConfigResponse(
+            id=str(config.id),
+            config_key=config.config_key,
+            config_value=config.config_value,
+            created_at=config.created_at,
+            updated_at=config.updated_at
+        )
+        for config in configs
+    ]
 
 
 @router.patch("/{config_key}", response_model=ThemeConfigResponse)
@@ -67,18 +272,21 @@ def update_theme_config(
     current_admin = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
-    config = db.query(ThemeConfig).filter(ThemeConfig.config_key == config_key).first()
+    # Single-statement upsert (creates the key if it doesn't exist) returning the row
+    config = run_write(db, lambda session: upsert_theme_config(session, config_key, config_update.config_value))
     
-    if not config:
-        # Create if doesn't exist
-        config = ThemeConfig(
-            config_key=config_key,
-            config_value=config_update.config_value
-        )
-        db.add(config)
-    else:
-        config.config_value = config_update.config_value
+    # A global key bumps the single global version, invalidating every
+    # user's effective theme without touching their cache entries
+    theme_version_cache.invalidate(theme_scope(config_key))
+    if config_key.startswith(USER_THEME_PREFIX):
+        theme_writer.discard(config_key)
+        user_theme_cache.invalidate(config_key)
+        effective_theme_cache.invalidate(config_key)
     
-    db.commit()
-    db.refresh(config)
-    return config
+    return ThemeConfigResponse(
+        id=str(config.id),
+        config_key=config.config_key,
+        config_value=config.config_value,
+        created_at=config.created_at,
+        updated_at=config.updated_at
+    )
@@ -1,13 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.db.database import get_db
+from app.db.replicas import get_async_read_db, get_read_db
+from app.db.user_directory import DEFAULT_LIMIT, LISTING_DESCRIPTION, MAX_LIMIT, user_directory_response
 from app.schemas.user import UserResponse, UserUpdate, PasswordResetRequest
-from app.models.user import User
-from app.api.deps import get_current_user, get_current_admin_user
+from app.models.user import User, UserRole
+from app.api.deps import get_current_user, get_current_admin_user, get_current_user_async, get_current_admin_user_async
 from app.core.security import get_password_hash
 
 router = APIRouter()
+# Async variants of the hot endpoints, mounted ahead of router when ASYNC_DB_ENABLED
+async_router = APIRouter()
 
 
 @router.get("/me", response_model=UserResponse)
@@ -53,25 +58,33 @@ def update_current_user_profile(
     )
 
 
-@router.get("/", response_model=List[UserResponse])
+@router.get("/", response_model=List[UserResponse], description=LISTING_DESCRIPTION)
 def get_all_users(
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    cursor: Optional[str] = None,
+    role: Optional[UserRole] = None,
+    email_prefix: Optional[str] = Query(None, min_length=1, max_length=255),
     current_admin: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    users = db.query(User).all()
-    return [
-        UserResponse(
-            id=str(user.id),
-            email=user.email,
-            display_name=user.display_name,
-            tagline=user.tagline,
-            bio=user.bio,
-            avatar_url=user.avatar_url,
-            role=user.role,
-            created_at=user.created_at
-        )
-        for user in users
-    ]
+    return user_directory_response(db, limit, cursor, role, email_prefix)
+
+
+@async_router.get("/me", response_model=UserResponse)
+async def get_current_user_profile_async(current_user: User = Depends(get_current_user_async)):
+    return get_current_user_profile(current_user)
+
+
+@async_router.get("/", response_model=List[UserResponse], description=LISTING_DESCRIPTION)
+async def get_all_users_async(
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    cursor: Optional[str] = None,
+    role: Optional[UserRole] = None,
+    email_prefix: Optional[str] = Query(None, min_length=1, max_length=255),
+    current_admin: User = Depends(get_current_admin_user_async),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    return await db.run_sync(user_directory_response, limit, cursor, role, email_prefix)
 
 
 @router.get("/{user_id}", response_model=UserResponse)
@@ -0,0 +1,232 @@
+"""Admission control: per-route-class concurrency limits and load shedding.
+
+When the database slows down, requests otherwise pile up in the threadpool
+and every one of them ends up slow (or timing out). Instead, each class of
+route gets a concurrency limit and a short bounded FIFO queue in front of
+it; a request that cannot start within ADMISSION_QUEUE_TIMEOUT_MS is
+answered at once with 503 and Retry-After, so most traffic stays fast and
+clients (or the load balancer) retry later instead of waiting 30 seconds.
+
+- Classes: auth (/api/auth), admin (/api/admin), reads (other GET/HEAD
+  under /api) and writes (other methods under /api). Everything outside
+  /api (/health, /ready, /metrics, the docs) and CORS preflights are
+  never queued.
+- Early shedding: a request is rejected on arrival, without queueing, when
+  the queue is full or when the wait estimated from the queue length and
+  the recent latency/limit would already exceed the timeout.
+- Adaptive limits (AIMD): a request slower than its class's latency target
+  cuts the limit by DECREASE_FACTOR (at most once per latency period, so
+  one burst of slow responses is one cut); a request within target while
+  the class is using its whole limit adds 1/limit, about +1 per limit's
+  worth of requests. The limit stays between ADMISSION_MIN_CONCURRENCY and
+  the class's configured concurrency, where it starts.
+
+The gates live in one worker's event loop (the middleware is async), so
+they need no locks; like the metrics, every worker has its own.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from functools import cached_property
+from typing import Deque, Dict, Optional
+from app.core.config import settings
+from app.core.metrics import MetricsWriter
+
+logger = logging.getLogger("app.admission")
+
+CLASSES = ("auth", "reads", "writes", "admin")
+DECREASE_FACTOR = 0.75
+# Weight of the newest sample in the latency average used for wait estimates
+LATENCY_EWMA_WEIGHT = 0.2
+MAX_RETRY_AFTER_SECONDS = 30
+
+
+class Shed(Exception):
+    """The request was not admitted; retry_after is the suggested wait in seconds"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionGate:
+    """Concurrency limit, bounded wait queue and AIMD state for one route class"""
+
+    def __init__(self, name: str, max_limit: int, min_limit: int, target_seconds: float,
+                 max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_limit = max(max_limit, 1)
+        self.min_limit = max(min(min_limit, self.max_limit), 1)
+        self.limit = float(self.max_limit)
+        self.target = target_seconds
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.latency = target_seconds  # EWMA of the service time, seeded with the target
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+        self.admitted = 0
+        self.shed: Dict[str, int] = {"queue_full": 0, "deadline": 0, "timeout": 0}
+        self.queue_wait_total = 0.0
+        self.decreases = 0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _estimated_wait(self, position: int) -> float:
+        # Slots free up at about limit / latency per second
+        return (position + 1) * self.latency / max(self.limit, 1.0)
+
+    def _reject(self, reason: str, retry_after: float) -> Shed:
+        self.shed[reason] += 1
+        return Shed(reason, min(max(retry_after, 1.0), MAX_RETRY_AFTER_SECONDS))
+
+    async def acquire(self) -> float:
+        """Wait for a slot; returns the seconds spent queued or raises Shed"""
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return 0.0
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject("queue_full", self._estimated_wait(len(self._waiters)))
+        estimate = self._estimated_wait(len(self._waiters))
+        if estimate > self.queue_timeout:
+            raise self._reject("deadline", estimate)
+
+        started = time.perf_counter()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait({waiter}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            # The client went away while queued
+            if waiter.done():
+                self.release(None)  # a slot was already handed over: pass it on
+            else:
+                waiter.cancel()
+                self._remove(waiter)
+            raise
+        if not waiter.done():
+            waiter.cancel()
+            self._remove(waiter)
+            raise self._reject("timeout", self._estimated_wait(len(self._waiters)))
+        waited = time.perf_counter() - started
+        self.admitted += 1
+        self.queue_wait_total += waited
+        return waited
+
+    def release(self, service_seconds: Optional[float]) -> None:
+        """Free a slot and adapt the limit to how long the request took (None: do not adapt)"""
+        saturated = self.in_flight >= int(self.limit) or bool(self._waiters)
+        self.in_flight -= 1
+        if service_seconds is not None:
+            self._observe(service_seconds, saturated)
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def _observe(self, seconds: float, saturated: bool) -> None:
+        self.latency += LATENCY_EWMA_WEIGHT * (seconds - self.latency)
+        now = time.monotonic()
+        if seconds > self.target:
+            if now - self._last_decrease >= max(seconds, self.target) and self.limit > self.min_limit:
+                self.limit = max(self.limit * DECREASE_FACTOR, float(self.min_limit))
+                self._last_decrease = now
+                self.decreases += 1
+                logger.warning(
+                    f"⚠️ {self.name}: {seconds * 1000:.0f}ms > {self.target * 1000:.0f}ms target, "
+                    f"concurrency limit down to {int(self.limit)}"
+                )
+        elif saturated and self.limit < self.max_limit:
+            self.limit = min(self.limit + 1 / self.limit, float(self.max_limit))
+
+    def _remove(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "limit": int(self.limit),
+            "max_limit": self.max_limit,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "latency_ms": round(self.latency * 1000, 2),
+            "target_ms": round(self.target * 1000, 2),
+            "admitted": self.admitted,
+            "shed": dict(self.shed),
+            "limit_decreases": self.decreases,
+        }
+
+
+def route_class(method: str, path: str) -> Optional[str]:
+    """The admission class of a request, or None when it is never queued"""
+    if method == "OPTIONS" or not path.startswith("/api/"):
+        return None
+    if path.startswith("/api/auth/"):
+        return "auth"
+    if path.startswith("/api/admin/"):
+        return "admin"
+    return "reads" if method in ("GET", "HEAD") else "writes"
+
+
+class AdmissionController:
+    @cached_property
+    def gates(self) -> Dict[str, AdmissionGate]:
+        """One gate per class, built on first use from the ADMISSION_* settings"""
+        concurrency = {
+            "auth": settings.ADMISSION_AUTH_CONCURRENCY,
+            "reads": settings.ADMISSION_READS_CONCURRENCY,
+            "writes": settings.ADMISSION_WRITES_CONCURRENCY,
+            "admin": settings.ADMISSION_ADMIN_CONCURRENCY,
+        }
+        targets = {
+            "auth": settings.ADMISSION_AUTH_TARGET_MS,
+            "reads": settings.ADMISSION_READS_TARGET_MS,
+            "writes": settings.ADMISSION_WRITES_TARGET_MS,
+            "admin": settings.ADMISSION_ADMIN_TARGET_MS,
+        }
+        return {
+            name: AdmissionGate(
+                name, concurrency[name], settings.ADMISSION_MIN_CONCURRENCY, targets[name] / 1000,
+                settings.ADMISSION_MAX_QUEUE, settings.ADMISSION_QUEUE_TIMEOUT_MS / 1000
+            )
+            for name in CLASSES
+        }
+
+    def gate(self, method: str, path: str) -> Optional[AdmissionGate]:
+        name = route_class(method, path)
+        return self.gates[name] if name else None
+
+    def stats(self) -> Dict[str, dict]:
+        return {name: gate.stats() for name, gate in self.gates.items()}
+
+    def write(self, out: MetricsWriter) -> None:
+        stats = self.stats()
+
+        def per_class(key):
+            return [({"class": name}, s[key]) for name, s in stats.items()]
+
+        out.family("app_admission_limit", "gauge", "Current adaptive concurrency limit", per_class("limit"))
+        out.family("app_admission_in_flight", "gauge", "Admitted requests running", per_class("in_flight"))
+        out.family("app_admission_queued", "gauge", "Requests waiting for a slot", per_class("queued"))
+        out.family("app_admission_latency_seconds", "gauge", "Recent average service time",
+                   [({"class": name}, s["latency_ms"] / 1000) for name, s in stats.items()])
+        out.family("app_admission_admitted_total", "counter", "Requests admitted", per_class("admitted"))
+        out.family("app_admission_shed_total", "counter", "Requests rejected with 503 by reason", [
+            ({"class": name, "reason": reason}, count)
+            for name, s in stats.items() for reason, count in s["shed"].items()
+        ])
+        out.family("app_admission_queue_wait_seconds_total", "counter", "Time admitted requests spent queued",
+                   [({"class": name}, round(gate.queue_wait_total, 6)) for name, gate in self.gates.items()])
+        out.family("app_admission_limit_decreases_total", "counter", "Multiplicative limit decreases",
+                   per_class("limit_decreases"))
+
+
+admission_controller = AdmissionController()
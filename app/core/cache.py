@@ -0,0 +1,84 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import cached_property
+from typing import Any, Callable, Dict, Hashable, List, Optional, Union
+from app.core.config import setting_value
+
+# Every cache created in this process, for /metrics
+_registry: List["TTLCache"] = []
+
+
+class TTLCache:
+    """Thread-safe LRU cache with a per-entry time-to-live.
+
+    Each worker process has its own copy, so entries written by another
+    worker are only picked up once the TTL expires; the TTL bounds staleness.
+    The limits may be callables (e.g. `lambda: settings.X`), read on first use.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: Union[int, Callable[[], int]],
+        ttl_seconds: Union[float, Callable[[], float]]
+    ):
+        self.name = name
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        _registry.append(self)
+
+    @cached_property
+    def max_entries(self) -> int:
+        return max(setting_value(self._max_entries), 1)
+
+    @cached_property
+    def ttl_seconds(self) -> float:
+        return setting_value(self._ttl_seconds)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0
+            }
+
+
+def all_caches() -> List[TTLCache]:
+    return list(_registry)
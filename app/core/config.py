@@ -1,33 +1,197 @@
 import os
+import threading
 from urllib.parse import quote
 from dotenv import load_dotenv
 from pathlib import Path
 
-# Load .env file if exists (for VM deployment)
-
-# Priority: .env file > Environment Variables (override=True)
 env_path = Path(__file__).resolve().parent.parent.parent / '.env'
-load_dotenv(dotenv_path=env_path, override=True)
+
 
 class Settings:
     """Settings class that reads from environment variables"""
     
     def __init__(self):
+        # Server Configuration (run.py, see app/core/server.py)
+        self.APP_ENV = os.getenv("APP_ENV", "development")
+        self.HOST = os.getenv("HOST", "0.0.0.0")
+        self.PORT = int(os.getenv("PORT", "8000"))
+        # A number, or "auto": usable CPUs (affinity and cgroup quota) x UVICORN_WORKERS_PER_CPU
+        self.UVICORN_WORKERS = os.getenv("UVICORN_WORKERS", "auto")
+        self.UVICORN_WORKERS_PER_CPU = float(os.getenv("UVICORN_WORKERS_PER_CPU", "1"))
+        self.UVICORN_LOOP = os.getenv("UVICORN_LOOP", "auto").lower()  # auto | uvloop | asyncio
+        self.UVICORN_HTTP = os.getenv("UVICORN_HTTP", "auto").lower()  # auto | httptools | h11
+        # Import the app once in the master so workers share it copy-on-write
+        self.UVICORN_PRELOAD = os.getenv("UVICORN_PRELOAD", "true").lower() == "true"
+        self.UVICORN_BACKLOG = int(os.getenv("UVICORN_BACKLOG", "2048"))
+        # Longer than the load balancer's idle timeout, so it never reuses a connection we closed
+        self.UVICORN_KEEPALIVE_SECONDS = int(os.getenv("UVICORN_KEEPALIVE_SECONDS", "75"))
+        # On SIGTERM, in-flight requests get this long to finish
+        self.UVICORN_GRACEFUL_TIMEOUT_SECONDS = float(os.getenv("UVICORN_GRACEFUL_TIMEOUT_SECONDS", "30"))
+        # Restart a worker after this many requests (0 disables), plus up to the jitter
+        self.UVICORN_MAX_REQUESTS = int(os.getenv("UVICORN_MAX_REQUESTS", "0"))
+        self.UVICORN_MAX_REQUESTS_JITTER = int(os.getenv("UVICORN_MAX_REQUESTS_JITTER", "0"))
+        
         # Database Configuration
         self.AZURE_SQL_SERVER = os.getenv("AZURE_SQL_SERVER", "")
         self.AZURE_SQL_DATABASE = os.getenv("AZURE_SQL_DATABASE", "")
         self.AZURE_SQL_USERNAME = os.getenv("AZURE_SQL_USERNAME", "")
         self.AZURE_SQL_PASSWORD = os.getenv("AZURE_SQL_PASSWORD", "")
         
+        self.LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+        
         # Security Configuration
         self.SECRET_KEY = os.getenv("SECRET_KEY", "development-secret-key-change-in-production")
         self.ALGORITHM = "HS256"
         self.ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+        # Threads used for batch password hashing (bcrypt releases the GIL)
+        self.PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+        
+        # Connection Pool Configuration
+        self.DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+        self.DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+        self.DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+        # Azure SQL drops idle connections after ~30 minutes; recycle before that
+        self.DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+        self.DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+        # Connections opened at startup so the first requests skip the TCP/TLS/login cost
+        self.DB_POOL_PREWARM = int(os.getenv("DB_POOL_PREWARM", "0"))
+        
+        # Startup Bootstrap Configuration
+        # How long a worker waits for another worker's schema setup before giving up
+        self.BOOTSTRAP_LOCK_TIMEOUT_SECONDS = float(os.getenv("BOOTSTRAP_LOCK_TIMEOUT_SECONDS", "120"))
+        # Lock file used instead of sp_getapplock when running on SQLite
+        self.BOOTSTRAP_LOCK_PATH = os.getenv(
+            "BOOTSTRAP_LOCK_PATH",
+            str(Path(__file__).resolve().parent.parent.parent / "data" / ".bootstrap.lock")
+        )
+        
+        # Read Replica Configuration
+        # Comma-separated SQLAlchemy URLs; reads on read-mostly endpoints go here
+        self.DB_READ_REPLICA_URLS = os.getenv("DB_READ_REPLICA_URLS", "")
+        # After a client writes, its reads stay on the primary this long (replication lag)
+        self.DB_READ_YOUR_WRITES_SECONDS = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5"))
+        # A replica that failed to connect is skipped this long
+        self.DB_REPLICA_RETRY_SECONDS = float(os.getenv("DB_REPLICA_RETRY_SECONDS", "30"))
+        
+        # SQLite Tuning (local development / single-host deployments)
+        # Database file used when Azure SQL is not configured
+        self.SQLITE_DATABASE_PATH = os.getenv(
+            "SQLITE_DATABASE_PATH",
+            str(Path(__file__).resolve().parent.parent.parent / "data" / "app.db")
+        )
+        self.SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL").upper()
+        self.SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL").upper()
+        self.SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+        self.SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+        self.SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+        self.SQLITE_TEMP_STORE = os.getenv("SQLITE_TEMP_STORE", "MEMORY").upper()
+        # Funnel writes through one thread that commits them in batches
+        self.SQLITE_WRITE_QUEUE_ENABLED = os.getenv("SQLITE_WRITE_QUEUE_ENABLED", "false").lower() == "true"
+        self.SQLITE_WRITE_BATCH_MAX = int(os.getenv("SQLITE_WRITE_BATCH_MAX", "64"))
+        self.SQLITE_WRITE_BATCH_WAIT_MS = float(os.getenv("SQLITE_WRITE_BATCH_WAIT_MS", "2"))
+        
+        # Per-request query count / DB time (Server-Timing header, app.db.queries log)
+        self.DB_INSTRUMENTATION_ENABLED = os.getenv("DB_INSTRUMENTATION_ENABLED", "true").lower() == "true"
+        # Warn when one request runs the same statement this many times (0 disables)
+        self.DB_REPEATED_STATEMENT_WARN = int(os.getenv("DB_REPEATED_STATEMENT_WARN", "5"))
+        
+        # Statements slower than this are logged with their query plan (0 disables)
+        self.SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "500"))
+        self.SLOW_QUERY_CAPTURE_PLAN = os.getenv("SLOW_QUERY_CAPTURE_PLAN", "true").lower() == "true"
+        self.SLOW_QUERY_LOG_PATH = os.getenv(
+            "SLOW_QUERY_LOG_PATH",
+            str(Path(__file__).resolve().parent.parent.parent / "data" / "slow_queries.log")
+        )
+        self.SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", str(5 * 1024 * 1024)))
+        self.SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "3"))
+        
+        # Monitoring: /metrics (per worker process) and the /ready probe
+        self.METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+        # /ready reports not ready when SELECT 1 takes longer than this
+        self.READY_DB_TIMEOUT_SECONDS = float(os.getenv("READY_DB_TIMEOUT_SECONDS", "2"))
+        
+        # Admins may send X-Profile: 1 to profile a request; reports go to PROFILE_DIR
+        self.PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "true").lower() == "true"
+        self.PROFILE_DIR = os.getenv(
+            "PROFILE_DIR",
+            str(Path(__file__).resolve().parent.parent.parent / "data" / "profiles")
+        )
+        
+        # Admission control: per-class concurrency limits, 503 + Retry-After when overloaded (app/core/admission.py)
+        self.ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+        self.ADMISSION_MIN_CONCURRENCY = int(os.getenv("ADMISSION_MIN_CONCURRENCY", "2"))
+        # Starting and highest concurrency per class. Every admitted /api request holds a
+        # pooled connection, so by default the classes split the pool's capacity
+        # (DB_POOL_SIZE + DB_MAX_OVERFLOW): reads 1/2, auth 1/5, writes 1/5, admin 1/10
+        pool_capacity = self.DB_POOL_SIZE + max(self.DB_MAX_OVERFLOW, 0)
+        self.ADMISSION_AUTH_CONCURRENCY = int(os.getenv(
+            "ADMISSION_AUTH_CONCURRENCY", max(pool_capacity // 5, self.ADMISSION_MIN_CONCURRENCY)
+        ))
+        self.ADMISSION_READS_CONCURRENCY = int(os.getenv(
+            "ADMISSION_READS_CONCURRENCY", max(pool_capacity // 2, self.ADMISSION_MIN_CONCURRENCY)
+        ))
+        self.ADMISSION_WRITES_CONCURRENCY = int(os.getenv(
+            "ADMISSION_WRITES_CONCURRENCY", max(pool_capacity // 5, self.ADMISSION_MIN_CONCURRENCY)
+        ))
+        self.ADMISSION_ADMIN_CONCURRENCY = int(os.getenv(
+            "ADMISSION_ADMIN_CONCURRENCY", max(pool_capacity // 10, self.ADMISSION_MIN_CONCURRENCY)
+        ))
+        # Requests slower than the class target shrink its limit; faster ones let it grow back
+        self.ADMISSION_AUTH_TARGET_MS = float(os.getenv("ADMISSION_AUTH_TARGET_MS", "1000"))
+        self.ADMISSION_READS_TARGET_MS = float(os.getenv("ADMISSION_READS_TARGET_MS", "300"))
+        self.ADMISSION_WRITES_TARGET_MS = float(os.getenv("ADMISSION_WRITES_TARGET_MS", "500"))
+        self.ADMISSION_ADMIN_TARGET_MS = float(os.getenv("ADMISSION_ADMIN_TARGET_MS", "2000"))
+        # Waiting requests per class, and the longest a request may wait before it is shed
+        self.ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+        self.ADMISSION_QUEUE_TIMEOUT_MS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_MS", "1000"))
+        
+        # Async Database Configuration (opt-in)
+        # Serves the hot read endpoints from async routes on an AsyncEngine
+        self.ASYNC_DB_ENABLED = os.getenv("ASYNC_DB_ENABLED", "false").lower() == "true"
+        # Full async URL; derived from the sync connection settings when empty
+        self.ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", "")
+        self.ASYNC_MSSQL_DRIVER = os.getenv("ASYNC_MSSQL_DRIVER", "aioodbc")
+        self.ASYNC_MSSQL_ODBC_DRIVER = os.getenv("ASYNC_MSSQL_ODBC_DRIVER", "ODBC Driver 18 for SQL Server")
         
         # CORS Configuration
         self.CORS_ALLOW_ORIGINS = os.getenv("CORS_ALLOW_ORIGINS", "*")
         self.FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:5000")
-    
+
+        # Login Throttling Configuration
+        self.LOGIN_RATE_LIMIT_ENABLED = os.getenv("LOGIN_RATE_LIMIT_ENABLED", "true").lower() == "true"
+        self.LOGIN_EMAIL_MAX_ATTEMPTS = int(os.getenv("LOGIN_EMAIL_MAX_ATTEMPTS", "5"))
+        self.LOGIN_EMAIL_WINDOW_SECONDS = float(os.getenv("LOGIN_EMAIL_WINDOW_SECONDS", "60"))
+        # Per-IP limit, off by default (0): behind a load balancer every client shares its
+        # address unless TRUST_FORWARDED_FOR is on, and they would all share one budget
+        self.LOGIN_IP_MAX_ATTEMPTS = int(os.getenv("LOGIN_IP_MAX_ATTEMPTS", "0"))
+        self.LOGIN_IP_WINDOW_SECONDS = float(os.getenv("LOGIN_IP_WINDOW_SECONDS", "60"))
+        self.RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()  # memory | sqlite
+        self.RATE_LIMIT_SQLITE_PATH = os.getenv(
+            "RATE_LIMIT_SQLITE_PATH",
+            str(Path(__file__).resolve().parent.parent.parent / "data" / "ratelimit.db")
+        )
+        self.RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+        self.TRUST_FORWARDED_FOR = os.getenv("TRUST_FORWARDED_FOR", "false").lower() == "true"
+
+        # User Deletion Configuration
+        # Owners with more resources than this are deleted by a chunked background job,
+        # and the most resources one bulk delete request removes in total
+        self.USER_DELETE_SYNC_MAX_RESOURCES = int(os.getenv("USER_DELETE_SYNC_MAX_RESOURCES", "1000"))
+        self.USER_DELETE_CHUNK_SIZE = int(os.getenv("USER_DELETE_CHUNK_SIZE", "2000"))
+        # A running job without a heartbeat for this long lost its worker; another worker resumes it
+        self.USER_DELETE_STALE_SECONDS = float(os.getenv("USER_DELETE_STALE_SECONDS", "120"))
+
+        # Cache Configuration (per worker process)
+        self.THEME_CACHE_MAX_ENTRIES = int(os.getenv("THEME_CACHE_MAX_ENTRIES", "10000"))
+        self.THEME_CACHE_TTL_SECONDS = float(os.getenv("THEME_CACHE_TTL_SECONDS", "300"))
+        self.USER_ID_CACHE_MAX_ENTRIES = int(os.getenv("USER_ID_CACHE_MAX_ENTRIES", "10000"))
+        self.USER_ID_CACHE_TTL_SECONDS = float(os.getenv("USER_ID_CACHE_TTL_SECONDS", "60"))
+        # How long a worker trusts its cached theme versions before re-reading them
+        self.THEME_VERSION_TTL_SECONDS = float(os.getenv("THEME_VERSION_TTL_SECONDS", "5"))
+        # Saves of the same user's theme within this window become one write. Off (0)
+        # by default: a debounced save is acknowledged before it is stored
+        self.THEME_SAVE_DEBOUNCE_SECONDS = float(os.getenv("THEME_SAVE_DEBOUNCE_SECONDS", "0"))
+
     @property
     def DATABASE_URL(self) -> str:
         if not all([self.AZURE_SQL_SERVER, self.AZURE_SQL_DATABASE, self.AZURE_SQL_USERNAME, self.AZURE_SQL_PASSWORD]):
@@ -46,8 +210,45 @@ class Settings:
         return [origin.strip() for origin in self.CORS_ALLOW_ORIGINS.split(",") if origin.strip()]
 
 
-settings = Settings()
-if settings.AZURE_SQL_SERVER:
-    print(f"✅ Server configured for: {settings.AZURE_SQL_SERVER}")
-else:
-    print("⚠️  Database credentials not configured. Set environment variables.")
+_settings = None
+_settings_lock = threading.Lock()
+
+
+def get_settings() -> Settings:
+    """Load .env and read the environment once, on first use"""
+    global _settings
+    if _settings is None:
+        with _settings_lock:
+            if _settings is None:
+                # Load .env file if exists (for VM deployment)
+                # Priority: .env file > Environment Variables (override=True)
+                load_dotenv(dotenv_path=env_path, override=True)
+                _settings = Settings()
+    return _settings
+
+
+class _LazySettings:
+    """`settings` stays importable everywhere; .env is read on the first attribute access"""
+
+    def __getattr__(self, name):
+        return getattr(get_settings(), name)
+
+
+settings = _LazySettings()
+
+
+def setting_value(value):
+    """value, or value() for a callable.
+    
+    Module-level singletons take `lambda: settings.X` for their limits and
+    resolve them on first use, so importing their module reads no settings.
+    """
+    return value() if callable(value) else value
+
+
+def log_configuration() -> None:
+    from app.core.log import startup_logger
+    if settings.AZURE_SQL_SERVER:
+        startup_logger.info(f"✅ Server configured for: {settings.AZURE_SQL_SERVER}")
+    else:
+        startup_logger.warning("⚠️  Database credentials not configured. Set environment variables.")
@@ -0,0 +1,21 @@
+"""Application logging.
+
+Modules report configuration and bootstrap progress through startup_logger
+instead of printing at import time, and log under the "app" namespace
+(e.g. app.db.queries); configure_logging() attaches the handler to the
+"app" logger when the application starts (LOG_LEVEL).
+"""
+import logging
+import sys
+
+app_logger = logging.getLogger("app")
+startup_logger = logging.getLogger("app.startup")
+
+
+def configure_logging(level: str = "INFO") -> None:
+    if not app_logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        app_logger.addHandler(handler)
+        app_logger.propagate = False
+    app_logger.setLevel(level.upper())
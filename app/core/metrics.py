@@ -0,0 +1,92 @@
+"""Prometheus text-format metrics, without a client library.
+
+Every worker process keeps its own numbers; scrape each worker (or sum
+them in the query) the same way as any multi-process Python exporter.
+"""
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+# Seconds; tuned for an API whose requests should take milliseconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class MetricsWriter:
+    """Collects samples and renders the text exposition format"""
+
+    def __init__(self):
+        self._lines: List[str] = []
+
+    def family(self, name: str, kind: str, help_text: str, samples: Iterable[Tuple[Dict[str, str], float]]) -> None:
+        self._lines.append(f"# HELP {name} {help_text}")
+        self._lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            self._lines.append(f"{name}{_labels(labels)} {value}")
+
+    def gauge(self, name: str, help_text: str, value: float, labels: Dict[str, str] = None) -> None:
+        self.family(name, "gauge", help_text, [(labels or {}, value)])
+
+    def raw(self, lines: Iterable[str]) -> None:
+        self._lines.extend(lines)
+
+    def render(self) -> str:
+        return "\n".join(self._lines) + "\n"
+
+
+class RequestMetrics:
+    """Per-route latency histograms and the number of requests in flight"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # (method, route, status) -> [bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, str, str], List[float]] = {}
+        self.in_flight = 0
+
+    def started(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def finished(self, method: str, route: str, status_code: int, seconds: float) -> None:
+        key = (method, route, str(status_code))
+        with self._lock:
+            self.in_flight -= 1
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[i] += 1
+            series[len(self.buckets)] += 1
+            series[-1] += seconds
+
+    def write(self, out: MetricsWriter) -> None:
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+            in_flight = self.in_flight
+        out.gauge("http_requests_in_flight", "Requests being served by this worker", in_flight)
+        name = "http_request_duration_seconds"
+        lines = [
+            f"# HELP {name} Request latency by route and status",
+            f"# TYPE {name} histogram",
+        ]
+        for (method, route, status_code), values in sorted(series.items()):
+            labels = {"method": method, "route": route, "status": status_code}
+            for bound, count in zip(self.buckets, values):
+                lines.append(f"{name}_bucket{_labels({**labels, 'le': str(bound)})} {count}")
+            lines.append(f"{name}_bucket{_labels({**labels, 'le': '+Inf'})} {values[len(self.buckets)]}")
+            lines.append(f"{name}_sum{_labels(labels)} {values[-1]}")
+            lines.append(f"{name}_count{_labels(labels)} {values[len(self.buckets)]}")
+        out.raw(lines)
+
+
+request_metrics = RequestMetrics()
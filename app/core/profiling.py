@@ -0,0 +1,202 @@
+"""Opt-in profiling for admins: one request under cProfile, tracemalloc snapshots.
+
+Per-request CPU profile: an admin sends `X-Profile: 1`. The middleware in
+main.py checks the caller with get_current_admin_user, then runs the
+request with a cProfile.Profile attached. Each route endpoint is wrapped
+once at startup (install_request_profiling). The wrapper enables that
+profiler around the endpoint, on the thread that actually runs it, which
+is a threadpool thread for sync routes. The report is written to
+PROFILE_DIR (data/profiles/): a .prof file for snakeviz/pstats and a .txt
+summary sorted by cumulative time. Its name is returned in the
+X-Profile-Report header.
+
+Without the header the only cost is one ContextVar lookup per endpoint
+call. PROFILING_ENABLED=false removes even that. Dependencies (the user
+lookup) run in their own threadpool calls and are not in the profile. For
+async endpoints the profile can include other requests' coroutines that
+ran on the event loop in the meantime.
+
+Memory: tracemalloc is off unless an admin starts it (it slows every
+allocation while on). Snapshots are kept per worker process and can be
+diffed against each other.
+"""
+import cProfile
+import functools
+import inspect
+import io
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from fastapi.routing import APIRoute
+from app.core.config import settings
+
+PROFILE_REPORT_LINES = 60
+MAX_SNAPSHOTS = 10
+
+_active_profile: ContextVar[Optional[cProfile.Profile]] = ContextVar("active_profile", default=None)
+
+
+def _profiled(call: Callable) -> Callable:
+    if inspect.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def async_wrapper(*args, **kwargs):
+            profile = _active_profile.get()
+            if profile is None:
+                return await call(*args, **kwargs)
+            profile.enable()
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                profile.disable()
+        return async_wrapper
+
+    @functools.wraps(call)
+    def wrapper(*args, **kwargs):
+        profile = _active_profile.get()
+        if profile is None:
+            return call(*args, **kwargs)
+        profile.enable()
+        try:
+            return call(*args, **kwargs)
+        finally:
+            profile.disable()
+    return wrapper
+
+
+def install_request_profiling(app) -> None:
+    """Wrap every route endpoint so an active request profile can attach to it"""
+    for route in app.routes:
+        if isinstance(route, APIRoute) and not getattr(route.dependant.call, "_request_profiling", False):
+            route.dependant.call = _profiled(route.dependant.call)
+            route.dependant.call._request_profiling = True
+
+
+def start_request_profile() -> tuple:
+    profile = cProfile.Profile()
+    return profile, _active_profile.set(profile)
+
+
+def stop_request_profile(token) -> None:
+    # In the context start_request_profile ran in, i.e. not in a worker thread
+    _active_profile.reset(token)
+
+
+def finish_request_profile(profile: cProfile.Profile, method: str, route: str, seconds: float) -> str:
+    """Write the .prof and .txt reports; returns the report name (without extension).
+
+    Blocking (stats sorting and file I/O): run it off the event loop.
+    """
+    directory = Path(settings.PROFILE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+    name = f"{datetime.utcnow():%Y%m%dT%H%M%S}_{os.getpid()}_{method}_{slug}_{int(seconds * 1000)}ms"
+    profile.dump_stats(str(directory / f"{name}.prof"))
+
+    summary = io.StringIO()
+    summary.write(f"{method} {route}: {seconds * 1000:.1f} ms wall time\n\n")
+    pstats.Stats(profile, stream=summary).sort_stats("cumulative").print_stats(PROFILE_REPORT_LINES)
+    (directory / f"{name}.txt").write_text(summary.getvalue(), encoding="utf-8")
+    return name
+
+
+def list_profile_reports() -> List[Dict[str, Any]]:
+    directory = Path(settings.PROFILE_DIR)
+    if not directory.exists():
+        return []
+    reports = sorted(directory.glob("*.txt"), key=lambda path: path.stat().st_mtime, reverse=True)
+    return [{"name": path.stem, "size_kb": round(path.stat().st_size / 1024, 1)} for path in reports]
+
+
+def read_profile_report(name: str) -> Optional[str]:
+    # Names come from the URL: only plain report names inside PROFILE_DIR
+    if not re.fullmatch(r"[A-Za-z0-9_]+", name):
+        return None
+    path = Path(settings.PROFILE_DIR) / f"{name}.txt"
+    return path.read_text(encoding="utf-8") if path.exists() else None
+
+
+# ---- tracemalloc -------------------------------------------------------
+
+_snapshots: Dict[int, tuple] = {}
+_snapshot_ids = 0
+_snapshot_lock = threading.Lock()
+
+
+def _stat_entry(stat) -> Dict[str, Any]:
+    frame = stat.traceback[0]
+    entry = {"location": f"{frame.filename}:{frame.lineno}", "size_kb": round(stat.size / 1024, 1), "count": stat.count}
+    if hasattr(stat, "size_diff"):
+        entry.update(size_diff_kb=round(stat.size_diff / 1024, 1), count_diff=stat.count_diff)
+    return entry
+
+
+def tracemalloc_status() -> Dict[str, Any]:
+    current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+    with _snapshot_lock:
+        snapshots = [{"id": i, "taken_at": taken_at} for i, (taken_at, _) in sorted(_snapshots.items())]
+    return {
+        "pid": os.getpid(),
+        "tracing": tracemalloc.is_tracing(),
+        "frames": tracemalloc.get_traceback_limit(),
+        "traced_kb": round(current / 1024, 1),
+        "peak_kb": round(peak / 1024, 1),
+        "snapshots": snapshots,
+    }
+
+
+def start_tracemalloc(frames: int) -> Dict[str, Any]:
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    return tracemalloc_status()
+
+
+def stop_tracemalloc() -> Dict[str, Any]:
+    # Snapshots stay available for diffing; stopping only ends the tracing cost
+    tracemalloc.stop()
+    return tracemalloc_status()
+
+
+def take_snapshot(limit: int) -> Dict[str, Any]:
+    global _snapshot_ids
+    if not tracemalloc.is_tracing():
+        raise RuntimeError("tracemalloc is not running; start it first")
+    snapshot = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ])
+    with _snapshot_lock:
+        _snapshot_ids += 1
+        snapshot_id = _snapshot_ids
+        _snapshots[snapshot_id] = (time.time(), snapshot)
+        while len(_snapshots) > MAX_SNAPSHOTS:
+            del _snapshots[min(_snapshots)]
+    return {
+        "id": snapshot_id,
+        "pid": os.getpid(),
+        "top": [_stat_entry(stat) for stat in snapshot.statistics("lineno")[:limit]],
+    }
+
+
+def diff_snapshots(base_id: int, target_id: Optional[int], limit: int) -> Dict[str, Any]:
+    """Largest growth from base to target (default: the newest snapshot)"""
+    with _snapshot_lock:
+        if target_id is None and _snapshots:
+            target_id = max(_snapshots)
+        base, target = _snapshots.get(base_id), _snapshots.get(target_id)
+    if base is None or target is None:
+        raise KeyError(f"unknown snapshot id (have {sorted(_snapshots)})")
+    stats = target[1].compare_to(base[1], "lineno")
+    return {
+        "pid": os.getpid(),
+        "base": base_id,
+        "target": target_id,
+        "size_diff_kb": round(sum(stat.size_diff for stat in stats) / 1024, 1),
+        "top": [_stat_entry(stat) for stat in stats[:limit]],
+    }
@@ -0,0 +1,197 @@
+"""Request throttling based on the Generic Cell Rate Algorithm (GCRA).
+
+GCRA keeps a single number per key - the theoretical arrival time (TAT) of
+the next request - so the in-memory store stays compact and an entry can be
+dropped as soon as its TAT is in the past. The SQLite store keeps the same
+number in a file shared by every uvicorn worker on the host.
+"""
+import logging
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import cached_property
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple, Union
+from fastapi import Request
+from app.core.config import setting_value, settings
+
+logger = logging.getLogger("app.rate_limit")
+
+SWEEP_INTERVAL_SECONDS = 60.0
+# Expired entries the memory store drops per request, at most
+MEMORY_SWEEP_BATCH = 8
+
+
+def _gcra(tat: Optional[float], now: float, interval: float, window: float) -> Tuple[float, float]:
+    """Return (new_tat, retry_after). retry_after is 0 when the request is allowed."""
+    tat = max(tat or now, now)
+    new_tat = tat + interval
+    allow_at = new_tat - window
+    if now < allow_at:
+        return tat, allow_at - now
+    return new_tat, 0.0
+
+
+class MemoryStore:
+    """Per-process store: one float per key, kept in least-recently-updated order.
+
+    Over max_keys the oldest entries are evicted one by one in O(1). Expired
+    keys are dropped from the old end of the order, at most
+    MEMORY_SWEEP_BATCH per request, so no request pays for a full scan. An
+    entry expires at most one window after its last update, so the old end
+    is where expired entries collect.
+    """
+
+    def __init__(self, max_keys: int):
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_keys = max_keys
+
+    def acquire(self, key: str, now: float, interval: float, window: float) -> float:
+        with self._lock:
+            new_tat, retry_after = _gcra(self._tats.get(key), now, interval, window)
+            if not retry_after:
+                self._tats[key] = new_tat
+                self._tats.move_to_end(key)
+                while len(self._tats) > self._max_keys:
+                    self._tats.popitem(last=False)
+            self._sweep(now)
+            return retry_after
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._tats.pop(key, None)
+
+    def _sweep(self, now: float) -> None:
+        for _ in range(MEMORY_SWEEP_BATCH):
+            if not self._tats:
+                return
+            key, tat = next(iter(self._tats.items()))
+            if tat > now:
+                return
+            del self._tats[key]
+
+
+class SQLiteStore:
+    """Store shared across worker processes through a small SQLite file"""
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+
+    def acquire(self, key: str, now: float, interval: float, window: float) -> float:
+        with self._lock:
+            try:
+                # BEGIN IMMEDIATE takes the write lock up front so that the
+                # read-modify-write below is atomic across processes
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    row = self._conn.execute(
+                        "SELECT tat FROM rate_limits WHERE key = ?", (key,)
+                    ).fetchone()
+                    new_tat, retry_after = _gcra(row[0] if row else None, now, interval, window)
+                    if not retry_after:
+                        self._conn.execute(
+                            "INSERT OR REPLACE INTO rate_limits (key, tat) VALUES (?, ?)", (key, new_tat)
+                        )
+                    if now >= self._next_sweep:
+                        self._conn.execute("DELETE FROM rate_limits WHERE tat <= ?", (now,))
+                        self._next_sweep = now + SWEEP_INTERVAL_SECONDS
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+            except sqlite3.Error as e:
+                # Fail open: a broken limiter must not lock everybody out
+                logger.warning(f"⚠️ Rate limit store error: {e}")
+                return 0.0
+            return retry_after
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            try:
+                self._conn.execute("DELETE FROM rate_limits WHERE key = ?", (key,))
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Rate limit store error: {e}")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Return the shared store, created on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if settings.RATE_LIMIT_BACKEND == "sqlite":
+                    _store = SQLiteStore(settings.RATE_LIMIT_SQLITE_PATH)
+                else:
+                    _store = MemoryStore(settings.RATE_LIMIT_MAX_KEYS)
+    return _store
+
+
+class RateLimiter:
+    """Allows max_attempts per window_seconds per key, with bursts up to max_attempts"""
+
+    def __init__(
+        self,
+        name: str,
+        max_attempts: Union[int, Callable[[], int]],
+        window_seconds: Union[float, Callable[[], float]]
+    ):
+        # Either may be a callable (`lambda: settings.X`), read on first use
+        self.name = name
+        self._max_attempts = max_attempts
+        self._window_seconds = window_seconds
+
+    @cached_property
+    def enabled(self) -> bool:
+        return setting_value(self._max_attempts) > 0
+
+    @cached_property
+    def window(self) -> float:
+        return float(setting_value(self._window_seconds))
+
+    @cached_property
+    def interval(self) -> float:
+        return self.window / max(setting_value(self._max_attempts), 1)
+
+    def hit(self, key: str) -> float:
+        """Count one attempt. Returns 0 when allowed (or disabled), else seconds until retry."""
+        if not self.enabled:
+            return 0.0
+        return get_store().acquire(f"{self.name}:{key}", time.time(), self.interval, self.window)
+
+    def reset(self, key: str) -> None:
+        if self.enabled:
+            get_store().reset(f"{self.name}:{key}")
+
+
+def retry_after_header(retry_after: float) -> Dict[str, str]:
+    return {"Retry-After": str(max(1, math.ceil(retry_after)))}
+
+
+def client_ip(request: Request) -> str:
+    """Best-effort client address, honouring X-Forwarded-For only when trusted"""
+    if settings.TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+login_email_limiter = RateLimiter(
+    "login_email", lambda: settings.LOGIN_EMAIL_MAX_ATTEMPTS, lambda: settings.LOGIN_EMAIL_WINDOW_SECONDS
+)
+login_ip_limiter = RateLimiter("login_ip", lambda: settings.LOGIN_IP_MAX_ATTEMPTS, lambda: settings.LOGIN_IP_WINDOW_SECONDS)
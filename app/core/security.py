@@ -1,18 +1,92 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import List, Optional
+import threading
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import settings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Stored in place of a hash to disable password login (e.g. while a user is being deleted)
+UNUSABLE_PASSWORD_HASH = "!"
+
+
+class _InProgress:
+    """Counts work in progress right now (exported by /metrics)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def add(self, count: int) -> None:
+        with self._lock:
+            self.value += count
+
+    def __enter__(self):
+        self.add(1)
+
+    def __exit__(self, *exc):
+        self.add(-1)
+
+
+# bcrypt calls running
+bcrypt_in_progress = _InProgress()
+# Bulk hashes submitted to the hash pool and not finished
+bulk_hashes_pending = _InProgress()
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    if hashed_password.startswith(UNUSABLE_PASSWORD_HASH):
+        return False
+    with bcrypt_in_progress:
+        return pwd_context.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    with bcrypt_in_progress:
+        return pwd_context.hash(password)
+
+
+_hash_executor: Optional[ThreadPoolExecutor] = None
+_hash_executor_lock = threading.Lock()
+
+
+def _get_hash_executor() -> ThreadPoolExecutor:
+    global _hash_executor
+    if _hash_executor is None:
+        with _hash_executor_lock:
+            if _hash_executor is None:
+                _hash_executor = ThreadPoolExecutor(
+                    max_workers=max(settings.PASSWORD_HASH_WORKERS, 1),
+                    thread_name_prefix="pwhash"
+                )
+    return _hash_executor
+
+
+def _bulk_hash(password: str) -> str:
+    try:
+        return get_password_hash(password)
+    finally:
+        bulk_hashes_pending.add(-1)
+
+
+def hash_passwords(passwords: List[str]) -> List[str]:
+    """Hash many passwords in parallel, preserving order.
+
+    bcrypt releases the GIL while hashing, so a thread pool spreads the work
+    across all cores without the cost of a process pool.
+    """
+    if len(passwords) <= 1:
+        return [get_password_hash(p) for p in passwords]
+    executor = _get_hash_executor()
+    bulk_hashes_pending.add(len(passwords))
+    return list(executor.map(_bulk_hash, passwords))
+
+
+def password_hash_queue_depth() -> int:
+    """Bulk hashes submitted to the hash pool and not finished"""
+    return bulk_hashes_pending.value
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -0,0 +1,237 @@
+"""Production launcher: a preforking supervisor around uvicorn (see run.py).
+
+The master process reads the settings, imports the app once (PRELOAD) and
+binds the listening socket, then forks the workers. Forked workers share
+the imported code and data copy-on-write; this is safe because importing
+the app creates no engine, thread or connection (those start lazily in
+each worker). Each worker runs its own uvicorn server on the shared socket.
+
+- Workers: UVICORN_WORKERS, or "auto" for the usable CPUs (scheduler
+  affinity and the cgroup CPU quota, so a container limited to 2 CPUs on a
+  64-core host gets 2) times UVICORN_WORKERS_PER_CPU.
+- uvloop and httptools are used when installed (UVICORN_LOOP, UVICORN_HTTP).
+- Recycling: a worker exits after UVICORN_MAX_REQUESTS requests (plus up
+  to UVICORN_MAX_REQUESTS_JITTER, so workers do not all restart together)
+  and the master starts a fresh one.
+- SIGTERM/SIGINT: the master passes the signal on; workers stop accepting,
+  finish in-flight requests for up to UVICORN_GRACEFUL_TIMEOUT_SECONDS and
+  run the shutdown handlers. Workers still alive after that are killed. A
+  second signal kills them immediately.
+"""
+import importlib.util
+import math
+import os
+import random
+import signal
+import socket
+import sys
+import time
+from typing import Dict, Optional
+
+# A worker that dies this soon after starting is failing at startup
+MIN_WORKER_UPTIME_SECONDS = 5.0
+MAX_FAST_FAILURES = 5
+KILL_GRACE_SECONDS = 5.0
+
+
+def _cgroup_cpu_limit() -> Optional[float]:
+    """CPUs allowed by the cgroup quota (v2, then v1), or None when unlimited"""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        if quota > 0 and period > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def effective_cpu_count() -> int:
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    limit = _cgroup_cpu_limit()
+    if limit is not None:
+        cpus = min(cpus, max(math.ceil(limit), 1))
+    return cpus
+
+
+def worker_count(workers: str, per_cpu: float) -> int:
+    if workers.strip().lower() in ("", "auto", "0"):
+        return max(math.ceil(effective_cpu_count() * per_cpu), 1)
+    return max(int(workers), 1)
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def event_loop_impl(choice: str) -> str:
+    if choice == "auto":
+        return "uvloop" if _installed("uvloop") and sys.platform != "win32" else "asyncio"
+    return choice
+
+
+def http_impl(choice: str) -> str:
+    if choice == "auto":
+        return "httptools" if _installed("httptools") else "h11"
+    return choice
+
+
+class Supervisor:
+    """Forks the workers, replaces the ones that exit, drains them on SIGTERM"""
+
+    def __init__(self, config, sock: socket.socket, workers: int, max_requests: int, jitter: int, graceful_timeout: float):
+        self.config = config
+        self.sock = sock
+        self.workers = workers
+        self.max_requests = max_requests
+        self.jitter = jitter
+        self.graceful_timeout = graceful_timeout
+        self.children: Dict[int, float] = {}  # pid -> start time
+        self.stopping = False
+        self.fast_failures = 0
+
+    def spawn(self) -> None:
+        pid = os.fork()
+        if pid:
+            self.children[pid] = time.monotonic()
+            return
+        # Worker: default signal handling until uvicorn installs its own
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        random.seed()
+        code = 0
+        try:
+            import uvicorn
+            if self.max_requests:
+                self.config.limit_max_requests = self.max_requests + random.randint(0, self.jitter)
+            uvicorn.Server(self.config).run(sockets=[self.sock])
+        except BaseException:
+            import traceback
+            traceback.print_exc()
+            code = 1
+        finally:
+            os._exit(code)
+
+    def _signal(self, signum, frame) -> None:
+        from app.core.log import startup_logger
+        if self.stopping:
+            startup_logger.warning("⚠️ Second stop signal: killing workers")
+            self._kill_all(signal.SIGKILL)
+            return
+        self.stopping = True
+        startup_logger.info(f"ℹ️ Draining {len(self.children)} worker(s) (up to {self.graceful_timeout:g}s)")
+        self._kill_all(signal.SIGTERM)
+
+    def _kill_all(self, signum: int) -> None:
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def _reaped(self, pid: int, status: int) -> None:
+        from app.core.log import startup_logger
+        started = self.children.pop(pid, None)
+        if started is None or self.stopping:
+            return
+        code = os.waitstatus_to_exitcode(status)
+        if code == 0:
+            # Reached its max-requests limit
+            self.fast_failures = 0
+        else:
+            startup_logger.warning(f"⚠️ Worker {pid} exited with code {code}; starting a new one")
+            if time.monotonic() - started >= MIN_WORKER_UPTIME_SECONDS:
+                self.fast_failures = 0
+            else:
+                self.fast_failures += 1
+                if self.fast_failures >= MAX_FAST_FAILURES:
+                    startup_logger.error("❌ Workers keep failing at startup; stopping")
+                    self.stopping = True
+                    self._kill_all(signal.SIGTERM)
+                    return
+                time.sleep(1)
+        self.spawn()
+
+    def run(self) -> int:
+        from app.core.log import startup_logger
+        signal.signal(signal.SIGTERM, self._signal)
+        signal.signal(signal.SIGINT, self._signal)
+        for _ in range(self.workers):
+            self.spawn()
+        startup_logger.info(f"✅ Master {os.getpid()} started {self.workers} worker(s)")
+
+        while self.children and not self.stopping:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            self._reaped(pid, status)
+
+        deadline = time.monotonic() + self.graceful_timeout + KILL_GRACE_SECONDS
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid:
+                self.children.pop(pid, None)
+            elif time.monotonic() > deadline:
+                startup_logger.warning(f"⚠️ {len(self.children)} worker(s) did not drain in time; killing them")
+                self._kill_all(signal.SIGKILL)
+                deadline = float("inf")
+            else:
+                time.sleep(0.1)
+        startup_logger.info("✅ All workers stopped")
+        return 1 if self.fast_failures >= MAX_FAST_FAILURES else 0
+
+
+def serve(app_path: str = "app.main:app") -> int:
+    import uvicorn
+    from app.core.config import get_settings
+    from app.core.log import configure_logging, startup_logger
+
+    settings = get_settings()
+    configure_logging(settings.LOG_LEVEL)
+    workers = worker_count(settings.UVICORN_WORKERS, settings.UVICORN_WORKERS_PER_CPU)
+    config = uvicorn.Config(
+        app_path,
+        host=settings.HOST,
+        port=settings.PORT,
+        loop=event_loop_impl(settings.UVICORN_LOOP),
+        http=http_impl(settings.UVICORN_HTTP),
+        backlog=settings.UVICORN_BACKLOG,
+        timeout_keep_alive=settings.UVICORN_KEEPALIVE_SECONDS,
+        timeout_graceful_shutdown=settings.UVICORN_GRACEFUL_TIMEOUT_SECONDS,
+        limit_max_requests=settings.UVICORN_MAX_REQUESTS or None,
+    )
+    startup_logger.info(
+        f"✅ Serving on {settings.HOST}:{settings.PORT}: {workers} worker(s) "
+        f"({effective_cpu_count()} usable CPU(s)), loop={config.loop}, http={config.http}, "
+        f"preload={settings.UVICORN_PRELOAD}, max_requests={settings.UVICORN_MAX_REQUESTS or 'off'}"
+    )
+    if settings.UVICORN_PRELOAD:
+        config.load()
+    sock = config.bind_socket()
+
+    if (workers == 1 and not settings.UVICORN_MAX_REQUESTS) or not hasattr(os, "fork"):
+        # Nothing to supervise (or no fork, e.g. Windows): serve in this process
+        uvicorn.Server(config).run(sockets=[sock])
+        return 0
+    return Supervisor(
+        config, sock, workers,
+        settings.UVICORN_MAX_REQUESTS, settings.UVICORN_MAX_REQUESTS_JITTER,
+        settings.UVICORN_GRACEFUL_TIMEOUT_SECONDS
+    ).run()
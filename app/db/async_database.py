@@ -0,0 +1,84 @@
+"""Opt-in async database access (ASYNC_DB_ENABLED).
+
+The async engine talks to the same database as the sync engine in
+app.db.database: SQLite through aiosqlite, Azure SQL through the driver
+named by ASYNC_MSSQL_DRIVER (aioodbc by default), or any URL given in
+ASYNC_DATABASE_URL. It is created on first use, so the sync-only
+deployment never imports an async driver.
+"""
+import threading
+from typing import AsyncIterator, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from app.core.config import settings
+from app.db.database import configure_sqlite_connection, get_engine
+from app.db.instrumentation import attach_query_events
+
+_async_engine: Optional[AsyncEngine] = None
+_async_sessionmaker: Optional[async_sessionmaker] = None
+_lock = threading.Lock()
+
+
+def async_database_url():
+    if settings.ASYNC_DATABASE_URL:
+        return make_url(settings.ASYNC_DATABASE_URL)
+    return async_driver_url(get_engine().url)
+
+
+def async_driver_url(url):
+    """The sync URL with its driver swapped for the async one"""
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite")
+    if url.get_backend_name() == "mssql":
+        url = url.set(drivername=f"mssql+{settings.ASYNC_MSSQL_DRIVER}")
+        if settings.ASYNC_MSSQL_DRIVER == "aioodbc":
+            url = url.update_query_dict({"driver": settings.ASYNC_MSSQL_ODBC_DRIVER})
+        return url
+    raise RuntimeError(f"No async driver configured for {url.get_backend_name()}; set ASYNC_DATABASE_URL")
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine, _async_sessionmaker
+    with _lock:
+        if _async_engine is None:
+            url = async_database_url()
+            engine_kwargs = {"echo": False}
+            if url.get_backend_name() != "sqlite":
+                engine_kwargs.update(
+                    pool_size=settings.DB_POOL_SIZE,
+                    max_overflow=settings.DB_MAX_OVERFLOW,
+                    pool_timeout=settings.DB_POOL_TIMEOUT,
+                    pool_recycle=settings.DB_POOL_RECYCLE,
+                    pool_pre_ping=settings.DB_POOL_PRE_PING
+                )
+            _async_engine = create_async_engine(url, **engine_kwargs)
+            attach_query_events(_async_engine.sync_engine)
+            if url.get_backend_name() == "sqlite":
+                event.listen(_async_engine.sync_engine, "connect", configure_sqlite_connection)
+            _async_sessionmaker = async_sessionmaker(
+                _async_engine, autoflush=False, expire_on_commit=False
+            )
+        return _async_engine
+
+
+def AsyncSessionLocal() -> AsyncSession:
+    get_async_engine()
+    return _async_sessionmaker()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    db = AsyncSessionLocal()
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+async def dispose_async_engine() -> None:
+    global _async_engine, _async_sessionmaker
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _async_sessionmaker = None
@@ -0,0 +1,162 @@
+"""Run the startup bootstrap (create_all, migrations, super user) once per deployment.
+
+Every worker process runs the startup event. The first one to take the
+bootstrap lock does the work and records a readiness marker for the
+current code revision; the others wait on the lock, find the marker and
+skip straight to serving. Later restarts of the same revision find the
+marker in one query.
+
+The lock is sp_getapplock on Azure SQL (shared by every host using the
+database) and an OS file lock next to the SQLite file locally.
+"""
+import hashlib
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator
+from sqlalchemy import Column, DateTime, MetaData, String, Table, insert, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from app.core.config import settings
+from app.core.log import startup_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: local development runs a single process
+    fcntl = None
+
+_metadata = MetaData()
+
+app_bootstrap = Table(
+    "app_bootstrap",
+    _metadata,
+    Column("revision", String(64), primary_key=True),
+    Column("completed_at", DateTime, default=datetime.utcnow),
+)
+
+# Reported by /ready: pending -> running|waiting -> ready|failed
+bootstrap_status: Dict[str, Any] = {"state": "pending", "role": None, "revision": None, "seconds": None}
+
+
+def bootstrap_revision() -> str:
+    """Changes whenever the models or the migrations change"""
+    from app.db.database import Base
+    from app.db.migrations import MIGRATIONS, fingerprint
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(fingerprint(MIGRATIONS).encode())
+    for table in sorted(Base.metadata.tables.values(), key=lambda t: t.name):
+        digest.update(table.name.encode())
+        for column in table.columns:
+            digest.update(f"{column.name}:{column.type};".encode())
+    return digest.hexdigest()
+
+
+def _is_ready(engine: Engine, revision: str) -> bool:
+    try:
+        with engine.connect() as conn:
+            return conn.scalar(
+                select(app_bootstrap.c.revision).where(app_bootstrap.c.revision == revision)
+            ) is not None
+    except DBAPIError:
+        return False  # first start: no marker table yet
+
+
+@contextmanager
+def _file_lock(timeout: float) -> Iterator[None]:
+    path = Path(settings.BOOTSTRAP_LOCK_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as handle:
+        if fcntl is not None:
+            deadline = time.monotonic() + timeout
+            while True:
+                try:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        raise TimeoutError(f"Bootstrap lock {path} still held after {timeout:.0f}s")
+                    time.sleep(0.1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def _mssql_app_lock(engine: Engine, timeout: float) -> Iterator[None]:
+    # Session-owned application lock: held for as long as this connection is
+    # open and released automatically if the process dies
+    with engine.connect() as conn:
+        result = conn.execute(
+            text(
+                "DECLARE @result INT; "
+                "EXEC @result = sp_getapplock @Resource = 'app_bootstrap', @LockMode = 'Exclusive', "
+                "@LockOwner = 'Session', @LockTimeout = :timeout_ms; "
+                "SELECT @result"
+            ),
+            {"timeout_ms": int(timeout * 1000)}
+        ).scalar()
+        conn.commit()
+        if result is None or result < 0:
+            raise TimeoutError(f"sp_getapplock failed with status {result}")
+        try:
+            yield
+        finally:
+            conn.execute(text("EXEC sp_releaseapplock @Resource = 'app_bootstrap', @LockOwner = 'Session'"))
+            conn.commit()
+
+
+def _bootstrap_lock(engine: Engine):
+    timeout = settings.BOOTSTRAP_LOCK_TIMEOUT_SECONDS
+    if engine.dialect.name == "mssql":
+        return _mssql_app_lock(engine, timeout)
+    return _file_lock(timeout)
+
+
+def _run_steps(engine: Engine) -> None:
+    from app.db.database import Base, SessionLocal, init_db
+    from app.db.super_user_seed import create_super_user
+    import app.models.user  # noqa: F401  (register tables on Base)
+    import app.models.resource  # noqa: F401
+
+    Base.metadata.create_all(bind=engine)
+    init_db()
+    db = SessionLocal()
+    try:
+        create_super_user(db)
+    finally:
+        db.close()
+
+
+def run_bootstrap(engine: Engine) -> str:
+    """Make sure this revision is bootstrapped; returns "skipped", "leader" or "follower"."""
+    started = time.monotonic()
+    revision = bootstrap_revision()
+    bootstrap_status.update(revision=revision)
+
+    if _is_ready(engine, revision):
+        role = "skipped"
+    else:
+        bootstrap_status.update(state="waiting")
+        try:
+            with _bootstrap_lock(engine):
+                # Whoever held the lock before us may have finished the job
+                if _is_ready(engine, revision):
+                    role = "follower"
+                else:
+                    bootstrap_status.update(state="running")
+                    _run_steps(engine)
+                    _metadata.create_all(bind=engine, checkfirst=True)
+                    with engine.begin() as conn:
+                        conn.execute(insert(app_bootstrap).values(revision=revision))
+                    role = "leader"
+        except Exception:
+            bootstrap_status.update(state="failed", seconds=round(time.monotonic() - started, 3))
+            raise
+
+    bootstrap_status.update(state="ready", role=role, seconds=round(time.monotonic() - started, 3))
+    startup_logger.info(f"✅ Bootstrap {role} (pid {os.getpid()}, {bootstrap_status['seconds']}s)")
+    return role
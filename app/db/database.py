@@ -1,151 +1,129 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from functools import lru_cache
 from pathlib import Path
-from dotenv import load_dotenv
-import os
-import sys
-
-# Load .env FIRST before importing settings
-env_file = Path(__file__).parent.parent.parent / ".env"
-load_dotenv(env_file)
+import threading
 
 from app.core.config import settings
+from app.core.log import startup_logger
+from app.db.instrumentation import attach_query_events
+from app.db.pool import InstrumentedQueuePool, attach_pool_events
+
+_engine = None
+_session_factory = None
+_engine_lock = threading.Lock()
+
+
+def _create_engine() -> Engine:
+    if settings.AZURE_SQL_SERVER and settings.AZURE_SQL_DATABASE:
+        startup_logger.info(f"✅ Using Azure SQL: {settings.AZURE_SQL_SERVER}")
+        database_url = settings.DATABASE_URL
+        engine_kwargs = {
+            "echo": False,
+            "pool_recycle": settings.DB_POOL_RECYCLE,
+            "pool_pre_ping": settings.DB_POOL_PRE_PING
+        }
+    else:
+        startup_logger.info("✅ Using SQLite for local development")
+        db_path = Path(settings.SQLITE_DATABASE_PATH)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        database_url = f"sqlite:///{db_path}"
+        engine_kwargs = {
+            "connect_args": {"check_same_thread": False},
+            "echo": False
+        }
+
+    engine = create_engine(
+        database_url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        **engine_kwargs
+    )
+    attach_pool_events(engine)
+    attach_query_events(engine)
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", configure_sqlite_connection)
+    return engine
+
+
+def get_engine() -> Engine:
+    """The application engine, created (and the SQLite data dir made) on first use"""
+    global _engine, _session_factory
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = _create_engine()
+                _session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+                _engine = engine
+    return _engine
+
+
+def SessionLocal(**kwargs) -> Session:
+    get_engine()
+    return _session_factory(**kwargs)
+
+
+_SQLITE_PRAGMA_CHOICES = {
+    "journal_mode": {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"},
+    "synchronous": {"OFF", "NORMAL", "FULL", "EXTRA"},
+    "temp_store": {"DEFAULT", "FILE", "MEMORY"},
+}
+
+
+@lru_cache(maxsize=1)
+def sqlite_pragmas() -> tuple:
+    """The per-connection PRAGMA statements built from the SQLITE_* settings"""
+    pragmas = [
+        # SQLite ignores ON DELETE CASCADE unless foreign keys are switched on per connection
+        "PRAGMA foreign_keys=ON",
+        f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}",
+        f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}",
+        # Negative cache_size is in KiB rather than pages
+        f"PRAGMA cache_size={-abs(int(settings.SQLITE_CACHE_SIZE_KB))}",
+    ]
+    for name, value in (
+        ("journal_mode", settings.SQLITE_JOURNAL_MODE),
+        ("synchronous", settings.SQLITE_SYNCHRONOUS),
+        ("temp_store", settings.SQLITE_TEMP_STORE),
+    ):
+        if value in _SQLITE_PRAGMA_CHOICES[name]:
+            pragmas.append(f"PRAGMA {name}={value}")
+        else:
+            startup_logger.warning(f"⚠️  Ignoring invalid SQLITE_{name.upper()}: {value}")
+    return tuple(pragmas)
+
+
+def configure_sqlite_connection(dbapi_connection, connection_record):
+    """Apply the tuned SQLite profile to every new connection.
+    
+    WAL lets readers run alongside the single writer, synchronous=NORMAL
+    skips the fsync per commit that WAL makes unnecessary for durability
+    against application crashes, and busy_timeout makes a blocked writer
+    wait instead of failing with "database is locked".
+    """
+    cursor = dbapi_connection.cursor()
+    for pragma in sqlite_pragmas():
+        cursor.execute(pragma)
+    cursor.close()
+
 
-if settings.AZURE_SQL_SERVER and settings.AZURE_SQL_DATABASE:
-    print(f"✅ Using Azure SQL: {settings.AZURE_SQL_SERVER}")
-    database_url = settings.DATABASE_URL
-    engine_kwargs = {"echo": False}
-else:
-    print("✅ Using SQLite for local development")
-    db_dir = Path(__file__).parent.parent.parent / "data"
-    db_dir.mkdir(exist_ok=True)
-    database_url = f"sqlite:///{db_dir}/app.db"
-    engine_kwargs = {
-        "connect_args": {"check_same_thread": False},
-        "echo": False
-    }
-
-engine = create_engine(database_url, **engine_kwargs)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
 def init_db():
-    """Initialize database and fix schema if needed"""
-    # Azure SQL-specific initialization for production
-    try:
-        if "mssql" in str(database_url):
-            with engine.begin() as conn:
-                
-                check_table = text("""
-                    SELECT COUNT(*) FROM INFORMATION_SCHEMA.TABLES 
-                    WHERE TABLE_NAME = 'resources'
-                """)
-                result = conn.execute(check_table)
-                resources_exists = result.scalar() > 0
-                
-                if resources_exists:
-                    check_type = text("""
-                    SELECT DATA_TYPE FROM INFORMATION_SCHEMA.COLUMNS
-                    WHERE TABLE_NAME = 'resources' AND COLUMN_NAME = 'user_id'
-                    """)
-                    result = conn.execute(check_type)
-                    data_type = result.scalar()
-                    if data_type not in ('varchar', 'nvarchar'):
-                        conn.execute(text("DROP TABLE IF EXISTS resources"))
-                        resources_exists = False
-                
-                if not resources_exists:
-                    conn.execute(text("""
-                    CREATE TABLE resources (
-                        id INT PRIMARY KEY IDENTITY(1,1),
-                        user_id VARCHAR(36) NOT NULL,
-                        icon VARCHAR(20) NOT NULL,
-                        title VARCHAR(100) NOT NULL,
-                        resource_name VARCHAR(200) NOT NULL,
-                        description VARCHAR(500),
-                        status VARCHAR(20) DEFAULT 'Running',
-                        region VARCHAR(50) DEFAULT 'East US',
-                        created_at DATETIME DEFAULT GETUTCDATE(),
-                        updated_at DATETIME DEFAULT GETUTCDATE()
-                    );
-                    CREATE INDEX idx_resources_user_id ON resources(user_id);
-                    """))
-                    # print("✅ Created resources table")
-                
-                check_theme = text("""
-                    SELECT COUNT(*) FROM INFORMATION_SCHEMA.TABLES 
-                    WHERE TABLE_NAME = 'theme_config'
-                """)
-                result = conn.execute(check_theme)
-                theme_exists = result.scalar() > 0
-                
-                if theme_exists:
-                    # Check if it has correct columns
-                    check_cols = text("""
-                    SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS 
-                    WHERE TABLE_NAME = 'theme_config' AND COLUMN_NAME = 'config_key'
-                    """)
-                    result = conn.execute(check_cols)
-                    has_config_key = result.scalar() > 0
-                    
-                    if not has_config_key:
-                        conn.execute(text("DROP TABLE IF EXISTS theme_config"))
-                        theme_exists = False
-                
-                if not theme_exists:
-                    conn.execute(text("""
-                    CREATE TABLE theme_config (
-                        id INT PRIMARY KEY IDENTITY(1,1),
-                        config_key VARCHAR(100) UNIQUE NOT NULL,
-                        config_value VARCHAR(500) NOT NULL,
-                        created_at DATETIME DEFAULT GETUTCDATE(),
-                        updated_at DATETIME DEFAULT GETUTCDATE()
-                    );
-                    CREATE INDEX idx_theme_config_key ON theme_config(config_key);
-                    """))
-                    # print("✅ Created theme_config table")
-                
-                check_users = text("""
-                    SELECT COUNT(*) FROM INFORMATION_SCHEMA.TABLES 
-                    WHERE TABLE_NAME = 'users'
-                """)
-                result = conn.execute(check_users)
-                users_exists = result.scalar() > 0
-                
-                if users_exists:
-                    # Check for missing columns
-                    missing_columns = []
-                    columns_to_check = [
-                        ('display_name', "VARCHAR(100)"),
-                        ('tagline', "VARCHAR(200)"),
-                        ('bio', "VARCHAR(500)"),
-                        ('avatar_url', "VARCHAR(500)"),
-                        ('is_protected', "BIT")
-                    ]
-                    
-                    for col_name, col_type in columns_to_check:
-                        check_col = text(f"""
-                            SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS 
-                            WHERE TABLE_NAME = 'users' AND COLUMN_NAME = '{col_name}'
-                        """)
-                        result = conn.execute(check_col)
-                        if result.scalar() == 0:
-                            missing_columns.append((col_name, col_type))
-                    
-                    # Add missing columns
-                    for col_name, col_type in missing_columns:
-                        try:
-                            if col_name == 'is_protected':
-                                conn.execute(text(f"ALTER TABLE users ADD {col_name} {col_type} DEFAULT 0"))
-                            else:
-                                conn.execute(text(f"ALTER TABLE users ADD {col_name} {col_type}"))
-                            # print(f"✅ Added missing column: users.{col_name}")
-                        except Exception as col_err:
-                            print(f"⚠️  Could not add column {col_name}: {col_err}")
-    except Exception as e:
-        print(f"⚠️  Database init error: {e}")
+    """Bring the schema up to date by applying pending migrations.
+    
+    On an up-to-date database this is a single query (see
+    app/db/migrations.py). Errors propagate so the bootstrap is not
+    marked complete.
+    """
+    from app.db.migrations import run_migrations
+    for name in run_migrations(get_engine()):
+        startup_logger.info(f"✅ Applied migration: {name}")
 
 
 def get_db():
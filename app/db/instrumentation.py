@@ -0,0 +1,133 @@
+"""Per-request database instrumentation.
+
+Cursor-execute hooks on every engine add each statement to the stats of
+the request that issued it: query count, total database time and the
+slowest statement. The middleware in main.py opens the stats for a
+request, then reports them in a Server-Timing header and in one JSON log
+line (app.db.queries, DEBUG), and warns when the request ran the same
+statement DB_REPEATED_STATEMENT_WARN times or more - the signature of a
+per-row query or flush() in a loop (N+1).
+
+Statements run outside a request (startup, background writers) are not
+counted; neither are statements run by the SQLite write-queue thread.
+The same hooks feed the slow-query log (app.db.slow_query_log), which
+covers every statement, in a request or not.
+"""
+import json
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+
+query_logger = logging.getLogger("app.db.queries")
+
+SLOWEST_STATEMENT_MAX_CHARS = 500
+
+
+class RequestQueryStats:
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope
+        self.count = 0
+        self.total_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, seconds: float) -> None:
+        # Only ever touched by the threads serving one request, one at a time
+        self.count += 1
+        self.total_seconds += seconds
+        self.statements[statement] += 1
+        if seconds >= self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+    def endpoint(self) -> Optional[str]:
+        """"METHOD /route/{template}" once routing has matched, else the raw path"""
+        if self.scope is None:
+            return None
+        route = self.scope.get("route")
+        return f"{self.scope.get('method')} {route.path if route is not None else self.scope.get('path')}"
+
+    def repeated_statements(self, threshold: int) -> list:
+        return [(statement, n) for statement, n in self.statements.most_common() if n >= threshold]
+
+    def server_timing(self) -> str:
+        header = f'db;dur={self.total_seconds * 1000:.2f};desc="{self.count} queries"'
+        if self.count:
+            header += f", db-slowest;dur={self.slowest_seconds * 1000:.2f}"
+        return header
+
+    def summary(self) -> dict:
+        return {
+            "queries": self.count,
+            "db_ms": round(self.total_seconds * 1000, 2),
+            "slowest_ms": round(self.slowest_seconds * 1000, 2),
+            "slowest_statement": (self.slowest_statement or "")[:SLOWEST_STATEMENT_MAX_CHARS] or None,
+        }
+
+
+# The middleware sets this before the route runs; the threadpool and the
+# async engine's greenlets inherit it, so the hooks find the request's stats
+_current_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def begin_request_stats(scope: Optional[dict] = None) -> RequestQueryStats:
+    stats = RequestQueryStats(scope)
+    _current_stats.set(stats)
+    return stats
+
+
+def current_request_stats() -> Optional[RequestQueryStats]:
+    return _current_stats.get()
+
+
+# Read once when the first engine is created (SLOW_QUERY_THRESHOLD_MS, 0 = off)
+_slow_query_seconds = 0.0
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and (_slow_query_seconds or _current_stats.get() is not None):
+        context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_started", None)
+    if started is None:
+        return
+    seconds = time.perf_counter() - started
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, seconds)
+    if _slow_query_seconds and seconds >= _slow_query_seconds:
+        from app.db.slow_query_log import record_slow_query
+        record_slow_query(conn, statement, parameters, executemany, seconds, stats.endpoint() if stats else None)
+
+
+def attach_query_events(engine: Engine) -> None:
+    global _slow_query_seconds
+    _slow_query_seconds = settings.SLOW_QUERY_THRESHOLD_MS / 1000
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def log_request_stats(status_code: int, stats: RequestQueryStats, repeat_threshold: int) -> None:
+    if query_logger.isEnabledFor(logging.DEBUG):
+        query_logger.debug(json.dumps({
+            "event": "request_db",
+            "endpoint": stats.endpoint(),
+            "status": status_code,
+            **stats.summary(),
+        }))
+    if repeat_threshold > 0:
+        for statement, n in stats.repeated_statements(repeat_threshold):
+            query_logger.warning(json.dumps({
+                "event": "repeated_statement",
+                "endpoint": stats.endpoint(),
+                "executions": n,
+                "statement": statement[:SLOWEST_STATEMENT_MAX_CHARS],
+            }))
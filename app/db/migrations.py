@@ -0,0 +1,201 @@
+"""Ordered, versioned schema migrations.
+
+Each migration runs once per database, in version order, in its own
+transaction, and is recorded in schema_migrations together with a
+fingerprint of every migration up to it. Startup reads the newest row in
+one round trip; if its fingerprint matches the code, the schema is current
+and nothing else is queried.
+
+create_all() still creates missing tables from the models first; the
+migrations cover what it cannot: fixing up databases created by older
+versions, and dialect-specific objects such as the MSSQL cascade trigger.
+Append new migrations to MIGRATIONS; never edit or reorder applied ones.
+"""
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Optional
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, insert, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+
+_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("name", String(100), nullable=False),
+    Column("fingerprint", String(32), nullable=False),
+    Column("applied_at", DateTime, default=datetime.utcnow),
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    apply: Callable[[Connection], None]
+
+
+def _legacy_mssql_fixups(conn: Connection) -> None:
+    """Repair Azure SQL databases created before the current models.
+
+    Formerly probed on every startup by init_db: recreates resources with a
+    VARCHAR user_id and theme_config with the key/value layout, and adds
+    profile columns missing from old users tables.
+    """
+    if conn.dialect.name != "mssql":
+        return
+
+    def table_exists(name: str) -> bool:
+        return conn.execute(
+            text("SELECT COUNT(*) FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_NAME = :name"),
+            {"name": name}
+        ).scalar() > 0
+
+    def column_type(table: str, column: str) -> Optional[str]:
+        return conn.execute(
+            text(
+                "SELECT DATA_TYPE FROM INFORMATION_SCHEMA.COLUMNS "
+                "WHERE TABLE_NAME = :table AND COLUMN_NAME = :column"
+            ),
+            {"table": table, "column": column}
+        ).scalar()
+
+    if table_exists("resources") and column_type("resources", "user_id") not in ("varchar", "nvarchar"):
+        conn.execute(text("DROP TABLE IF EXISTS resources"))
+    if not table_exists("resources"):
+        conn.execute(text("""
+        CREATE TABLE resources (
+            id INT PRIMARY KEY IDENTITY(1,1),
+            user_id VARCHAR(36) NOT NULL,
+            icon VARCHAR(20) NOT NULL,
+            title VARCHAR(100) NOT NULL,
+            resource_name VARCHAR(200) NOT NULL,
+            description VARCHAR(500),
+            status VARCHAR(20) DEFAULT 'Running',
+            region VARCHAR(50) DEFAULT 'East US',
+            created_at DATETIME DEFAULT GETUTCDATE(),
+            updated_at DATETIME DEFAULT GETUTCDATE()
+        );
+        CREATE INDEX idx_resources_user_id ON resources(user_id);
+        """))
+
+    if table_exists("theme_config") and column_type("theme_config", "config_key") is None:
+        conn.execute(text("DROP TABLE IF EXISTS theme_config"))
+    if not table_exists("theme_config"):
+        conn.execute(text("""
+        CREATE TABLE theme_config (
+            id INT PRIMARY KEY IDENTITY(1,1),
+            config_key VARCHAR(100) UNIQUE NOT NULL,
+            config_value VARCHAR(500) NOT NULL,
+            created_at DATETIME DEFAULT GETUTCDATE(),
+            updated_at DATETIME DEFAULT GETUTCDATE()
+        );
+        CREATE INDEX idx_theme_config_key ON theme_config(config_key);
+        """))
+
+    if table_exists("users"):
+        for col_name, col_type in [
+            ('display_name', "VARCHAR(100)"),
+            ('tagline', "VARCHAR(200)"),
+            ('bio', "VARCHAR(500)"),
+            ('avatar_url', "VARCHAR(500)"),
+            ('is_protected', "BIT DEFAULT 0")
+        ]:
+            if column_type("users", col_name) is None:
+                conn.execute(text(f"ALTER TABLE users ADD {col_name} {col_type}"))
+
+
+def _users_delete_cascade_trigger(conn: Connection) -> None:
+    # resources.user_id is VARCHAR while users.id is INT, so MSSQL cannot
+    # declare the FOREIGN KEY ... ON DELETE CASCADE; a trigger gives the
+    # same database-side cascade (SQLite enforces the declared FK instead)
+    if conn.dialect.name != "mssql":
+        return
+    conn.execute(text("""
+        CREATE OR ALTER TRIGGER trg_users_delete_resources ON users
+        AFTER DELETE AS
+        BEGIN
+            SET NOCOUNT ON;
+            DELETE r FROM resources r
+            INNER JOIN deleted d ON r.user_id = CAST(d.id AS VARCHAR(36));
+        END
+    """))
+
+
+def _users_role_email_index(conn: Connection) -> None:
+    # create_all() skips tables that already exist, so add the (role, email)
+    # index used by the last-admin guard and the user directory to older databases
+    from app.models.user import User
+    for index in User.__table__.indexes:
+        if index.name == "ix_users_role_email":
+            index.create(bind=conn, checkfirst=True)
+
+
+def _user_deletion_job_heartbeat(conn: Connection) -> None:
+    # Columns added to user_deletion_jobs after the table was first created
+    from sqlalchemy import inspect
+    from app.models.user import UserDeletionJob
+    existing = {column["name"] for column in inspect(conn).get_columns("user_deletion_jobs")}
+    for name in ("worker", "heartbeat_at"):
+        if name not in existing:
+            column = UserDeletionJob.__table__.c[name]
+            conn.execute(text(
+                f"ALTER TABLE user_deletion_jobs ADD {name} {column.type.compile(dialect=conn.dialect)} NULL"
+            ))
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "legacy_mssql_fixups", _legacy_mssql_fixups),
+    Migration(2, "users_delete_cascade_trigger", _users_delete_cascade_trigger),
+    Migration(3, "users_role_email_index", _users_role_email_index),
+    Migration(4, "user_deletion_job_heartbeat", _user_deletion_job_heartbeat),
+]
+
+
+def fingerprint(migrations: List[Migration]) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for migration in migrations:
+        digest.update(f"{migration.version}:{migration.name};".encode())
+    return digest.hexdigest()
+
+
+def schema_is_current(engine: Engine) -> bool:
+    """One round trip: does the newest applied migration match the code?"""
+    latest = MIGRATIONS[-1]
+    try:
+        with engine.connect() as conn:
+            row = conn.execute(
+                select(schema_migrations.c.version, schema_migrations.c.fingerprint)
+                .order_by(schema_migrations.c.version.desc())
+                .limit(1)
+            ).first()
+    except DBAPIError:
+        return False  # no schema_migrations table yet
+    return row is not None and row.version == latest.version and row.fingerprint == fingerprint(MIGRATIONS)
+
+
+def run_migrations(engine: Engine) -> List[str]:
+    """Apply pending migrations in order; returns the names applied"""
+    if schema_is_current(engine):
+        return []
+
+    _metadata.create_all(bind=engine, checkfirst=True)
+    with engine.connect() as conn:
+        applied_versions = set(conn.scalars(select(schema_migrations.c.version)).all())
+
+    applied = []
+    for position, migration in enumerate(MIGRATIONS):
+        if migration.version in applied_versions:
+            continue
+        with engine.begin() as conn:
+            migration.apply(conn)
+            conn.execute(insert(schema_migrations).values(
+                version=migration.version,
+                name=migration.name,
+                fingerprint=fingerprint(MIGRATIONS[:position + 1])
+            ))
+        applied.append(migration.name)
+    return applied
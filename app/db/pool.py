@@ -0,0 +1,184 @@
+"""Connection pool instrumentation and warm-up.
+
+Pool events keep counters of checkouts, new connections and invalidations;
+InstrumentedQueuePool additionally times how long callers wait for a
+connection, which is the number that tells whether the pool is too small.
+"""
+import math
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+from app.core.config import settings
+from app.core.log import startup_logger
+
+
+class PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_count = 0
+        self.wait_total_seconds = 0.0
+        self.wait_max_seconds = 0.0
+
+    def incr(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.wait_count += 1
+            self.wait_total_seconds += seconds
+            self.wait_max_seconds = max(self.wait_max_seconds, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_count": self.wait_count,
+                "wait_avg_ms": round(1000 * self.wait_total_seconds / self.wait_count, 3) if self.wait_count else 0.0,
+                "wait_max_ms": round(1000 * self.wait_max_seconds, 3),
+            }
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+
+    # Log with SQLAlchemy's pool loggers, not under app.* (LOG_LEVEL=DEBUG)
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.InstrumentedQueuePool"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_stats.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        pool_stats.record_wait(time.perf_counter() - started)
+        return connection
+
+
+def attach_pool_events(engine) -> None:
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        pool_stats.incr("connects")
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        pool_stats.incr("checkouts")
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        pool_stats.incr("checkins")
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        pool_stats.incr("invalidations")
+
+
+def pool_status(engine) -> Dict[str, Any]:
+    """Current pool occupancy plus the cumulative event counters of the application engine"""
+    pool = engine.pool
+    status = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            # What get_engine() configured; QueuePool does not expose it publicly
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "timeout_seconds": pool.timeout(),
+        })
+    status.update(pool_stats.snapshot())
+    return status
+
+
+def pool_saturation(status: Dict[str, Any]) -> Optional[float]:
+    """Share of the pool's capacity (size + max overflow) checked out, from pool_status()"""
+    if "size" not in status:
+        return None
+    capacity = status["size"] + max(status["max_overflow"], 0)
+    return round(status["checked_out"] / capacity, 4) if capacity else None
+
+
+def prewarm_pool(engine, connections: int) -> int:
+    """Open connections in parallel and return them to the pool idle.
+
+    Pays the TCP + TLS + login cost at startup instead of on the first
+    requests. Returns how many connections were opened.
+    """
+    if connections <= 0:
+        return 0
+
+    def _open(_):
+        return engine.connect()
+
+    opened = []
+    with ThreadPoolExecutor(max_workers=connections) as executor:
+        for future in [executor.submit(_open, i) for i in range(connections)]:
+            try:
+                opened.append(future.result())
+            except Exception as e:
+                startup_logger.warning(f"⚠️  Pool warm-up connection failed: {str(e)[:100]}")
+    for connection in opened:
+        connection.close()
+    return len(opened)
+
+
+_ping_executor: Optional[ThreadPoolExecutor] = None
+_ping_future: Optional[Future] = None
+_ping_lock = threading.Lock()
+
+
+def _ping(engine) -> float:
+    # A fresh DBAPI connection, bypassing the pool and its events: a
+    # saturated pool is load, not a dead database, and must not fail the ping
+    started = time.perf_counter()
+    cargs, cparams = engine.dialect.create_connect_args(engine.url)
+    if engine.dialect.name == "mssql":
+        timeout = max(1, math.ceil(settings.READY_DB_TIMEOUT_SECONDS))
+        cparams.update(login_timeout=timeout, timeout=timeout)
+    connection = engine.dialect.connect(*cargs, **cparams)
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT 1")
+        cursor.fetchall()
+        cursor.close()
+    finally:
+        connection.close()
+    return time.perf_counter() - started
+
+
+def start_database_ping(engine) -> Future:
+    """Round trip SELECT 1 on its own thread; resolves to the latency in seconds.
+
+    The ping opens its own connection outside the pool (with a login timeout
+    on Azure SQL), and neither uses nor waits for the request threadpool, so
+    it still answers when every request thread and pooled connection is
+    busy. A ping that is still running is shared rather than piling up
+    another one behind it.
+    """
+    global _ping_executor, _ping_future
+    with _ping_lock:
+        if _ping_executor is None:
+            _ping_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-ping")
+        if _ping_future is None or _ping_future.done():
+            _ping_future = _ping_executor.submit(_ping, engine)
+        return _ping_future
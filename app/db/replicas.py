@@ -0,0 +1,285 @@
+"""Read-replica routing (DB_READ_REPLICA_URLS).
+
+ReadSessionLocal is a drop-in sibling of SessionLocal for read-mostly
+endpoints: SELECTs go to a replica, anything that writes goes to the
+primary. Three things send reads back to the primary:
+
+- the session has already written (its own flush or DML),
+- the client wrote within DB_READ_YOUR_WRITES_SECONDS, so it sees its
+  own changes despite replication lag; the write time travels with the
+  client in a cookie, so this holds whichever worker serves the read,
+- no replica is reachable; a replica that fails to connect is skipped
+  for DB_REPLICA_RETRY_SECONDS.
+
+AsyncReadSessionLocal / get_async_read_db do the same for the async
+routes (ASYNC_DB_ENABLED), over async engines for the same replicas.
+With no replicas configured every statement goes to the primary.
+Locally two SQLite files work, e.g.
+DB_READ_REPLICA_URLS=sqlite:///file:data/replica.db?mode=ro&uri=true
+"""
+import itertools
+import logging
+import math
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional
+from fastapi import Depends, Request, Response
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.selectable import Select
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.rate_limit import client_ip
+from app.db.async_database import async_driver_url, get_async_db, get_async_engine
+from app.db.database import get_db, get_engine, sqlite_pragmas
+from app.db.instrumentation import attach_query_events
+
+logger = logging.getLogger("app.db.replicas")
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+RECENT_WRITERS_MAX_ENTRIES = 100000
+# Unix time of the client's last write, for read-your-writes on any worker
+LAST_WRITE_COOKIE = "last_write_at"
+
+
+def _pool_options() -> dict:
+    return dict(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        # Always ping: a dead replica must fail at checkout, not mid-request
+        pool_pre_ping=True
+    )
+
+
+def _configure_sqlite_replica(dbapi_connection, connection_record):
+    # Same profile as the primary, minus journal_mode: replicas may be opened
+    # read-only (mode=ro) and the replication process owns the file's mode
+    cursor = dbapi_connection.cursor()
+    for pragma in sqlite_pragmas():
+        if not pragma.startswith("PRAGMA journal_mode"):
+            cursor.execute(pragma)
+    cursor.close()
+
+
+class ReplicaRouter:
+    """Round-robins reads over replicas, skipping ones marked down.
+    
+    Replicas are addressed by index; engines holds their sync engines and
+    async_engines() their async ones, created on first use. Both share the
+    down marks, so a replica one side failed to reach is skipped by both.
+    """
+
+    def __init__(self, urls: List[str], retry_seconds: float):
+        self.urls = urls
+        self.retry_seconds = retry_seconds
+        self.engines: List[Engine] = [self._create_engine(url) for url in urls]
+        self._async_engines: Optional[List[Engine]] = None
+        self._down_until: Dict[int, float] = {}
+        self._cycle = itertools.cycle(range(len(urls)))
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _create_engine(url: str) -> Engine:
+        if url.startswith("sqlite"):
+            replica = create_engine(url, connect_args={"check_same_thread": False})
+            event.listen(replica, "connect", _configure_sqlite_replica)
+        else:
+            replica = create_engine(url, **_pool_options())
+        attach_query_events(replica)
+        return replica
+
+    def async_engines(self) -> List[Engine]:
+        """The replicas' async engines, as the sync facades AsyncSession binds to"""
+        with self._lock:
+            if self._async_engines is None:
+                self._async_engines = []
+                for url in self.urls:
+                    if url.startswith("sqlite"):
+                        replica = create_async_engine(async_driver_url(url)).sync_engine
+                        event.listen(replica, "connect", _configure_sqlite_replica)
+                    else:
+                        replica = create_async_engine(async_driver_url(url), **_pool_options()).sync_engine
+                    attach_query_events(replica)
+                    self._async_engines.append(replica)
+            return self._async_engines
+
+    def choose(self) -> Optional[int]:
+        """The next replica not marked down, or None to fall back to the primary"""
+        with self._lock:
+            now = time.monotonic()
+            for _ in range(len(self.urls)):
+                index = next(self._cycle)
+                if self._down_until.get(index, 0) <= now:
+                    return index
+        return None
+
+    def mark_down(self, index: int, error: Exception) -> None:
+        with self._lock:
+            self._down_until[index] = time.monotonic() + self.retry_seconds
+        logger.warning(f"⚠️ Read replica {self.engines[index].url.render_as_string(hide_password=True)} unavailable: {str(error)[:100]}")
+
+    def status(self) -> List[dict]:
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "url": replica.url.render_as_string(hide_password=True),
+                    "down_for_seconds": max(round(self._down_until.get(i, 0) - now, 1), 0)
+                }
+                for i, replica in enumerate(self.engines)
+            ]
+
+
+class RoutingSession(Session):
+    """Sends SELECTs to one replica connection per session, the rest to the primary.
+    
+    The replica connection is checked out on the first read (pre-pinged by
+    the pool) and held until close(); if the checkout fails the replica is
+    marked down and the session reads from the primary instead.
+    """
+
+    def __init__(self, *args, replica_router: Optional[ReplicaRouter] = None, use_async_engines: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replica_router = replica_router
+        self.use_async_engines = use_async_engines
+        self.use_primary = replica_router is None or not replica_router.urls
+        self._read_bind = None
+        self._replica_connection: Optional[Connection] = None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.use_primary or self._flushing:
+            return super().get_bind(mapper, clause=clause, **kwargs)
+        if clause is not None and not isinstance(clause, Select):
+            if isinstance(clause, UpdateBase):
+                # Once this session writes, its reads must see the write too
+                self.use_primary = True
+            # DML and raw text() go to the primary
+            return super().get_bind(mapper, clause=clause, **kwargs)
+        if self._read_bind is None:
+            self._read_bind = self._connect_replica() or super().get_bind(mapper, clause=clause, **kwargs)
+        return self._read_bind
+
+    def _connect_replica(self) -> Optional[Connection]:
+        engines = self.replica_router.async_engines() if self.use_async_engines else self.replica_router.engines
+        for _ in range(len(engines)):
+            index = self.replica_router.choose()
+            if index is None:
+                break
+            try:
+                self._replica_connection = engines[index].connect()
+                return self._replica_connection
+            except Exception as e:
+                self.replica_router.mark_down(index, e)
+        return None
+
+    def close(self) -> None:
+        try:
+            super().close()
+        finally:
+            self._read_bind = None
+            if self._replica_connection is not None:
+                self._replica_connection.close()
+                self._replica_connection = None
+
+
+def replica_urls() -> List[str]:
+    return [url.strip() for url in settings.DB_READ_REPLICA_URLS.split(",") if url.strip()]
+
+
+@lru_cache(maxsize=None)
+def get_replica_router() -> ReplicaRouter:
+    """Replica engines are created on first use, not at import"""
+    return ReplicaRouter(replica_urls(), settings.DB_REPLICA_RETRY_SECONDS)
+
+
+@lru_cache(maxsize=None)
+def _read_session_factory() -> sessionmaker:
+    return sessionmaker(
+        class_=RoutingSession, autocommit=False, autoflush=False,
+        bind=get_engine(), replica_router=get_replica_router()
+    )
+
+
+def ReadSessionLocal(**kwargs) -> RoutingSession:
+    return _read_session_factory()(**kwargs)
+
+
+@lru_cache(maxsize=None)
+def _async_read_session_factory() -> async_sessionmaker:
+    return async_sessionmaker(
+        get_async_engine(), sync_session_class=RoutingSession, autoflush=False, expire_on_commit=False,
+        replica_router=get_replica_router(), use_async_engines=True
+    )
+
+
+def AsyncReadSessionLocal(**kwargs) -> AsyncSession:
+    return _async_read_session_factory()(**kwargs)
+
+
+# Clients that wrote recently on this worker; backs up the cookie for
+# clients that do not send cookies back
+recent_writers = TTLCache("recent_writers", RECENT_WRITERS_MAX_ENTRIES, lambda: settings.DB_READ_YOUR_WRITES_SECONDS)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _pin_to_primary_after_flush(session, flush_context):
+    session.use_primary = True
+
+
+def client_key(request: Request) -> str:
+    return request.headers.get("authorization") or client_ip(request)
+
+
+def note_client_write(request: Request, response: Response) -> None:
+    recent_writers.set(client_key(request), True)
+    response.set_cookie(
+        LAST_WRITE_COOKIE, f"{time.time():.3f}",
+        max_age=math.ceil(settings.DB_READ_YOUR_WRITES_SECONDS), httponly=True, samesite="lax"
+    )
+
+
+def wrote_recently(request: Request) -> bool:
+    """Whether the client wrote within DB_READ_YOUR_WRITES_SECONDS, on any worker"""
+    if recent_writers.get(client_key(request)):
+        return True
+    try:
+        written_at = float(request.cookies.get(LAST_WRITE_COOKIE, ""))
+    except ValueError:
+        return False
+    return time.time() - written_at < settings.DB_READ_YOUR_WRITES_SECONDS
+
+
+def get_read_db(request: Request, primary: Session = Depends(get_db)):
+    """get_db for read-mostly endpoints: queries are served by a replica when possible.
+    
+    Reads that go to the primary anyway share the request's get_db session,
+    which get_current_user has already checked a connection out for. A
+    second primary session would hold one connection while waiting for
+    another, and enough concurrent requests doing that exhaust the pool.
+    """
+    if not replica_urls() or wrote_recently(request):
+        yield primary
+        return
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(request: Request, primary: AsyncSession = Depends(get_async_db)):
+    """get_read_db for the async routes, sharing the request's get_async_db session the same way"""
+    if not replica_urls() or wrote_recently(request):
+        yield primary
+        return
+    db = AsyncReadSessionLocal()
+    try:
+        yield db
+    finally:
+        await db.close()
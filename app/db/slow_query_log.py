@@ -0,0 +1,227 @@
+"""Slow-query log (SLOW_QUERY_THRESHOLD_MS).
+
+Statements slower than the threshold are written as JSON lines with the
+endpoint that issued them and the shapes of their bound
+parameters: types and string lengths, never values. A user_id bound as
+an int against the VARCHAR column shows up as "int" here.
+
+Each worker writes and rotates its own file, named after SLOW_QUERY_LOG_PATH
+with the pid inserted (data/slow_queries.<pid>.log by default): a rotating
+file shared by several processes loses entries when one of them rolls it
+over. Files nobody has written to for STALE_LOG_DAYS are removed.
+
+The query plan is captured along with the entry: EXPLAIN QUERY PLAN on
+SQLite, the showplan XML on Azure SQL. Both only compile the statement,
+so nothing runs twice. Capturing never touches the connection that ran the
+statement - its rows may not have been fetched yet, and pymssql allows one
+active statement per connection - nor the request's time: entries that
+want a plan are queued and a background thread captures it on a
+separate pooled connection, then writes the entry. When the queue is full
+the entry is written without a plan.
+
+GET /api/admin/db/slow-queries merges every worker's files, so entries
+from all workers on the host are visible.
+"""
+import heapq
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Any, List, Optional
+from app.core.config import settings
+
+slow_query_logger = logging.getLogger("app.db.slow_queries")
+
+STATEMENT_MAX_CHARS = 2000
+PLAN_MAX_CHARS = 20000
+PLAN_QUEUE_MAX = 100
+STALE_LOG_DAYS = 7
+_PLANNABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+_handler_lock = threading.Lock()
+# pid the handler was opened by; a forked worker opens its own file
+_handler_pid: Optional[int] = None
+_handler: Optional[logging.Handler] = None
+
+_plan_queue: "queue.Queue" = queue.Queue(maxsize=PLAN_QUEUE_MAX)
+_plan_thread: Optional[threading.Thread] = None
+_plan_thread_lock = threading.Lock()
+
+
+def worker_log_path(pid: int) -> Path:
+    path = Path(settings.SLOW_QUERY_LOG_PATH)
+    return path.with_name(f"{path.stem}.{pid}{path.suffix}")
+
+
+def _log_files() -> List[Path]:
+    """Every worker's file and rotated backups (plus a pre-per-worker shared file)"""
+    path = Path(settings.SLOW_QUERY_LOG_PATH)
+    if not path.parent.exists():
+        return []
+    pattern = re.compile(rf"{re.escape(path.stem)}(\.\d+)?{re.escape(path.suffix)}(\.\d+)?")
+    return [file for file in path.parent.iterdir() if pattern.fullmatch(file.name)]
+
+
+def _remove_stale_logs() -> None:
+    cutoff = time.time() - STALE_LOG_DAYS * 86400
+    for file in _log_files():
+        try:
+            if file.stat().st_mtime < cutoff:
+                file.unlink()
+        except OSError:
+            pass
+
+
+def _ensure_handler() -> None:
+    # The file (and data/) is created on the first slow query, not at import
+    global _handler_pid, _handler
+    pid = os.getpid()
+    if _handler_pid == pid:
+        return
+    with _handler_lock:
+        if _handler_pid != pid:
+            path = worker_log_path(pid)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            _remove_stale_logs()
+            if _handler is not None:
+                # Inherited across fork: leave the parent's file to the parent
+                slow_query_logger.removeHandler(_handler)
+            _handler = RotatingFileHandler(
+                path,
+                maxBytes=settings.SLOW_QUERY_LOG_MAX_BYTES,
+                backupCount=settings.SLOW_QUERY_LOG_BACKUPS,
+                encoding="utf-8"
+            )
+            _handler.setFormatter(logging.Formatter("%(message)s"))
+            slow_query_logger.addHandler(_handler)
+            slow_query_logger.setLevel(logging.INFO)
+            slow_query_logger.propagate = False
+            _handler_pid = pid
+
+
+def parameter_shapes(parameters: Any) -> Any:
+    def shape(value: Any) -> str:
+        if isinstance(value, (str, bytes)):
+            return f"{type(value).__name__}[{len(value)}]"
+        return type(value).__name__
+
+    if isinstance(parameters, dict):
+        return {key: shape(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (list, tuple, dict)):
+            # executemany: the first row stands for all of them
+            return {"rows": len(parameters), "first": parameter_shapes(parameters[0])}
+        return [shape(value) for value in parameters]
+    return shape(parameters)
+
+
+def _capture_plan(conn, statement: str, parameters: Any) -> Optional[str]:
+    """Plan of a statement, on a connection that is not running anything else"""
+    dbapi_connection = conn.connection.dbapi_connection
+    cursor = dbapi_connection.cursor()
+    try:
+        if conn.dialect.name == "sqlite":
+            cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            return "\n".join(f"{row[0]}|{row[1]}|{row[3]}" for row in cursor.fetchall())
+        if conn.dialect.name == "mssql":
+            # With SHOWPLAN_XML on, statements are compiled and their plan returned, not run
+            cursor.execute("SET SHOWPLAN_XML ON")
+            try:
+                cursor.execute(statement, parameters)
+                row = cursor.fetchone()
+                return row[0] if row else None
+            finally:
+                cursor.execute("SET SHOWPLAN_XML OFF")
+        return None
+    finally:
+        cursor.close()
+
+
+def _write_entry(entry: dict) -> None:
+    _ensure_handler()
+    slow_query_logger.info(json.dumps(entry, default=str))
+
+
+def _plan_worker() -> None:
+    while True:
+        engine, statement, parameters, entry = _plan_queue.get()
+        try:
+            with engine.connect() as conn:
+                try:
+                    plan = _capture_plan(conn, statement, parameters)
+                except Exception:
+                    # e.g. SHOWPLAN_XML left on: never hand the connection back to the pool
+                    conn.invalidate()
+                    raise
+            entry["plan"] = plan[:PLAN_MAX_CHARS] if plan else None
+        except Exception as e:
+            entry["plan_error"] = str(e)[:200]
+        try:
+            _write_entry(entry)
+        except Exception:
+            pass
+
+
+def _queue_plan_capture(engine, statement: str, parameters: Any, entry: dict) -> bool:
+    global _plan_thread
+    if _plan_thread is None or not _plan_thread.is_alive():
+        with _plan_thread_lock:
+            if _plan_thread is None or not _plan_thread.is_alive():
+                _plan_thread = threading.Thread(target=_plan_worker, name="slow-query-plans", daemon=True)
+                _plan_thread.start()
+    # Copied: the caller's parameter container may be reused once it returns
+    if isinstance(parameters, dict):
+        parameters = dict(parameters)
+    elif isinstance(parameters, (list, tuple)):
+        parameters = tuple(parameters)
+    try:
+        _plan_queue.put_nowait((engine, statement, parameters, entry))
+        return True
+    except queue.Full:
+        return False
+
+
+def record_slow_query(conn, statement: str, parameters: Any, executemany: bool, seconds: float, endpoint: Optional[str]) -> None:
+    entry = {
+        "ts": round(time.time(), 3),
+        "pid": os.getpid(),
+        "endpoint": endpoint,
+        "duration_ms": round(seconds * 1000, 2),
+        "dialect": conn.dialect.name,
+        "statement": statement[:STATEMENT_MAX_CHARS],
+        "parameters": parameter_shapes(parameters),
+        "executemany": executemany,
+        "plan": None,
+    }
+    if settings.SLOW_QUERY_CAPTURE_PLAN and not executemany and statement.lstrip().upper().startswith(_PLANNABLE):
+        if _queue_plan_capture(conn.engine, statement, parameters, entry):
+            return
+        entry["plan_error"] = "plan capture queue full"
+    _write_entry(entry)
+
+
+def read_slow_queries(limit: int, endpoint: Optional[str] = None, min_ms: float = 0) -> List[dict]:
+    """Newest entries first, merged across every worker's files and their rotated backups"""
+    entries: List[dict] = []
+    for file in _log_files():
+        try:
+            with open(file, encoding="utf-8") as handle:
+                lines = handle.readlines()
+        except OSError:
+            continue  # rotated away or removed since it was listed
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # a line still being written by its worker
+            if endpoint and entry.get("endpoint") != endpoint:
+                continue
+            if entry.get("duration_ms", 0) < min_ms:
+                continue
+            entries.append(entry)
+    return heapq.nlargest(limit, entries, key=lambda entry: entry.get("ts", 0))
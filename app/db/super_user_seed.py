@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 from app.models.user import User, UserRole
 from app.core.security import get_password_hash
+from app.core.log import startup_logger
 
 
 def create_super_user(db: Session) -> None:
@@ -34,7 +35,7 @@ def create_super_user(db: Session) -> None:
         )
         db.add(admin_user)
         db.commit()
-        print(f"✅ Protected admin user created: {admin_email}")
+        startup_logger.info(f"✅ Protected admin user created: {admin_email}")
     else:
         # Ensure existing user has admin role and is_protected flag
         needs_update = False
@@ -47,6 +48,6 @@ def create_super_user(db: Session) -> None:
         
         if needs_update:
             db.commit()
-            print(f"✅ Updated user to protected admin: {admin_email}")
+            startup_logger.info(f"✅ Updated user to protected admin: {admin_email}")
         else:
-            print(f"ℹ️  Protected admin user already exists: {admin_email}")
+            startup_logger.info(f"ℹ️  Protected admin user already exists: {admin_email}")
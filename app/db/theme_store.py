@@ -0,0 +1,334 @@
+"""Theme configuration storage: upserts, version counters, merge patches and
+debounced saves.
+
+theme_config holds two layers: global keys edited by admins and one
+user_theme_<id> JSON blob per user. Every write bumps the version of its
+scope ("global" or the user key) in the same transaction, which is what
+the effective-theme cache in app/api/theme.py is keyed on.
+"""
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from functools import cached_property
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from sqlalchemy import bindparam, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from app.core.cache import TTLCache
+from app.core.config import setting_value, settings
+from app.db.database import SessionLocal
+from app.models.user import ThemeConfig, ThemeVersion
+
+logger = logging.getLogger("app.db.theme_store")
+
+USER_THEME_PREFIX = "user_theme_"
+GLOBAL_SCOPE = "global"
+MAX_THEME_VALUE_LENGTH = ThemeConfig.__table__.c.config_value.type.length
+
+# scope -> version, so steady-state effective-theme reads skip the database
+theme_version_cache = TTLCache(
+    "theme_version", lambda: settings.THEME_CACHE_MAX_ENTRIES, lambda: settings.THEME_VERSION_TTL_SECONDS
+)
+
+_THEME_COLUMNS = (
+    ThemeConfig.id, ThemeConfig.config_key, ThemeConfig.config_value,
+    ThemeConfig.created_at, ThemeConfig.updated_at
+)
+
+_MSSQL_BUMP = text("""
+    MERGE theme_versions WITH (HOLDLOCK) AS target
+    USING (SELECT :scope AS scope) AS source
+    ON target.scope = source.scope
+    WHEN MATCHED THEN UPDATE SET version = target.version + 1
+    WHEN NOT MATCHED THEN INSERT (scope, version) VALUES (source.scope, 1);
+""")
+
+# HOLDLOCK makes MERGE take a key-range lock, so two first writes of the
+# same key cannot both take the WHEN NOT MATCHED branch. With :only_if_newer
+# a row updated after :updated_at is left alone and nothing is output
+_MSSQL_MERGE = text("""
+    MERGE theme_config WITH (HOLDLOCK) AS target
+    USING (SELECT :config_key AS config_key, :config_value AS config_value) AS source
+    ON target.config_key = source.config_key
+    WHEN MATCHED AND (:only_if_newer = 0 OR target.updated_at IS NULL OR target.updated_at <= :updated_at) THEN
+        UPDATE SET config_value = source.config_value, updated_at = :updated_at
+    WHEN NOT MATCHED THEN
+        INSERT (config_key, config_value, updated_at) VALUES (source.config_key, source.config_value, :updated_at)
+    OUTPUT inserted.id, inserted.config_key, inserted.config_value, inserted.created_at, inserted.updated_at;
+""")
+
+
+def theme_scope(config_key: str) -> str:
+    return config_key if config_key.startswith(USER_THEME_PREFIX) else GLOBAL_SCOPE
+
+
+def bump_theme_version(db: Session, scope: str) -> None:
+    """Increment a scope's version in one statement. Does not commit."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        stmt = sqlite_insert(ThemeVersion).values(scope=scope, version=1)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[ThemeVersion.scope],
+            set_={"version": ThemeVersion.version + 1}
+        ))
+    elif dialect == "mssql":
+        db.execute(_MSSQL_BUMP, {"scope": scope})
+    else:
+        row = db.get(ThemeVersion, scope, with_for_update=True)
+        if row is None:
+            db.add(ThemeVersion(scope=scope, version=1))
+        else:
+            row.version += 1
+        db.flush()
+
+
+def get_theme_versions(db: Session, scopes: Iterable[str]) -> Dict[str, int]:
+    """Current version per scope (0 if never written), cached for THEME_VERSION_TTL_SECONDS"""
+    versions = {}
+    missing = []
+    for scope in scopes:
+        version = theme_version_cache.get(scope)
+        if version is None:
+            missing.append(scope)
+        else:
+            versions[scope] = version
+    if missing:
+        found = dict(db.execute(
+            select(ThemeVersion.scope, ThemeVersion.version).where(ThemeVersion.scope.in_(missing))
+        ).all())
+        for scope in missing:
+            versions[scope] = found.get(scope, 0)
+            theme_version_cache.set(scope, versions[scope])
+    return versions
+
+
+def upsert_theme_config(db: Session, config_key: str, config_value: str, submitted_at: Optional[datetime] = None):
+    """Insert or update one theme_config row in a single statement and return it.
+
+    SQLite uses INSERT ... ON CONFLICT DO UPDATE ... RETURNING, Azure SQL a
+    MERGE ... OUTPUT. Other dialects fall back to select-then-write. Also
+    bumps the key's scope version. Does not commit.
+
+    updated_at is set to submitted_at (UTC), default now. When submitted_at
+    is given the write is conditional: a row updated after it holds a newer
+    save, is kept, and None is returned - so a delayed write cannot
+    overwrite a later one.
+    """
+    only_if_newer = submitted_at is not None
+    updated_at = submitted_at or datetime.utcnow()
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        stmt = sqlite_insert(ThemeConfig).values(
+            config_key=config_key, config_value=config_value, updated_at=updated_at
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ThemeConfig.config_key],
+            set_={"config_value": stmt.excluded.config_value, "updated_at": stmt.excluded.updated_at},
+            where=(
+                ThemeConfig.updated_at.is_(None) | (ThemeConfig.updated_at <= updated_at)
+                if only_if_newer else None
+            )
+        ).returning(*_THEME_COLUMNS)
+        row = db.execute(stmt).one_or_none()
+    elif dialect == "mssql":
+        row = db.execute(_MSSQL_MERGE, {
+            "config_key": config_key, "config_value": config_value,
+            "updated_at": updated_at, "only_if_newer": int(only_if_newer)
+        }).one_or_none()
+    else:
+        config = db.query(ThemeConfig).filter(ThemeConfig.config_key == config_key).with_for_update().first()
+        if not config:
+            config = ThemeConfig(config_key=config_key, config_value=config_value, updated_at=updated_at)
+            db.add(config)
+        elif only_if_newer and config.updated_at is not None and config.updated_at > updated_at:
+            return None
+        else:
+            config.config_value = config_value
+            config.updated_at = updated_at
+        db.flush()
+        row = db.execute(select(*_THEME_COLUMNS).where(ThemeConfig.id == config.id)).one()
+    if row is None:
+        return None
+    bump_theme_version(db, theme_scope(config_key))
+    return row
+
+
+def apply_merge_patch(target: Any, patch: Any) -> Any:
+    """RFC 7396 JSON merge patch: objects merge recursively, null deletes a key"""
+    if not isinstance(patch, dict):
+        return patch
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = apply_merge_patch(result.get(key), value)
+    return result
+
+
+def merge_patch_theme_config(db: Session, config_key: str, patch: Dict[str, Any]) -> str:
+    """Apply a JSON merge patch to a stored theme and return the new JSON.
+
+    On SQLite the patch is applied inside the database with json_patch(),
+    so only the patch travels to the database and the blob is never read
+    into the application. Other dialects read the row under an update lock,
+    patch it in Python and write it back. Raises ValueError if the result
+    exceeds the column size. Does not commit.
+    """
+    patch_json = json.dumps(patch)
+    if db.get_bind().dialect.name == "sqlite":
+        new_value = db.scalar(
+            text(
+                "UPDATE theme_config SET config_value = json_patch(config_value, :patch), "
+                "updated_at = :updated_at WHERE config_key = :config_key "
+                "AND json_valid(config_value) RETURNING config_value"
+            ).bindparams(bindparam("updated_at", type_=ThemeConfig.updated_at.type)),
+            {"patch": patch_json, "config_key": config_key, "updated_at": datetime.utcnow()}
+        )
+        if new_value is not None:
+            if len(new_value) > MAX_THEME_VALUE_LENGTH:
+                raise ValueError(f"Theme exceeds {MAX_THEME_VALUE_LENGTH} characters")
+            bump_theme_version(db, theme_scope(config_key))
+            return new_value
+        current = None  # no (valid) stored theme yet: the patch applies to {}
+    else:
+        current = db.scalar(
+            select(ThemeConfig.config_value)
+            .where(ThemeConfig.config_key == config_key)
+            .with_for_update()
+        )
+
+    try:
+        base = json.loads(current) if current else {}
+    except json.JSONDecodeError:
+        base = {}
+    new_value = json.dumps(apply_merge_patch(base, patch))
+    if len(new_value) > MAX_THEME_VALUE_LENGTH:
+        raise ValueError(f"Theme exceeds {MAX_THEME_VALUE_LENGTH} characters")
+    upsert_theme_config(db, config_key, new_value)
+    return new_value
+
+
+def load_global_theme(db: Session) -> Dict[str, Any]:
+    """All global (non-user) keys as a dict; JSON object/array values are parsed"""
+    defaults = {}
+    rows = db.execute(
+        select(ThemeConfig.config_key, ThemeConfig.config_value)
+        .where(ThemeConfig.config_key.not_like(f"{USER_THEME_PREFIX}%"))
+    ).all()
+    for config_key, config_value in rows:
+        value = config_value
+        if config_value and config_value[:1] in ("{", "["):
+            try:
+                value = json.loads(config_value)
+            except json.JSONDecodeError:
+                pass
+        defaults[config_key] = value
+    return defaults
+
+
+class DebouncedThemeWriter:
+    """Coalesces rapid saves of the same key into one write per window.
+
+    The first save of a key starts its window; later saves inside the window
+    only replace the pending value. When the window closes a background
+    thread upserts the latest value, so a slider drag costs one write per
+    window instead of one per event.
+
+    Each value is written with the time it was submitted and only over an
+    older row, so saves of one key land in submission order even across
+    workers. Keys whose value was not stored - the write failed, or a newer
+    save got there first - are passed to on_unsaved, so callers can drop
+    what they cached when the save was accepted.
+    """
+
+    def __init__(self, window_seconds: Union[float, Callable[[], float]]):
+        # A callable (`lambda: settings.X`) is read on first use
+        self._window_seconds = window_seconds
+        self.on_unsaved: Optional[Callable[[List[str]], None]] = None
+        self._pending: Dict[str, Tuple[str, float, datetime]] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    @cached_property
+    def window_seconds(self) -> float:
+        return setting_value(self._window_seconds)
+
+    def submit(self, config_key: str, config_value: str) -> None:
+        with self._cond:
+            existing = self._pending.get(config_key)
+            due_at = existing[1] if existing else time.monotonic() + self.window_seconds
+            self._pending[config_key] = (config_value, due_at, datetime.utcnow())
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="theme-writer", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def pending_value(self, config_key: str) -> Optional[str]:
+        """The not-yet-written value for a key, if a save is waiting out its window"""
+        with self._cond:
+            entry = self._pending.get(config_key)
+            return entry[0] if entry else None
+
+    def discard(self, config_key: str) -> None:
+        """Drop a pending write, e.g. when a newer synchronous write supersedes it"""
+        with self._cond:
+            self._pending.pop(config_key, None)
+
+    def flush(self, config_key: Optional[str] = None) -> None:
+        """Write pending saves now: one key, or everything (used on shutdown)"""
+        with self._cond:
+            if config_key is None:
+                batch = {key: (value, submitted_at) for key, (value, _, submitted_at) in self._pending.items()}
+                self._pending.clear()
+            elif config_key in self._pending:
+                value, _, submitted_at = self._pending.pop(config_key)
+                batch = {config_key: (value, submitted_at)}
+            else:
+                batch = {}
+        self._write(batch)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                now = time.monotonic()
+                next_due = min(due_at for _, due_at, _ in self._pending.values())
+                if next_due > now:
+                    self._cond.wait(next_due - now)
+                    continue
+                batch = {
+                    key: (value, submitted_at)
+                    for key, (value, due_at, submitted_at) in self._pending.items() if due_at <= now
+                }
+                for key in batch:
+                    del self._pending[key]
+            self._write(batch)
+
+    def _write(self, batch: Dict[str, Tuple[str, datetime]]) -> None:
+        if not batch:
+            return
+        db = SessionLocal()
+        try:
+            superseded = [
+                config_key for config_key, (config_value, submitted_at) in batch.items()
+                if upsert_theme_config(db, config_key, config_value, submitted_at) is None
+            ]
+            db.commit()
+            for config_key in batch:
+                theme_version_cache.invalidate(config_key)
+            unsaved = superseded
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"⚠️ Could not save {len(batch)} debounced theme(s): {e}")
+            unsaved = list(batch)
+        finally:
+            db.close()
+        if unsaved and self.on_unsaved is not None:
+            self.on_unsaved(unsaved)
+
+
+theme_writer = DebouncedThemeWriter(lambda: settings.THEME_SAVE_DEBOUNCE_SECONDS)
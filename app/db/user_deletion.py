@@ -0,0 +1,199 @@
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.orm import Session, aliased
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.models.resource import Resource
+from app.models.user import User, UserDeletionJob
+
+logger = logging.getLogger("app.db.user_deletion")
+
+UNFINISHED = ("pending", "running")
+
+# One job at a time per worker keeps memory and DB pressure bounded
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="user-delete")
+
+
+_boot_id = (0, "")
+
+
+def _worker_id() -> str:
+    """host:pid:nonce of this process.
+
+    The nonce is new in every process - checked per call, since workers
+    forked from a preloaded master share this module - so a restarted worker
+    that gets the same pid (pid 1 in a container) never mistakes the jobs
+    its predecessor left running for its own.
+    """
+    global _boot_id
+    pid = os.getpid()
+    if _boot_id[0] != pid:
+        _boot_id = (pid, uuid.uuid4().hex[:8])
+    return f"{socket.gethostname()[:60]}:{pid}:{_boot_id[1]}"
+
+
+def _stale_before() -> datetime:
+    return datetime.utcnow() - timedelta(seconds=settings.USER_DELETE_STALE_SECONDS)
+
+
+def owns_many_resources(db: Session, user_id) -> bool:
+    """True when the user owns more resources than a request should delete inline.
+
+    Probes a single row past the threshold on the user_id index instead of
+    counting everything.
+    """
+    probe = (
+        select(Resource.id)
+        .where(Resource.user_id == str(user_id))
+        .order_by(Resource.id)
+        .offset(settings.USER_DELETE_SYNC_MAX_RESOURCES)
+        .limit(1)
+    )
+    return db.scalar(probe) is not None
+
+
+def submit_user_deletion(job_id: str) -> None:
+    _executor.submit(run_user_deletion, job_id)
+
+
+def retry_user_deletion(db: Session, job_id: str) -> bool:
+    """Put a failed job back to pending and submit it; False if it had not failed.
+
+    The job resumes where it stopped, like after a restart. Commits.
+    """
+    retried = db.execute(
+        update(UserDeletionJob)
+        .where(UserDeletionJob.id == job_id, UserDeletionJob.status == "failed")
+        .values(status="pending", error=None, worker=None, heartbeat_at=None)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    if retried != 1:
+        return False
+    submit_user_deletion(job_id)
+    return True
+
+
+def _claim(db: Session, job_id: str) -> bool:
+    """Take the job if it is pending or its worker stopped sending heartbeats"""
+    claimed = db.execute(
+        update(UserDeletionJob)
+        .where(UserDeletionJob.id == job_id)
+        .where(or_(
+            UserDeletionJob.status == "pending",
+            and_(
+                UserDeletionJob.status == "running",
+                or_(UserDeletionJob.heartbeat_at.is_(None), UserDeletionJob.heartbeat_at < _stale_before())
+            )
+        ))
+        .values(status="running", worker=_worker_id(), heartbeat_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return claimed == 1
+
+
+def run_user_deletion(job_id: str) -> None:
+    """Delete a user's resources in bounded chunks, then the user row.
+
+    Each chunk is its own short transaction, so memory stays flat and locks
+    are released between chunks no matter how many resources the user owns.
+    Chunks are idempotent, so a job interrupted by a restart is resumed
+    where it stopped (see resume_user_deletions).
+    """
+    db = SessionLocal()
+    try:
+        if not _claim(db, job_id):
+            return  # finished, or another live worker runs it
+        job = db.get(UserDeletionJob, job_id)
+        # On resume, the resources deleted before the interruption count too
+        job.total_resources = job.deleted_resources + db.scalar(
+            select(func.count()).select_from(Resource).where(Resource.user_id == job.user_id)
+        )
+        db.commit()
+
+        # Alias so the LIMIT subquery is not correlated with the outer DELETE
+        chunk_source = aliased(Resource)
+        chunk_size = max(settings.USER_DELETE_CHUNK_SIZE, 1)
+        while True:
+            chunk = (
+                select(chunk_source.id)
+                .where(chunk_source.user_id == job.user_id)
+                .limit(chunk_size)
+            )
+            deleted = db.execute(
+                delete(Resource)
+                .where(Resource.id.in_(chunk))
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            job.deleted_resources += deleted
+            job.heartbeat_at = datetime.utcnow()
+            db.commit()
+            if deleted < chunk_size:
+                break
+
+        db.execute(
+            delete(User).where(User.id == job.user_id).execution_options(synchronize_session=False)
+        )
+        job.status = "completed"
+        job.heartbeat_at = datetime.utcnow()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        job = db.get(UserDeletionJob, job_id)
+        if job is not None:
+            job.status = "failed"
+            job.error = str(e)[:500]
+            db.commit()
+        logger.warning(f"⚠️ User deletion job {job_id} failed: {e}")
+    finally:
+        db.close()
+
+
+def resume_user_deletions() -> None:
+    """Re-submit deletion jobs left unfinished by a deploy or crash.
+
+    Runs in a daemon thread so startup is not delayed. Pending jobs and
+    running jobs with a stale heartbeat are submitted right away (the claim
+    makes sure only one worker runs each); while other workers' jobs still
+    look alive, the thread checks again every USER_DELETE_STALE_SECONDS.
+    """
+    threading.Thread(target=_resume_unfinished, name="user-delete-resume", daemon=True).start()
+
+
+def _resume_unfinished() -> None:
+    submitted = set()
+    while True:
+        db = SessionLocal()
+        try:
+            jobs = db.execute(
+                select(UserDeletionJob.id, UserDeletionJob.status, UserDeletionJob.heartbeat_at, UserDeletionJob.worker)
+                .where(UserDeletionJob.status.in_(UNFINISHED))
+            ).all()
+        except Exception as e:
+            logger.warning(f"⚠️ Could not look for unfinished user deletion jobs: {e}")
+            return
+        finally:
+            db.close()
+
+        stale_before = _stale_before()
+        watching = False
+        for job in jobs:
+            if job.id in submitted or job.worker == _worker_id():
+                continue  # submitted or claimed by this very process
+            if job.status == "pending" or job.heartbeat_at is None or job.heartbeat_at < stale_before:
+                logger.info(f"ℹ️ Resuming user deletion job {job.id} (was {job.status})")
+                submit_user_deletion(job.id)
+                submitted.add(job.id)
+            else:
+                watching = True  # may belong to a live worker, or to one that just died
+        if not watching:
+            return
+        time.sleep(settings.USER_DELETE_STALE_SECONDS)
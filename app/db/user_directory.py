@@ -0,0 +1,168 @@
+"""Keyset-paginated user listing shared by the admin and users routers.
+
+Pages are ordered by email (unique and indexed), so the cursor is simply the
+last email of the previous page and every page is an index range scan no
+matter how deep the client has paged - on ix_users_email, or on
+ix_users_role_email when filtering by role. Only the columns needed for the
+response are selected and rows are turned straight into JSON-ready dicts.
+"""
+import base64
+import binascii
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import func, literal, select, text
+from sqlalchemy.orm import Session
+from app.models.user import User, UserRole
+
+# Filtered totals are counted up to this many rows, then reported as approximate
+COUNT_CAP = 10000
+
+# Page size when the client sends no limit. The listing endpoints returned
+# every user before paging was added; clients that never follow the cursor
+# now only see the first page
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+LISTING_DESCRIPTION = (
+    f"Users in email order, {DEFAULT_LIMIT} per page unless `limit` is given "
+    f"(max {MAX_LIMIT}). The body is one page only: while the response has an "
+    "X-Next-Cursor header, pass it back as `cursor` to get the next page. "
+    "The first page also carries X-Total-Count and X-Total-Count-Exact."
+)
+
+_COLUMNS = (
+    User.id, User.email, User.display_name, User.tagline, User.bio,
+    User.avatar_url, User.role, User.is_protected, User.created_at
+)
+
+
+@dataclass
+class UserPage:
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str]
+    total: Optional[int]
+    total_is_exact: bool
+
+
+def encode_cursor(email: str) -> str:
+    return base64.urlsafe_b64encode(email.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        return base64.urlsafe_b64decode(cursor.encode()).decode()
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+def _email_prefix_filters(db: Session, prefix: str) -> list:
+    filters = [User.email.startswith(prefix, autoescape=True)]
+    if db.get_bind().dialect.name == "sqlite":
+        # SQLite's LIKE is case-insensitive and cannot use the email index;
+        # an explicit [prefix, successor) range can
+        successor = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        filters += [User.email >= prefix, User.email < successor]
+    return filters
+
+
+def _estimate_total(db: Session, filters: list):
+    """Cheap row count: table metadata when unfiltered, a capped count otherwise"""
+    if not filters:
+        dialect = db.get_bind().dialect.name
+        try:
+            if dialect == "mssql":
+                estimate = db.scalar(text(
+                    "SELECT SUM(row_count) FROM sys.dm_db_partition_stats "
+                    "WHERE object_id = OBJECT_ID('users') AND index_id IN (0, 1)"
+                ))
+                if estimate is not None:
+                    return int(estimate), False
+            elif dialect == "sqlite":
+                # Highest rowid: O(1) on the table b-tree, overestimates after deletes
+                return int(db.scalar(text("SELECT COALESCE(MAX(rowid), 0) FROM users"))), False
+        except Exception:
+            db.rollback()  # e.g. no VIEW DATABASE STATE permission; fall back to counting
+    capped = select(literal(1)).select_from(User).where(*filters).limit(COUNT_CAP).subquery()
+    count = db.scalar(select(func.count()).select_from(capped))
+    return count, count < COUNT_CAP
+
+
+def fetch_user_page(
+    db: Session,
+    limit: int,
+    cursor: Optional[str] = None,
+    role: Optional[UserRole] = None,
+    email_prefix: Optional[str] = None
+) -> UserPage:
+    """One page of users. The total is only computed for the first page."""
+    filters = []
+    if role is not None:
+        filters.append(User.role == role)
+    if email_prefix:
+        filters += _email_prefix_filters(db, email_prefix)
+
+    stmt = select(*_COLUMNS).where(*filters).order_by(User.email).limit(limit + 1)
+    if cursor:
+        stmt = stmt.where(User.email > decode_cursor(cursor))
+    rows = db.execute(stmt).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    items = [
+        {
+            "id": str(row.id),
+            "email": row.email,
+            "display_name": row.display_name,
+            "tagline": row.tagline,
+            "bio": row.bio,
+            "avatar_url": row.avatar_url,
+            "role": row.role.value if isinstance(row.role, UserRole) else row.role,
+            "is_protected": bool(row.is_protected),
+            "created_at": row.created_at.isoformat() if row.created_at else None
+        }
+        for row in rows
+    ]
+
+    total, exact = (None, False)
+    if not cursor:
+        total, exact = _estimate_total(db, filters)
+
+    return UserPage(
+        items=items,
+        next_cursor=encode_cursor(rows[-1].email) if has_more else None,
+        total=total,
+        total_is_exact=exact
+    )
+
+
+def user_directory_response(
+    db: Session,
+    limit: int,
+    cursor: Optional[str],
+    role: Optional[UserRole],
+    email_prefix: Optional[str]
+) -> JSONResponse:
+    """Keyset-paginated user list shared by GET /api/users/ and GET /api/admin/users.
+    
+    The body stays a plain list of users; paging metadata travels in headers:
+    X-Next-Cursor (absent on the last page) and, on the first page,
+    X-Total-Count with X-Total-Count-Exact telling whether it is approximate.
+    Rows are serialised directly instead of through one UserResponse each.
+    """
+    try:
+        page = fetch_user_page(db, limit, cursor, role, email_prefix)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    headers = {}
+    if page.next_cursor:
+        headers["X-Next-Cursor"] = page.next_cursor
+    if page.total is not None:
+        headers["X-Total-Count"] = str(page.total)
+        headers["X-Total-Count-Exact"] = "true" if page.total_is_exact else "false"
+    return JSONResponse(content=page.items, headers=headers)
@@ -0,0 +1,161 @@
+"""Optional single-writer queue for SQLite (SQLITE_WRITE_QUEUE_ENABLED).
+
+SQLite allows one writer at a time; concurrent request threads otherwise
+queue on the database lock and pay one commit (WAL append + sync) each.
+With the queue enabled, write units are handed to one writer thread that
+runs whatever has queued up in a single transaction and commits once
+(group commit). Reads keep using their own sessions and, under WAL, run
+in parallel with the writer.
+
+A write unit is a function taking a Session and returning a value. It
+must not commit; run_write() takes care of that on both paths.
+"""
+import threading
+import time
+from concurrent.futures import Future
+from functools import cached_property
+from typing import Any, Callable, List, Optional, Tuple, Union
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+from app.core.config import setting_value, settings
+from app.db.database import configure_sqlite_connection, get_engine
+
+WriteUnit = Callable[[Session], Any]
+
+
+class SQLiteWriteQueue:
+    def __init__(
+        self,
+        batch_max: Union[int, Callable[[], int]],
+        batch_wait_seconds: Union[float, Callable[[], float]]
+    ):
+        # Either may be a callable (`lambda: settings.X`), read on first use
+        self._batch_max = batch_max
+        self._batch_wait_seconds = batch_wait_seconds
+        self._pending: List[Tuple[WriteUnit, Future]] = []
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._sessionmaker: Optional[sessionmaker] = None
+        self.batches = 0
+        self.units = 0
+
+    @cached_property
+    def batch_max(self) -> int:
+        return max(setting_value(self._batch_max), 1)
+
+    @cached_property
+    def batch_wait_seconds(self) -> float:
+        return setting_value(self._batch_wait_seconds)
+
+    def _session(self) -> Session:
+        # The writer has its own one-connection engine: request threads
+        # waiting on the queue may hold every connection of the main pool
+        if self._sessionmaker is None:
+            writer_engine = create_engine(
+                get_engine().url,
+                pool_size=1,
+                max_overflow=0,
+                connect_args={"check_same_thread": False}
+            )
+            event.listen(writer_engine, "connect", configure_sqlite_connection)
+            self._sessionmaker = sessionmaker(bind=writer_engine, autoflush=False, expire_on_commit=False)
+        return self._sessionmaker()
+
+    def submit(self, unit: WriteUnit) -> Future:
+        future = Future()
+        with self._cond:
+            self._pending.append((unit, future))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return future
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                # Give concurrent writers a moment to join this batch
+                deadline = time.monotonic() + self.batch_wait_seconds
+                while len(self._pending) < self.batch_max:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._pending[:self.batch_max]
+                del self._pending[:self.batch_max]
+            self._commit_batch(batch)
+
+    def _commit_batch(self, batch: List[Tuple[WriteUnit, Future]]) -> None:
+        results = []
+        db = self._session()
+        try:
+            for unit, _ in batch:
+                results.append(unit(db))
+            db.commit()
+        except Exception:
+            db.rollback()
+            # One unit failed (e.g. a 404 or constraint error): nothing was
+            # committed, so run each unit in its own transaction to isolate it
+            for unit, future in batch:
+                self._commit_one(unit, future)
+            return
+        finally:
+            db.close()
+        self.batches += 1
+        self.units += len(batch)
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def _commit_one(self, unit: WriteUnit, future: Future) -> None:
+        db = self._session()
+        try:
+            result = unit(db)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            future.set_exception(e)
+        else:
+            self.batches += 1
+            self.units += 1
+            future.set_result(result)
+        finally:
+            db.close()
+
+    def stats(self) -> dict:
+        with self._cond:
+            queued = len(self._pending)
+        return {
+            "queued": queued,
+            "batches": self.batches,
+            "units": self.units,
+            "avg_batch_size": self.units / self.batches if self.batches else 0.0,
+        }
+
+
+sqlite_write_queue = SQLiteWriteQueue(
+    lambda: settings.SQLITE_WRITE_BATCH_MAX,
+    lambda: settings.SQLITE_WRITE_BATCH_WAIT_MS / 1000
+)
+
+
+def write_queue_active() -> bool:
+    return settings.SQLITE_WRITE_QUEUE_ENABLED and get_engine().dialect.name == "sqlite"
+
+
+def run_write(db: Session, unit: WriteUnit) -> Any:
+    """Run a write unit and commit it, via the writer queue when enabled.
+
+    Without the queue the unit runs on the request's own session. With it,
+    the request thread waits while the writer commits the unit together
+    with any other queued writes; exceptions raised by the unit (including
+    HTTPException) are re-raised here. The unit runs on the writer's
+    session, so it must not touch objects loaded by the request's session;
+    capture plain values (ids, request data) instead.
+    """
+    if not write_queue_active():
+        result = unit(db)
+        db.commit()
+        return result
+    return sqlite_write_queue.submit(unit).result()
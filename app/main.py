@@ -1,52 +1,182 @@
-from fastapi import FastAPI
+import time
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from app.core.config import settings
-from app.api import auth, users, theme, resources, admin
-from app.db.database import Base, engine, init_db
+from app.core.config import log_configuration, settings
+from app.core.log import configure_logging, startup_logger
+from app.api import auth, users, theme, resources, admin, health
+from app.api.deps import get_admin_from_authorization
+from app.core.admission import Shed, admission_controller
+from app.core.metrics import request_metrics
+from app.core.profiling import (
+    finish_request_profile, install_request_profiling, start_request_profile, stop_request_profile
+)
+from app.core.rate_limit import retry_after_header
+from app.db.database import get_engine
+from app.db.instrumentation import begin_request_stats, log_request_stats
+from app.db.replicas import SAFE_METHODS, note_client_write, replica_urls
 
+# Which middleware and routers are mounted depends on settings, so importing
+# this module loads .env; the modules it is assembled from do not
 app = FastAPI(
     title="Resource Management API",
     description="Python FastAPI backend with Azure SQL Database",
     version="1.0.0"
 )
 
-# CORS Configuration - Use settings for consistent configuration management
+if settings.DB_INSTRUMENTATION_ENABLED:
+    @app.middleware("http")
+    async def report_db_time(request: Request, call_next):
+        stats = begin_request_stats(request.scope)
+        response = await call_next(request)
+        response.headers.append("Server-Timing", stats.server_timing())
+        log_request_stats(response.status_code, stats, settings.DB_REPEATED_STATEMENT_WARN)
+        return response
+
+if replica_urls():
+    @app.middleware("http")
+    async def track_client_writes(request: Request, call_next):
+        # Marks the client (a cookie, so any worker honours it) before the
+        # response reaches it, so its next read goes to the primary
+        # (read-your-writes)
+        response = await call_next(request)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            note_client_write(request, response)
+        return response
+
+if settings.PROFILING_ENABLED:
+    @app.middleware("http")
+    async def profile_request(request: Request, call_next):
+        if request.headers.get("x-profile") != "1":
+            return await call_next(request)
+        try:
+            await run_in_threadpool(get_admin_from_authorization, request.headers.get("authorization"))
+        except HTTPException:
+            # Not an admin: the header is ignored and the request served as usual
+            return await call_next(request)
+        profile, token = start_request_profile()
+        started = time.perf_counter()
+        try:
+            response = await call_next(request)
+        finally:
+            stop_request_profile(token)
+        route = request.scope.get("route")
+        report = await run_in_threadpool(
+            finish_request_profile, profile, request.method,
+            route.path if route is not None else request.url.path,
+            time.perf_counter() - started
+        )
+        response.headers["X-Profile-Report"] = report
+        return response
+
+if settings.ADMISSION_ENABLED:
+    @app.middleware("http")
+    async def admission_control(request: Request, call_next):
+        gate = admission_controller.gate(request.method, request.scope["path"])
+        if gate is None:
+            return await call_next(request)
+        try:
+            await gate.acquire()
+        except Shed as e:
+            return JSONResponse(
+                status_code=503,
+                content={"detail": "Server is busy, please retry shortly"},
+                headers=retry_after_header(e.retry_after)
+            )
+        started = time.perf_counter()
+        try:
+            return await call_next(request)
+        finally:
+            gate.release(time.perf_counter() - started)
+
+if settings.METRICS_ENABLED:
+    # Outermost but for CORS, so it times everything below
+    @app.middleware("http")
+    async def record_request_metrics(request: Request, call_next):
+        request_metrics.started()
+        started = time.perf_counter()
+        status_code = 500
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+            return response
+        finally:
+            # Route templates, not raw paths, keep the label set bounded
+            route = request.scope.get("route")
+            request_metrics.finished(
+                request.method,
+                route.path if route is not None else "unmatched",
+                status_code,
+                time.perf_counter() - started
+            )
+
+# CORS Configuration - Use settings for consistent configuration management.
+# Added last, so it is the outermost middleware: responses produced by the
+# middleware above (503 from admission control, Server-Timing) get CORS
+# headers too, and preflights never reach admission control or the metrics
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_allowed_origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        "X-Next-Cursor", "X-Total-Count", "X-Total-Count-Exact", "Server-Timing", "X-Profile-Report", "Retry-After"
+    ],
 )
 
 
-
 # Include routers
+if settings.ASYNC_DB_ENABLED:
+    # Registered first so they take over the same paths; the sync routes
+    # below stay the documented contract and handle everything else
+    app.include_router(users.async_router, prefix="/api/users", include_in_schema=False)
+    app.include_router(theme.async_router, prefix="/api/theme", include_in_schema=False)
+    app.include_router(resources.async_router, prefix="/api/resources", include_in_schema=False)
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/api/users", tags=["Users"])
 app.include_router(theme.router, prefix="/api/theme", tags=["Theme"])
 app.include_router(resources.router, prefix="/api/resources", tags=["Resources"])
 app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
+app.include_router(health.router, tags=["Health"])
+
+if settings.PROFILING_ENABLED:
+    install_request_profiling(app)
 
 
 @app.on_event("startup")
 def startup_event():
+    configure_logging(settings.LOG_LEVEL)
+    log_configuration()
     try:
-        # Create tables
-        Base.metadata.create_all(bind=engine)
-        init_db()  # Initialize/fix Azure SQL schema
+        # Create tables, apply migrations and create the super user - once per
+        # deployment; other workers wait for the first one to finish
+        from app.db.bootstrap import run_bootstrap
+        engine = get_engine()
+        run_bootstrap(engine)
         
-        # Create super user
-        from app.db.database import SessionLocal
-        from app.db.super_user_seed import create_super_user
-        db = SessionLocal()
-        try:
-            create_super_user(db)
-        finally:
-            db.close()
+        # Deletion jobs interrupted by a deploy or crash pick up where they stopped
+        from app.db.user_deletion import resume_user_deletions
+        resume_user_deletions()
+        
+        if settings.DB_POOL_PREWARM:
+            from app.db.pool import prewarm_pool
+            opened = prewarm_pool(engine, min(settings.DB_POOL_PREWARM, settings.DB_POOL_SIZE))
+            startup_logger.info(f"✅ Pre-warmed {opened} database connection(s)")
     except Exception as e:
-        print(f"⚠️ Database initialization warning: {str(e)[:100]}")
-        print("ℹ️ API will still start but database operations may fail")
+        startup_logger.warning(f"⚠️ Database initialization warning: {str(e)[:100]}")
+        startup_logger.warning("ℹ️ API will still start but database operations may fail")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Persist theme saves still waiting out their debounce window
+    from starlette.concurrency import run_in_threadpool
+    from app.db.async_database import dispose_async_engine
+    from app.db.theme_store import theme_writer
+    await run_in_threadpool(theme_writer.flush)
+    await dispose_async_engine()
 
 
 @app.get("/")
@@ -1,8 +1,9 @@
-from sqlalchemy import Column, String, DateTime, Boolean, Enum as SQLEnum, Integer
+from sqlalchemy import Column, String, DateTime, Boolean, Enum as SQLEnum, Integer, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 import enum
+import uuid
 
 
 class UserRole(str, enum.Enum):
@@ -12,6 +13,10 @@ class UserRole(str, enum.Enum):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Serves the last-admin count and role-filtered directory pages in email order
+        Index("ix_users_role_email", "role", "email"),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     email = Column(String(255), unique=True, nullable=False, index=True)
@@ -25,7 +30,9 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
-    resources = relationship("Resource", back_populates="user", cascade="all, delete-orphan")
+    # passive_deletes: the database removes resources (ON DELETE CASCADE / trigger),
+    # so deleting a user never loads them into the session
+    resources = relationship("Resource", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
 
 
 class ThemeConfig(Base):
@@ -36,3 +43,34 @@ class ThemeConfig(Base):
     config_value = Column(String(2000), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class ThemeVersion(Base):
+    """Change counter per theme scope: "global" or a user's user_theme_<id> key.
+    
+    Effective themes are cached per (global version, user version), so one
+    bump of the global row invalidates every user's compiled theme.
+    """
+    __tablename__ = "theme_versions"
+    
+    scope = Column(String(100), primary_key=True)
+    version = Column(Integer, nullable=False, default=1)
+
+
+class UserDeletionJob(Base):
+    """Progress of a chunked background deletion of a user with many resources"""
+    __tablename__ = "user_deletion_jobs"
+    
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(String(36), nullable=False, index=True)
+    user_email = Column(String(255), nullable=False)
+    status = Column(String(20), nullable=False, default="pending")  # pending | running | completed | failed
+    total_resources = Column(Integer, nullable=False, default=0)
+    deleted_resources = Column(Integer, nullable=False, default=0)
+    error = Column(String(500), nullable=True)
+    # host:pid of the worker running the job, refreshed (UTC) after every chunk;
+    # a running job whose heartbeat went stale has lost its worker and is taken over
+    worker = Column(String(100), nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field, field_serializer
-from typing import Optional, Any
+from typing import Optional, Any, List
 from datetime import datetime
 from uuid import UUID
 from app.models.user import UserRole
@@ -49,6 +49,69 @@ class UserResponse(UserBase):
         from_attributes = True
 
 
+class BulkUserCreate(UserCreate):
+    role: UserRole = UserRole.user
+
+
+class BulkUserCreateRequest(BaseModel):
+    users: List[BulkUserCreate] = Field(..., min_length=1, max_length=1000)
+
+
+class BulkUserResult(BaseModel):
+    email: str
+    status: str  # created | already_exists | duplicate_in_request
+    detail: Optional[str] = None
+    user: Optional[UserResponse] = None
+
+
+class BulkUserCreateResponse(BaseModel):
+    created: int
+    skipped: int
+    results: List[BulkUserResult]
+
+
+class BulkRoleChange(BaseModel):
+    user_id: str
+    role: UserRole
+
+
+class BulkRoleUpdateRequest(BaseModel):
+    changes: List[BulkRoleChange] = Field(..., min_length=1, max_length=1000)
+
+
+class BulkUserDeleteRequest(BaseModel):
+    user_ids: List[str] = Field(..., min_length=1, max_length=1000)
+
+
+class BulkUserOutcome(BaseModel):
+    user_id: str
+    status: str  # updated | unchanged | deleted | not_found | protected | self | last_admin | conflict | requires_background_delete
+    detail: Optional[str] = None
+
+
+class BulkUserOutcomeResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkUserOutcome]
+
+
+class UserDeletionJobResponse(BaseModel):
+    id: str
+    user_id: str
+    user_email: str
+    status: str
+    total_resources: int
+    deleted_resources: int
+    error: Optional[str] = None
+    worker: Optional[str] = None
+    heartbeat_at: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
 class Token(BaseModel):
     access_token: str
     token_type: str
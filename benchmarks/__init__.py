@@ -0,0 +1,37 @@
+"""End-to-end benchmarks against a generated SQLite dataset.
+
+    python -m benchmarks seed --users 10000 --owners 5 --resources-per-owner 200
+    python -m benchmarks run --mode both --concurrency 1,16,64 --requests 2000
+    python -m benchmarks micro --filter token
+    python -m benchmarks compare data/bench/results/old.json data/bench/results/new.json
+
+seed builds data/bench/bench.db with bulk inserts: N users, owner admins
+with M resources each, and a theme blob per user. All generated users share
+one password, so seeding costs a single bcrypt hash. A manifest
+(bench.json) next to the database records the parameters.
+
+run copies the dataset to a temporary directory per mode, so every run starts
+from the same data even though create/update scenarios write to it. It
+drives the real app in-process (httpx ASGITransport, no sockets) and/or over
+a socket (a uvicorn subprocess), and reports req/s and p50/p95/p99 per
+scenario and concurrency level. The results go to data/bench/results/*.json,
+with the commit, machine and dataset they were measured on.
+
+micro times single hot-path calls without the server: bcrypt, JWT
+encode/decode, building and serialising ResourceResponse/UserResponse lists
+of 100 to 100k rows, and theme JSON loads/dumps (see benchmarks/micro.py).
+It tells where a request's CPU goes; run measures what users see.
+
+compare prints the change per scenario between two result files and exits
+with 1 when throughput or p95 latency (micro: median time per call)
+regressed by more than --threshold percent.
+
+Login throttling is switched off for the app under test, and so is admission
+control unless ADMISSION_ENABLED is set; every other setting comes from the
+environment/.env as usual. run --async-db serves the hot reads from the
+async routes (ASYNC_DB_ENABLED); compare a run with and without it, e.g.
+with --scenarios hot-reads --concurrency 64,500 --mode socket. The database
+must be SQLite: a run refuses to start when .env configures Azure SQL.
+
+run needs httpx (pip install httpx); seed and micro need only the app.
+"""
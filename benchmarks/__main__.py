@@ -0,0 +1,177 @@
+import argparse
+import asyncio
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import benchmarks  # noqa: E402
+from benchmarks.dataset import configure_environment, load_manifest, require_sqlite  # noqa: E402
+from benchmarks.micro import DEFAULT_SIZES  # noqa: E402
+
+DEFAULT_DATABASE = ROOT / "data" / "bench" / "bench.db"
+RESULTS_DIR = ROOT / "data" / "bench" / "results"
+
+
+def seed_command(args) -> int:
+    from benchmarks.dataset import build_dataset, manifest_path
+
+    database = Path(args.database).resolve()
+    if min(args.users, args.owners, args.resources_per_owner) < 1:
+        print("❌ --users, --owners and --resources-per-owner must be at least 1")
+        return 2
+    if database.exists() and not args.force:
+        print(f"❌ {database} exists; pass --force to replace it")
+        return 2
+    database.parent.mkdir(parents=True, exist_ok=True)
+    for path in (database, Path(f"{database}-wal"), Path(f"{database}-shm"), manifest_path(database)):
+        path.unlink(missing_ok=True)
+
+    configure_environment(database)
+    require_sqlite(database)
+    manifest = build_dataset(database, args.users, args.owners, args.resources_per_owner, args.theme_bytes, args.seed)
+    print(
+        f"✅ {manifest['users']} users, {manifest['owners']} owners x {manifest['resources_per_owner']} resources, "
+        f"{manifest['theme_bytes']}-byte themes -> {database} ({manifest['size_mb']} MB, {manifest['seconds']}s)"
+    )
+    return 0
+
+
+def run_command(args) -> int:
+    from benchmarks.report import print_results, run_metadata, write_results
+    from benchmarks.scenarios import SCENARIOS
+
+    database = Path(args.database).resolve()
+    manifest = load_manifest(database)
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        print(f"❌ Unknown scenario(s) {', '.join(unknown)}; choose from {', '.join(SCENARIOS)}")
+        return 2
+    scenarios = [SCENARIOS[name] for name in names]
+    concurrencies = [int(c) for c in args.concurrency.split(",")]
+    modes = ["in-process", "socket"] if args.mode == "both" else [args.mode]
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        # Each mode gets its own copy, so writes by one never change what the other reads
+        copies = {}
+        for mode in modes:
+            copies[mode] = Path(workdir) / mode / "app.db"
+            copies[mode].parent.mkdir()
+            shutil.copyfile(database, copies[mode])
+
+        configure_environment(copies[modes[0]], args.async_db)
+        require_sqlite(copies[modes[0]], args.async_db)
+        from benchmarks.runner import run_in_process, run_over_socket
+        from benchmarks.scenarios import build_context
+        ctx = build_context(manifest, args.seed)
+
+        print(f"{len(scenarios)} scenario(s) x concurrency {args.concurrency}, {args.requests} requests each")
+        if "in-process" in modes:
+            results += asyncio.run(run_in_process(scenarios, ctx, concurrencies, args.requests, args.warmup, args.seed))
+        if "socket" in modes:
+            results += run_over_socket(copies["socket"], scenarios, ctx, concurrencies, args.requests,
+                                       args.warmup, args.seed, args.port, args.workers)
+
+    options = {
+        key: getattr(args, key)
+        for key in ("mode", "scenarios", "concurrency", "requests", "warmup", "workers", "seed", "async_db")
+    }
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{time.strftime('%Y%m%dT%H%M%S')}_{args.mode}.json"
+    write_results(output, run_metadata(manifest, options), results)
+    print_results(results)
+    print(f"\n✅ Results written to {output}")
+    return 1 if any(r["errors"] for r in results) else 0
+
+
+def micro_command(args) -> int:
+    from benchmarks.micro import micro_cases, print_micro, time_case
+    from benchmarks.report import run_metadata, write_results
+
+    # Nothing here touches the database; the settings still come from .env
+    sizes = [int(size) for size in args.sizes.split(",")]
+    cases = [case for case in micro_cases(sizes) if args.filter in case.name]
+    if not cases:
+        print(f"❌ No case matches {args.filter!r}")
+        return 2
+    results = []
+    for case in cases:
+        result = time_case(case, args.repeats)
+        print(f"  {case.name:<29} {case.size or '':>7} {result['median_us']:>13.2f} us", flush=True)
+        results.append(result)
+
+    options = {key: getattr(args, key) for key in ("filter", "sizes", "repeats")}
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{time.strftime('%Y%m%dT%H%M%S')}_micro.json"
+    write_results(output, run_metadata({}, options), results, key="micro")
+    print_micro(results)
+    print(f"\n✅ Results written to {output}")
+    return 0
+
+
+def compare_command(args) -> int:
+    from benchmarks.report import compare
+
+    lines, regressions = compare(Path(args.base), Path(args.new), args.threshold)
+    print("\n".join(lines))
+    if regressions:
+        print(f"\n❌ {regressions} regression(s) beyond {args.threshold}%")
+        return 1
+    print(f"\n✅ No regressions beyond {args.threshold}%")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description=benchmarks.__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed = commands.add_parser("seed", help="generate the SQLite dataset")
+    seed.add_argument("--database", default=str(DEFAULT_DATABASE))
+    seed.add_argument("--users", type=int, default=10000)
+    seed.add_argument("--owners", type=int, default=5, help="admins who own resources")
+    seed.add_argument("--resources-per-owner", type=int, default=200)
+    seed.add_argument("--theme-bytes", type=int, default=1200, help="size of each user's theme JSON")
+    seed.add_argument("--seed", type=int, default=1)
+    seed.add_argument("--force", action="store_true", help="replace an existing dataset")
+    seed.set_defaults(handler=seed_command)
+
+    run = commands.add_parser("run", help="run the scenarios and write a result file")
+    run.add_argument("--database", default=str(DEFAULT_DATABASE))
+    run.add_argument("--mode", choices=["in-process", "socket", "both"], default="in-process")
+    run.add_argument("--scenarios", default="login,list,create,update,theme,theme-save", help="comma-separated")
+    run.add_argument("--concurrency", default="1,16,64", help="comma-separated levels")
+    run.add_argument("--requests", type=int, default=1000, help="requests per scenario and concurrency level")
+    run.add_argument("--warmup", type=int, default=50, help="unmeasured requests per scenario")
+    run.add_argument("--workers", type=int, default=1, help="uvicorn workers (socket mode)")
+    run.add_argument("--async-db", action="store_true", help="serve the hot reads from the async routes (ASYNC_DB_ENABLED)")
+    run.add_argument("--port", type=int, default=8766)
+    run.add_argument("--seed", type=int, default=1)
+    run.add_argument("--output", help=f"result file (default: {RESULTS_DIR.relative_to(ROOT)}/<time>_<mode>.json)")
+    run.set_defaults(handler=run_command)
+
+    micro = commands.add_parser("micro", help="micro-benchmark the security and serialisation hot paths")
+    micro.add_argument("--filter", default="", help="only cases whose name contains this")
+    micro.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="list lengths for the response cases")
+    micro.add_argument("--repeats", type=int, default=5)
+    micro.add_argument("--output", help=f"result file (default: {RESULTS_DIR.relative_to(ROOT)}/<time>_micro.json)")
+    micro.set_defaults(handler=micro_command)
+
+    diff = commands.add_parser("compare", help="compare two result files")
+    diff.add_argument("base")
+    diff.add_argument("new")
+    diff.add_argument("--threshold", type=float, default=10.0, help="percent change counted as a regression")
+    diff.set_defaults(handler=compare_command)
+
+    args = parser.parse_args()
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
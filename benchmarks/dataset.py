@@ -0,0 +1,171 @@
+"""Seeded SQLite dataset for the benchmarks, written with bulk inserts"""
+import json
+import os
+import random
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+BENCH_PASSWORD = "bench-password"
+USER_EMAIL = "bench-user{}@example.com"
+OWNER_EMAIL = "bench-owner{}@example.com"
+CHUNK_ROWS = 5000
+
+REGIONS = ("East US", "West Europe", "Southeast Asia", "Central India", "Brazil South")
+STATUSES = ("Running", "Stopped", "Pending")
+
+
+def bench_environment(database_path: Path) -> Dict[str, str]:
+    """Settings that point the app (this process or a server) at database_path"""
+    directory = database_path.parent
+    return {
+        "SQLITE_DATABASE_PATH": str(database_path),
+        "BOOTSTRAP_LOCK_PATH": str(directory / ".bootstrap.lock"),
+        "SLOW_QUERY_LOG_PATH": str(directory / "slow_queries.log"),
+        "AZURE_SQL_SERVER": "",
+        "AZURE_SQL_DATABASE": "",
+        # Thousands of logins from one address are the point of the login scenario
+        "LOGIN_RATE_LIMIT_ENABLED": "false",
+    }
+
+
+def configure_environment(database_path: Path, async_db: Optional[bool] = None) -> None:
+    """Must run before settings are first read (they are loaded once, lazily)"""
+    os.environ.update(bench_environment(database_path))
+    if async_db is not None:
+        os.environ["ASYNC_DB_ENABLED"] = "true" if async_db else "false"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    # Measure capacity, not shedding (503s count as errors); ADMISSION_ENABLED=true measures the limits
+    os.environ.setdefault("ADMISSION_ENABLED", "false")
+
+
+def require_sqlite(database_path: Path, async_db: Optional[bool] = None) -> None:
+    from app.core.config import settings
+    if settings.DATABASE_URL or Path(settings.SQLITE_DATABASE_PATH) != database_path:
+        raise SystemExit(
+            "❌ The benchmarks run on SQLite, but .env configures another database "
+            "(its values override the environment). Run them from a checkout without Azure SQL settings."
+        )
+    if async_db is not None and settings.ASYNC_DB_ENABLED != async_db:
+        raise SystemExit(f"❌ .env sets ASYNC_DB_ENABLED={settings.ASYNC_DB_ENABLED}, which overrides --async-db")
+
+
+def manifest_path(database_path: Path) -> Path:
+    return database_path.with_suffix(".json")
+
+
+def load_manifest(database_path: Path) -> Dict[str, Any]:
+    path = manifest_path(database_path)
+    if not path.exists():
+        raise SystemExit(f"❌ No dataset at {database_path}; create one with: python -m benchmarks seed")
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def theme_blob(rng: random.Random, size: int) -> str:
+    """A theme JSON document of roughly `size` characters"""
+    theme: Dict[str, Any] = {
+        "mode": rng.choice(["light", "dark", "system"]),
+        "accent": "#%06x" % rng.randrange(0x1000000),
+        "density": rng.choice(["compact", "comfortable"]),
+        "font_scale": round(rng.uniform(0.8, 1.4), 2),
+        "sidebar": {"collapsed": rng.random() < 0.3, "pinned": rng.sample(range(40), 5)},
+        "widgets": [],
+    }
+    while len(json.dumps(theme)) < size:
+        theme["widgets"].append({
+            "id": len(theme["widgets"]),
+            "kind": rng.choice(["chart", "table", "status", "links"]),
+            "span": rng.randint(1, 4),
+            "title": f"Widget {rng.randrange(10000)}",
+        })
+    while len(theme["widgets"]) > 0 and len(json.dumps(theme)) > size:
+        theme["widgets"].pop()
+    return json.dumps(theme)
+
+
+def _insert_chunks(conn, table, rows: List[dict]) -> None:
+    from sqlalchemy import insert
+    for start in range(0, len(rows), CHUNK_ROWS):
+        conn.execute(insert(table), rows[start:start + CHUNK_ROWS])
+
+
+def build_dataset(database_path: Path, users: int, owners: int, resources_per_owner: int,
+                  theme_bytes: int, seed: int) -> Dict[str, Any]:
+    """Create the schema through the normal bootstrap, then bulk-load the rows.
+
+    One transaction with synchronous=OFF: the file is thrown away if seeding
+    fails, so there is nothing to protect until it is complete.
+    """
+    from sqlalchemy import select
+    from app.core.security import get_password_hash
+    from app.db.bootstrap import run_bootstrap
+    from app.db.database import get_engine
+    from app.db.theme_store import MAX_THEME_VALUE_LENGTH, USER_THEME_PREFIX
+    from app.models.resource import Resource, ResourceIcon
+    from app.models.user import ThemeConfig, User, UserRole
+
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    engine = get_engine()
+    run_bootstrap(engine)
+    hashed = get_password_hash(BENCH_PASSWORD)
+    now = datetime.utcnow()
+    icons = [icon.value for icon in ResourceIcon]
+    theme_bytes = min(theme_bytes, MAX_THEME_VALUE_LENGTH)
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql("PRAGMA synchronous=OFF")
+        _insert_chunks(conn, User.__table__, [
+            {"email": OWNER_EMAIL.format(i), "hashed_password": hashed, "role": UserRole.admin,
+             "display_name": f"Owner {i}", "is_protected": False}
+            for i in range(owners)
+        ] + [
+            {"email": USER_EMAIL.format(i), "hashed_password": hashed, "role": UserRole.user,
+             "display_name": f"User {i}", "tagline": "benchmark user", "is_protected": False}
+            for i in range(users)
+        ])
+        ids = dict(conn.execute(
+            select(User.email, User.id).where(User.email.like("bench-%@example.com"))
+        ).all())
+
+        _insert_chunks(conn, Resource.__table__, [
+            {
+                "user_id": str(ids[OWNER_EMAIL.format(o)]),
+                "icon": icons[i % len(icons)],
+                "title": f"Resource {i}",
+                "resource_name": f"bench-{o}-{i}",
+                "description": f"Benchmark resource {i} of owner {o}",
+                "status": STATUSES[i % len(STATUSES)],
+                "region": REGIONS[i % len(REGIONS)],
+                "created_at": now,
+                "updated_at": now,
+            }
+            for o in range(owners) for i in range(resources_per_owner)
+        ])
+
+        # Global layer merged into every effective theme
+        _insert_chunks(conn, ThemeConfig.__table__, [
+            {"config_key": "bench_palette", "config_value": theme_blob(rng, min(400, theme_bytes))},
+            {"config_key": "bench_brand", "config_value": "Benchmark"},
+        ] + [
+            {"config_key": f"{USER_THEME_PREFIX}{user_id}", "config_value": theme_blob(rng, theme_bytes)}
+            for user_id in ids.values()
+        ])
+    with engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+    engine.dispose()
+
+    manifest = {
+        "database": str(database_path),
+        "users": users,
+        "owners": owners,
+        "resources_per_owner": resources_per_owner,
+        "theme_bytes": theme_bytes,
+        "seed": seed,
+        "password": BENCH_PASSWORD,
+        "seconds": round(time.perf_counter() - started, 2),
+        "size_mb": round(database_path.stat().st_size / 1024 / 1024, 1),
+    }
+    manifest_path(database_path).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
@@ -0,0 +1,248 @@
+"""Micro-benchmarks for the per-request CPU hot paths.
+
+Each case is timed like timeit: a loop count is calibrated so one repeat
+takes at least MIN_REPEAT_SECONDS, then the repeats are run and the best
+and median time per call are kept. The median is what compare checks;
+the best shows the noise floor.
+
+Cases:
+- verify_password / get_password_hash: bcrypt at the configured cost,
+- create_access_token / decode_access_token: python-jose HS256,
+- resource_response.build, user_response.build: the inline model
+  construction the routes do, from ORM instances, per list size,
+- resource_response.serialize, user_response.serialize: what FastAPI then
+  does with the returned list for response_model (validate, encode,
+  json.dumps), per list size,
+- theme_json.loads / theme_json.dumps: stored theme blobs per size.
+"""
+import json
+import random
+import statistics
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+
+MIN_REPEAT_SECONDS = 0.2
+DEFAULT_SIZES = (100, 1000, 10000, 100000)
+THEME_SIZES = (200, 1200, 2000)
+
+
+@dataclass
+class MicroCase:
+    name: str
+    size: Optional[int]
+    unit: Optional[str]  # what size counts: "rows" of a list, "bytes" of a blob
+    # Called once before timing; returns the function to time
+    setup: Callable[[], Callable[[], Any]]
+
+
+def _resources(rows: int) -> list:
+    from app.models.resource import Resource
+    from app.models.user import User  # noqa: F401  (relationship target, needed to configure the mappers)
+    now = datetime.utcnow()
+    return [
+        Resource(id=i, user_id="1", icon="server", title=f"Resource {i}", resource_name=f"bench-{i}",
+                 description=f"Benchmark resource {i}", status="Running", region="East US",
+                 created_at=now, updated_at=now)
+        for i in range(rows)
+    ]
+
+
+def _users(rows: int) -> list:
+    from app.models.resource import Resource  # noqa: F401  (relationship target, needed to configure the mappers)
+    from app.models.user import User, UserRole
+    now = datetime.utcnow()
+    return [
+        User(id=i, email=f"bench-user{i}@example.com", hashed_password="x", display_name=f"User {i}",
+             tagline="benchmark user", role=UserRole.user, is_protected=False, created_at=now)
+        for i in range(rows)
+    ]
+
+
+def _build_resources(resources: list) -> list:
+    from app.schemas.resource import ResourceResponse
+    # The same construction as GET /api/resources/
+    return [
+        ResourceResponse(
+            id=r.id,
+            user_id=str(r.user_id),
+            icon=r.icon,
+            title=r.title,
+            resource_name=r.resource_name,
+            description=r.description,
+            status=r.status,
+            region=r.region,
+            created_at=r.created_at,
+            updated_at=r.updated_at
+        )
+        for r in resources
+    ]
+
+
+def _build_users(users: list) -> list:
+    from app.schemas.user import UserResponse
+    # The same construction as GET /api/users/me and the admin routes
+    return [
+        UserResponse(
+            id=str(u.id),
+            email=u.email,
+            display_name=u.display_name,
+            tagline=u.tagline,
+            bio=u.bio,
+            avatar_url=u.avatar_url,
+            role=u.role,
+            created_at=u.created_at
+        )
+        for u in users
+    ]
+
+
+def _serializer(model) -> Callable[[list], bytes]:
+    """FastAPI's response_model path for a List[model] return value.
+
+    Runs serialize_response with is_coroutine=True, so validation is not
+    sent to the threadpool (the end-to-end suite measures that hop) and the
+    coroutine completes without awaiting: it is stepped once, no event loop.
+    """
+    from typing import List as ListType
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+
+    field = create_response_field(name="response", type_=ListType[model])
+
+    def serialize(content: list) -> bytes:
+        try:
+            serialize_response(field=field, response_content=content, is_coroutine=True).send(None)
+        except StopIteration as done:
+            return JSONResponse(done.value).body
+        raise RuntimeError("serialize_response awaited something")
+    return serialize
+
+
+def _verify_password():
+    from app.core.security import get_password_hash, verify_password
+    from benchmarks.dataset import BENCH_PASSWORD
+    hashed = get_password_hash(BENCH_PASSWORD)
+    return lambda: verify_password(BENCH_PASSWORD, hashed)
+
+
+def _get_password_hash():
+    from app.core.security import get_password_hash
+    from benchmarks.dataset import BENCH_PASSWORD
+    return lambda: get_password_hash(BENCH_PASSWORD)
+
+
+def _create_access_token():
+    from app.core.security import create_access_token
+    return lambda: create_access_token(data={"sub": "bench-user1@example.com"})
+
+
+def _decode_access_token():
+    from app.core.security import create_access_token, decode_access_token
+    token = create_access_token(data={"sub": "bench-user1@example.com"})
+    return lambda: decode_access_token(token)
+
+
+def _resource_build(rows: int):
+    resources = _resources(rows)
+    return lambda: _build_resources(resources)
+
+
+def _resource_serialize(rows: int):
+    from app.schemas.resource import ResourceResponse
+    content, serialize = _build_resources(_resources(rows)), _serializer(ResourceResponse)
+    return lambda: serialize(content)
+
+
+def _user_build(rows: int):
+    users = _users(rows)
+    return lambda: _build_users(users)
+
+
+def _user_serialize(rows: int):
+    from app.schemas.user import UserResponse
+    content, serialize = _build_users(_users(rows)), _serializer(UserResponse)
+    return lambda: serialize(content)
+
+
+def _theme_blob(size: int) -> str:
+    from benchmarks.dataset import theme_blob
+    return theme_blob(random.Random(size), size)
+
+
+def _theme_loads(size: int):
+    blob = _theme_blob(size)
+    return lambda: json.loads(blob)
+
+
+def _theme_dumps(size: int):
+    parsed = json.loads(_theme_blob(size))
+    return lambda: json.dumps(parsed)
+
+
+def micro_cases(sizes: List[int]) -> List[MicroCase]:
+    cases = [
+        MicroCase("verify_password", None, None, _verify_password),
+        MicroCase("get_password_hash", None, None, _get_password_hash),
+        MicroCase("create_access_token", None, None, _create_access_token),
+        MicroCase("decode_access_token", None, None, _decode_access_token),
+    ]
+    for rows in sizes:
+        cases += [
+            MicroCase("resource_response.build", rows, "rows", partial(_resource_build, rows)),
+            MicroCase("resource_response.serialize", rows, "rows", partial(_resource_serialize, rows)),
+            MicroCase("user_response.build", rows, "rows", partial(_user_build, rows)),
+            MicroCase("user_response.serialize", rows, "rows", partial(_user_serialize, rows)),
+        ]
+    for size in THEME_SIZES:
+        cases += [
+            MicroCase("theme_json.loads", size, "bytes", partial(_theme_loads, size)),
+            MicroCase("theme_json.dumps", size, "bytes", partial(_theme_dumps, size)),
+        ]
+    return cases
+
+
+def time_case(case: MicroCase, repeats: int) -> Dict[str, Any]:
+    func = case.setup()
+    func()  # warm-up: imports, caches, first-call costs
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= MIN_REPEAT_SECONDS:
+            break
+        loops *= 10 if elapsed < MIN_REPEAT_SECONDS / 10 else 2
+    per_call = [elapsed / loops]
+    for _ in range(repeats - 1):
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        per_call.append((time.perf_counter() - started) / loops)
+
+    median = statistics.median(per_call)
+    return {
+        "name": case.name,
+        "size": case.size,
+        "unit": case.unit,
+        "loops": loops,
+        "repeats": repeats,
+        "best_us": round(min(per_call) * 1e6, 3),
+        "median_us": round(median * 1e6, 3),
+        "ops_per_s": round(1 / median, 1),
+        "per_unit_ns": round(median / case.size * 1e9, 2) if case.size else None,
+    }
+
+
+def print_micro(results: List[Dict[str, Any]]) -> None:
+    print(f"\n{'case':<29} {'size':>12} {'loops':>7} {'best us':>13} {'median us':>13} {'ops/s':>11} {'ns/unit':>9}")
+    for r in results:
+        size = f"{r['size']} {r['unit']}" if r["size"] else ""
+        print(
+            f"{r['name']:<29} {size:>12} {r['loops']:>7} {r['best_us']:>13.2f} {r['median_us']:>13.2f} "
+            f"{r['ops_per_s']:>11.1f} {r['per_unit_ns'] or '':>9}"
+        )
@@ -0,0 +1,136 @@
+"""Latency summaries, the JSON result files and run-to-run comparison"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+
+def summarize(mode: str, scenario: str, concurrency: int, latencies: List[float],
+              statuses: Counter, errors: int, seconds: float) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    return {
+        "mode": mode,
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": len(ordered),
+        "errors": errors,
+        "statuses": {str(code): count for code, count in sorted(statuses.items(), key=str)},
+        "seconds": round(seconds, 3),
+        "rps": round(len(ordered) / seconds, 1) if seconds else 0.0,
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 2) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+    }
+
+
+def _git(*args: str) -> str:
+    try:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def run_metadata(dataset: Dict[str, Any], options: Dict[str, Any]) -> Dict[str, Any]:
+    """What a result was measured on; compare warns when these differ"""
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": _git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "dataset": {k: v for k, v in dataset.items() if k not in ("database", "password", "seconds")},
+        "options": options,
+    }
+
+
+def write_results(path: Path, meta: Dict[str, Any], results: List[Dict[str, Any]], key: str = "results") -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"meta": meta, key: results}, indent=2), encoding="utf-8")
+
+
+def print_results(results: List[Dict[str, Any]]) -> None:
+    print(f"\n{'mode':<11} {'scenario':<11} {'conc':>5} {'requests':>9} {'errors':>7} {'req/s':>9} "
+          f"{'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for r in results:
+        print(
+            f"{r['mode']:<11} {r['scenario']:<11} {r['concurrency']:>5} {r['requests']:>9} {r['errors']:>7} "
+            f"{r['rps']:>9.1f} {r['mean_ms']:>9.1f} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f}"
+        )
+
+
+def _change(old: float, new: float) -> float:
+    return (new - old) / old * 100 if old else 0.0
+
+
+def compare(base_path: Path, new_path: Path, threshold: float) -> Tuple[List[str], int]:
+    """Report lines and the number of regressions (rps down or p95 up by more than threshold %)
+
+    Works on end-to-end and on micro-benchmark result files.
+    """
+    base = json.loads(base_path.read_text(encoding="utf-8"))
+    new = json.loads(new_path.read_text(encoding="utf-8"))
+    lines = [f"base {base['meta']['commit'] or '?'} ({base['meta']['created_at']})  "
+             f"new {new['meta']['commit'] or '?'} ({new['meta']['created_at']})"]
+    for key in ("dataset", "cpu_count", "platform"):
+        if base["meta"].get(key) != new["meta"].get(key):
+            lines.append(f"⚠️  {key} differs between the runs; numbers are not directly comparable")
+
+    if "micro" in new:
+        return _compare_micro(base.get("micro", []), new["micro"], threshold, lines)
+
+    def key(r: Dict[str, Any]) -> Tuple[str, str, int]:
+        return r["mode"], r["scenario"], r["concurrency"]
+
+    old_results = {key(r): r for r in base.get("results", [])}
+    regressions = 0
+    lines.append(f"{'mode':<11} {'scenario':<11} {'conc':>5} {'req/s':>19} {'p95 ms':>19} {'p99 ms':>19}")
+    for r in new["results"]:
+        old = old_results.get(key(r))
+        if old is None:
+            continue
+        rps, p95, p99 = _change(old["rps"], r["rps"]), _change(old["p95_ms"], r["p95_ms"]), _change(old["p99_ms"], r["p99_ms"])
+        regressed = rps < -threshold or p95 > threshold
+        regressions += regressed
+        lines.append(
+            f"{r['mode']:<11} {r['scenario']:<11} {r['concurrency']:>5} "
+            f"{r['rps']:>9.1f} ({rps:+6.1f}%) {r['p95_ms']:>9.1f} ({p95:+6.1f}%) {r['p99_ms']:>9.1f} ({p99:+6.1f}%)"
+            + ("  ❌ regression" if regressed else "")
+        )
+    return lines, regressions
+
+
+def _compare_micro(base: List[Dict[str, Any]], new: List[Dict[str, Any]], threshold: float,
+                   lines: List[str]) -> Tuple[List[str], int]:
+    """Micro-benchmarks regress when the median time per call grows by more than threshold %"""
+    old_results = {(r["name"], r["size"]): r for r in base}
+    regressions = 0
+    lines.append(f"{'case':<29} {'size':>12} {'old us':>13} {'new us':>13} {'change':>9}")
+    for r in new:
+        old = old_results.get((r["name"], r["size"]))
+        if old is None:
+            continue
+        change = _change(old["median_us"], r["median_us"])
+        regressed = change > threshold
+        regressions += regressed
+        size = f"{r['size']} {r['unit']}" if r["size"] else ""
+        lines.append(
+            f"{r['name']:<29} {size:>12} {old['median_us']:>13.2f} {r['median_us']:>13.2f} {change:>+8.1f}%"
+            + ("  ❌ regression" if regressed else "")
+        )
+    return lines, regressions
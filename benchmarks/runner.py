@@ -0,0 +1,125 @@
+"""Drives the scenarios against the app in-process or over a socket.
+
+Both modes share one asyncio load generator: `concurrency` workers issue
+requests back to back until the scenario's request count is used up.
+In-process the app runs on the same event loop (sync routes in its
+threadpool), so the numbers are the app and the framework without the
+network and HTTP parsing, but with the load generator sharing the CPU.
+Over a socket the app runs in a uvicorn subprocess, as deployed.
+"""
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List
+
+import httpx
+
+from benchmarks.dataset import bench_environment
+from benchmarks.report import ROOT, summarize
+from benchmarks.scenarios import Context, Scenario
+
+WARMUP_CONCURRENCY = 8
+
+
+async def drive(client: httpx.AsyncClient, mode: str, scenario: Scenario, ctx: Context,
+                concurrency: int, requests: int, seed: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    errors = 0
+    remaining = requests
+
+    async def worker(n: int) -> None:
+        nonlocal remaining, errors
+        rng = random.Random(seed * 10007 + n)
+        while remaining > 0:
+            remaining -= 1
+            url, kwargs = scenario.request(ctx, rng)
+            started = time.perf_counter()
+            try:
+                response = await client.request(scenario.method, url, **kwargs)
+                statuses[response.status_code] += 1
+                if response.status_code != scenario.expected_status:
+                    errors += 1
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    return summarize(mode, scenario.name, concurrency, latencies, statuses, errors, time.perf_counter() - started)
+
+
+async def run_all(client: httpx.AsyncClient, mode: str, scenarios: List[Scenario], ctx: Context,
+                  concurrencies: List[int], requests: int, warmup: int, seed: int) -> List[Dict[str, Any]]:
+    results = []
+    for scenario in scenarios:
+        if warmup:
+            # Fills caches, pools and the threadpool before anything is measured
+            await drive(client, mode, scenario, ctx, min(WARMUP_CONCURRENCY, max(concurrencies)), warmup, seed)
+        for concurrency in concurrencies:
+            result = await drive(client, mode, scenario, ctx, concurrency, requests, seed)
+            print(f"  {mode:<10} {scenario.name:<11} c={concurrency:<4} {result['rps']:>8.1f} req/s  "
+                  f"p95 {result['p95_ms']:.1f} ms  errors {result['errors']}", flush=True)
+            results.append(result)
+    return results
+
+
+async def run_in_process(scenarios: List[Scenario], ctx: Context, concurrencies: List[int],
+                         requests: int, warmup: int, seed: int) -> List[Dict[str, Any]]:
+    from app.main import app
+
+    # ASGITransport does not send lifespan events; run startup/shutdown ourselves
+    await app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            return await run_all(client, "in-process", scenarios, ctx, concurrencies, requests, warmup, seed)
+    finally:
+        await app.router.shutdown()
+
+
+async def _wait_until_up(base_url: str, server: subprocess.Popen, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise RuntimeError(f"Server exited with code {server.returncode} during startup")
+            try:
+                if (await client.get(f"{base_url}/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not start within {timeout}s")
+
+
+def run_over_socket(database_path: Path, scenarios: List[Scenario], ctx: Context, concurrencies: List[int],
+                    requests: int, warmup: int, seed: int, port: int, workers: int) -> List[Dict[str, Any]]:
+    env = {**os.environ, **bench_environment(database_path)}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log",
+         # Slow scenarios (login) leave pooled client connections idle for longer than
+         # uvicorn's 5s default; it closing them mid-reuse would count as errors
+         "--timeout-keep-alive", "120"],
+        cwd=ROOT, env=env
+    )
+    base_url = f"http://127.0.0.1:{port}"
+
+    async def measure() -> List[Dict[str, Any]]:
+        await _wait_until_up(base_url, server, 60)
+        limits = httpx.Limits(max_connections=max(concurrencies), max_keepalive_connections=max(concurrencies))
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+            return await run_all(client, "socket", scenarios, ctx, concurrencies, requests, warmup, seed)
+
+    try:
+        return asyncio.run(measure())
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
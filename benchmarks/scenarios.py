@@ -0,0 +1,115 @@
+"""The request mixes measured by a run; one scenario is one kind of request"""
+import random
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable, Dict, List, Tuple
+
+# Long enough for any run; tokens are minted locally, not through /login
+TOKEN_LIFETIME = timedelta(hours=12)
+TOKEN_USERS = 1000
+HOT_READ_PATHS = ("/api/resources/", "/api/theme/", "/api/theme/effective", "/api/users/me")
+
+
+@dataclass
+class Owner:
+    headers: Dict[str, str]
+    resource_ids: List[int]
+
+
+@dataclass
+class Context:
+    password: str
+    user_emails: List[str]
+    user_headers: List[Dict[str, str]]
+    owners: List[Owner]
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    expected_status: int
+    # Returns the URL and the client.request() keyword arguments
+    request: Callable[[Context, random.Random], Tuple[str, dict]]
+
+
+def _login(ctx: Context, rng: random.Random) -> Tuple[str, dict]:
+    return "/api/auth/login", {"json": {"email": rng.choice(ctx.user_emails), "password": ctx.password}}
+
+
+def _list(ctx: Context, rng: random.Random) -> Tuple[str, dict]:
+    return "/api/resources/", {"headers": rng.choice(ctx.user_headers)}
+
+
+def _create(ctx: Context, rng: random.Random) -> Tuple[str, dict]:
+    n = rng.randrange(1_000_000)
+    return "/api/resources/", {
+        "headers": rng.choice(ctx.owners).headers,
+        "json": {"icon": "server", "title": f"Bench {n}", "resource_name": f"bench-new-{n}",
+                 "description": "created by the benchmark", "status": "Running", "region": "East US"},
+    }
+
+
+def _update(ctx: Context, rng: random.Random) -> Tuple[str, dict]:
+    owner = rng.choice(ctx.owners)
+    n = rng.randrange(1_000_000)
+    return f"/api/resources/{rng.choice(owner.resource_ids)}", {
+        "headers": owner.headers,
+        "json": {"icon": "database", "title": f"Updated {n}", "resource_name": f"bench-upd-{n}",
+                 "description": "updated by the benchmark", "status": "Stopped", "region": "West Europe"},
+    }
+
+
+def _hot_reads(ctx: Context, rng: random.Random) -> Tuple[str, dict]:
+    # What every page load fetches; the routes served async under --async-db
+    return rng.choice(HOT_READ_PATHS), {"headers": rng.choice(ctx.user_headers)}
+
+
+def _theme(ctx: Context, rng: random.Random) -> Tuple[str, dict]:
+    return "/api/theme/effective", {"headers": rng.choice(ctx.user_headers)}
+
+
+def _theme_save(ctx: Context, rng: random.Random) -> Tuple[str, dict]:
+    return "/api/theme/", {
+        "headers": rng.choice(ctx.user_headers),
+        "json": {"mode": rng.choice(["light", "dark"]), "accent": "#%06x" % rng.randrange(0x1000000)},
+    }
+
+
+SCENARIOS: Dict[str, Scenario] = {s.name: s for s in (
+    Scenario("login", "POST", 200, _login),
+    Scenario("list", "GET", 200, _list),
+    Scenario("create", "POST", 201, _create),
+    Scenario("update", "PUT", 200, _update),
+    Scenario("theme", "GET", 200, _theme),
+    Scenario("theme-save", "PUT", 200, _theme_save),
+    Scenario("hot-reads", "GET", 200, _hot_reads),
+)}
+
+
+def build_context(manifest: dict, seed: int) -> Context:
+    """Tokens for a sample of users and for every owner, plus the owners' resource ids"""
+    from sqlalchemy import select
+    from app.core.security import create_access_token
+    from app.db.database import SessionLocal
+    from app.models.resource import Resource
+    from app.models.user import User
+    from benchmarks.dataset import OWNER_EMAIL, USER_EMAIL
+
+    def headers(email: str) -> Dict[str, str]:
+        token = create_access_token(data={"sub": email}, expires_delta=TOKEN_LIFETIME)
+        return {"Authorization": f"Bearer {token}"}
+
+    rng = random.Random(seed)
+    user_emails = [USER_EMAIL.format(i) for i in range(manifest["users"])]
+    sample = rng.sample(user_emails, min(TOKEN_USERS, len(user_emails)))
+    owners = []
+    with SessionLocal() as db:
+        for i in range(manifest["owners"]):
+            email = OWNER_EMAIL.format(i)
+            owner_id = db.scalar(select(User.id).where(User.email == email))
+            resource_ids = db.scalars(
+                select(Resource.id).where(Resource.user_id == str(owner_id)).order_by(Resource.id).limit(1000)
+            ).all()
+            owners.append(Owner(headers(email), list(resource_ids)))
+    return Context(manifest["password"], user_emails, [headers(e) for e in sample], owners)
@@ -0,0 +1,126 @@
+"""Concurrency harness for the last-admin guard in app/api/admin.py.
+
+Many threads demote, promote and delete admins at the same time through
+guarded_role_update/guarded_user_delete while a monitor thread samples the
+admin count. The run fails if the count is ever observed at zero.
+
+Usage:
+    python scripts/admin_guard_stress.py --threads 32 --iterations 300
+    python scripts/admin_guard_stress.py --database-url "mssql+pymssql://..."
+"""
+import argparse
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine, func, select  # noqa: E402
+from sqlalchemy.exc import OperationalError, DBAPIError  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.db.database import Base  # noqa: E402
+from app.models.user import User, UserRole  # noqa: E402
+from app.models.resource import Resource  # noqa: E402,F401
+from app.api.admin import guarded_role_update, guarded_user_delete  # noqa: E402
+
+
+def seed(Session, admins: int, users: int) -> None:
+    with Session() as db:
+        db.query(User).delete()
+        for i in range(admins + users):
+            db.add(User(
+                email=f"stress{i}@example.com",
+                hashed_password="x",
+                role=UserRole.admin if i < admins else UserRole.user
+            ))
+        db.commit()
+
+
+def admin_count(Session) -> int:
+    with Session() as db:
+        return db.scalar(select(func.count()).select_from(User).where(User.role == UserRole.admin))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--admins", type=int, default=10)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--iterations", type=int, default=200, help="operations per thread")
+    args = parser.parse_args()
+
+    url = args.database_url or f"sqlite:///{Path(tempfile.mkdtemp()) / 'stress.db'}"
+    connect_args = {"check_same_thread": False, "timeout": 30} if url.startswith("sqlite") else {}
+    engine = create_engine(url, connect_args=connect_args, pool_size=args.threads + 2)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    seed(Session, args.admins, args.users)
+
+    with Session() as db:
+        user_ids = list(db.scalars(select(User.id)))
+
+    stats = {"demoted": 0, "promoted": 0, "deleted": 0, "refused": 0, "retried": 0}
+    stats_lock = threading.Lock()
+    violations = []
+    stop = threading.Event()
+
+    def monitor():
+        while not stop.is_set():
+            count = admin_count(Session)
+            if count < 1:
+                violations.append(count)
+            time.sleep(0.001)
+
+    def worker(seed_value: int):
+        rng = random.Random(seed_value)
+        for _ in range(args.iterations):
+            user_id = rng.choice(user_ids)
+            action = rng.choices(["demote", "promote", "delete"], weights=[6, 3, 1])[0]
+            with Session() as db:
+                try:
+                    if action == "delete":
+                        changed = guarded_user_delete(db, [user_id]) == 1
+                    else:
+                        role = UserRole.user if action == "demote" else UserRole.admin
+                        changed = guarded_role_update(db, [user_id], role) == 1
+                    db.commit()
+                except (OperationalError, DBAPIError):
+                    db.rollback()
+                    with stats_lock:
+                        stats["retried"] += 1
+                    continue
+            with stats_lock:
+                stats[f"{action}d"] += int(changed)
+                stats["refused"] += int(not changed)
+
+    monitor_thread = threading.Thread(target=monitor, daemon=True)
+    monitor_thread.start()
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    monitor_thread.join()
+
+    final = admin_count(Session)
+    total_ops = args.threads * args.iterations
+    print(f"{total_ops} operations in {elapsed:.2f}s ({total_ops / elapsed:.0f} ops/s) on {engine.dialect.name}")
+    print(", ".join(f"{k}={v}" for k, v in stats.items()) + f", final_admins={final}")
+
+    if violations or final < 1:
+        print(f"❌ Last-admin guard violated: admin count observed at {min(violations + [final])}")
+        return 1
+    print("✅ At least one admin remained throughout")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""Check that importing the application is fast and free of side effects.
+
+Runs `python -X importtime -c "import app.main"` in a fresh interpreter
+(from a scratch working directory, with no .env changes) and fails when:
+
+1. the cumulative import time of app.main exceeds --budget-ms,
+2. the import printed anything,
+3. the import created the data/ directory or the SQLite file,
+4. the import created a database engine,
+5. importing the modules app.main is assembled from (routers, caches,
+   limiters, admission control) read settings; only app.main itself
+   may, to decide which middleware and routers to mount.
+
+The slowest app.* modules (self time) are listed to show where the
+time goes. Take the best of a few runs: the first one pays for cold
+.pyc and file caches.
+
+Usage:
+    python scripts/import_budget.py --budget-ms 1500 --runs 3
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PROBE = """
+import app.main
+import app.db.database as database
+print("ENGINE_CREATED" if database._engine is not None else "NO_ENGINE")
+"""
+
+MODULES_PROBE = """
+import app.api.auth, app.api.users, app.api.theme, app.api.resources, app.api.admin, app.api.health
+import app.api.deps, app.core.admission, app.core.metrics, app.core.profiling, app.core.rate_limit
+import app.db.instrumentation, app.db.replicas, app.db.theme_store, app.db.write_queue
+import app.core.config as config
+print("SETTINGS_LOADED" if config._settings is not None else "NO_SETTINGS")
+"""
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def run_once() -> dict:
+    data_dir = ROOT / "data"
+    data_existed = data_dir.exists()
+    with tempfile.TemporaryDirectory() as cwd:
+        env = dict(os.environ, PYTHONPATH=str(ROOT))
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", PROBE],
+            cwd=cwd, env=env, capture_output=True, text=True
+        )
+    if proc.returncode != 0:
+        sys.exit(f"Importing app.main failed:\n{proc.stderr[-2000:]}")
+
+    modules = {}
+    total_us = None
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, _, name = match.groups()
+        modules[name] = int(self_us)
+        if name == "app.main":
+            total_us = int(cumulative_us)
+
+    stdout = proc.stdout.splitlines()
+    return {
+        "total_ms": (total_us or 0) / 1000,
+        "modules": modules,
+        "output": stdout[:-1],
+        "engine_created": stdout[-1:] == ["ENGINE_CREATED"],
+        "created_data_dir": not data_existed and data_dir.exists(),
+    }
+
+
+def modules_load_settings() -> bool:
+    with tempfile.TemporaryDirectory() as cwd:
+        env = dict(os.environ, PYTHONPATH=str(ROOT))
+        proc = subprocess.run([sys.executable, "-c", MODULES_PROBE], cwd=cwd, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        sys.exit(f"Importing the app modules failed:\n{proc.stderr[-2000:]}")
+    return proc.stdout.splitlines()[-1:] == ["SETTINGS_LOADED"]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=1500, help="cumulative import time allowed for app.main")
+    parser.add_argument("--runs", type=int, default=3, help="best of this many runs is compared to the budget")
+    parser.add_argument("--top", type=int, default=10, help="how many app modules to list")
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(max(args.runs, 1))]
+    best = min(runs, key=lambda r: r["total_ms"])
+
+    print(f"import app.main: best {best['total_ms']:.1f} ms of {len(runs)} run(s) "
+          f"(budget {args.budget_ms:.0f} ms)")
+    app_modules = sorted(
+        ((us, name) for name, us in best["modules"].items() if name.startswith("app")),
+        reverse=True
+    )
+    for self_us, name in app_modules[:args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  {name}")
+
+    failures = []
+    if best["total_ms"] > args.budget_ms:
+        failures.append(f"import took {best['total_ms']:.1f} ms, over the {args.budget_ms:.0f} ms budget")
+    if any(r["output"] for r in runs):
+        failures.append(f"import printed output: {next(r['output'] for r in runs if r['output'])[:3]}")
+    if any(r["created_data_dir"] for r in runs):
+        failures.append("import created the data/ directory")
+    if any(r["engine_created"] for r in runs):
+        failures.append("import created the database engine")
+    if modules_load_settings():
+        failures.append("importing the app modules read settings")
+
+    for failure in failures:
+        print(f"FAIL  {failure}")
+    print("OK" if not failures else f"{len(failures)} check(s) failed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,312 @@
+"""Per-endpoint SQL query budgets.
+
+Runs every API route against a freshly seeded SQLite database (in a
+temporary directory; data/app.db is not touched) and records the SQL
+statements each request issues, using the per-request instrumentation
+from app.db.instrumentation. Every route must have a case in CASES with
+a budget; the run fails when:
+
+1. a route issues more statements than its budget,
+2. a route's statement count grows with the amount of data (each case
+   runs against a small and a large dataset, so per-row queries show up
+   even when the budget is loose),
+3. a route in the app has no case (new routes must declare a budget).
+
+Statement shapes (verb + table, e.g. "SELECT users") are printed per route
+so a failure shows what changed.
+
+Usage:
+    python scripts/query_budget.py
+    python scripts/query_budget.py --sizes 5,200 --verbose
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+ADMIN_EMAIL = "budget-admin@example.com"
+USER_EMAIL = "budget-user@example.com"
+PASSWORD = "budget-password"
+
+
+@dataclass
+class Case:
+    method: str
+    path: str  # the route template, e.g. /api/resources/{resource_id}
+    budget: int
+    # Returns the concrete URL and the client.request() keyword arguments
+    request: Callable[["Context"], Tuple[str, dict]]
+    as_user: bool = False
+
+
+@dataclass
+class Context:
+    admin_id: str
+    user_id: str
+    resource_id: int
+    victim_ids: List[str]
+
+
+def _json(url: str, body) -> Callable[[Context], Tuple[str, dict]]:
+    return lambda ctx: (url, {"json": body})
+
+
+def _get(url: str) -> Callable[[Context], Tuple[str, dict]]:
+    return lambda ctx: (url, {})
+
+
+RESOURCE = {"icon": "server", "title": "Budget", "resource_name": "budget-vm", "description": "query budget"}
+
+# Keep budgets tight: raising one is a reviewed decision, not a side effect
+CASES: List[Case] = [
+    Case("GET", "/", 0, _get("/")),
+    Case("GET", "/health", 0, _get("/health")),
+    Case("GET", "/ready", 0, _get("/ready")),
+    Case("GET", "/metrics", 0, _get("/metrics")),
+    Case("POST", "/api/auth/signup", 3, _json("/api/auth/signup", {"email": "budget-new@example.com", "password": PASSWORD})),
+    Case("POST", "/api/auth/login", 1, _json("/api/auth/login", {"email": USER_EMAIL, "password": PASSWORD})),
+    Case("POST", "/api/auth/logout", 0, _get("/api/auth/logout")),
+    Case("GET", "/api/users/me", 1, _get("/api/users/me"), as_user=True),
+    Case("PATCH", "/api/users/me", 3, _json("/api/users/me", {"tagline": "budgeted"}), as_user=True),
+    Case("GET", "/api/users/", 3, _get("/api/users/?limit=100")),
+    Case("GET", "/api/users/{user_id}", 2, lambda ctx: (f"/api/users/{ctx.user_id}", {})),
+    Case("POST", "/api/users/{user_id}/reset-password", 4,
+         lambda ctx: (f"/api/users/{ctx.user_id}/reset-password", {"json": {"new_password": PASSWORD}})),
+    Case("GET", "/api/theme/", 2, _get("/api/theme/"), as_user=True),
+    Case("GET", "/api/theme/effective", 2, _get("/api/theme/effective"), as_user=True),
+    Case("PUT", "/api/theme/", 3, _json("/api/theme/", {"mode": "dark", "accent": "#0078d4"}), as_user=True),
+    Case("PATCH", "/api/theme/", 3, _json("/api/theme/", {"accent": "#107c10"}), as_user=True),
+    Case("GET", "/api/theme/all", 2, _get("/api/theme/all")),
+    Case("PATCH", "/api/theme/{config_key}", 3, _json("/api/theme/budget_key", {"config_value": "1"})),
+    Case("GET", "/api/resources/templates", 0, _get("/api/resources/templates")),
+    Case("POST", "/api/resources/import-templates", 2, _json("/api/resources/import-templates", [0, 1, 2, 3])),
+    Case("GET", "/api/resources/", 2, _get("/api/resources/")),
+    Case("POST", "/api/resources/", 3, _json("/api/resources/", RESOURCE)),
+    Case("PUT", "/api/resources/{resource_id}", 4,
+         lambda ctx: (f"/api/resources/{ctx.resource_id}", {"json": {**RESOURCE, "title": "Budget 2"}})),
+    Case("POST", "/api/resources/seed/templates", 2, _get("/api/resources/seed/templates")),
+    Case("DELETE", "/api/resources/{resource_id}", 4, lambda ctx: (f"/api/resources/{ctx.resource_id}", {})),
+    Case("GET", "/api/admin/users", 3, _get("/api/admin/users?limit=100")),
+    Case("POST", "/api/admin/users/bulk", 4, _json("/api/admin/users/bulk", {"users": [
+        {"email": f"budget-bulk{i}@example.com", "password": PASSWORD} for i in range(20)
+    ]})),
+    Case("PATCH", "/api/admin/users/bulk/role", 4, lambda ctx: ("/api/admin/users/bulk/role", {"json": {
+        "changes": [{"user_id": uid, "role": "admin"} for uid in ctx.victim_ids[:10]]
+    }})),
+    Case("POST", "/api/admin/users/bulk/delete", 5, lambda ctx: ("/api/admin/users/bulk/delete", {"json": {
+        "user_ids": ctx.victim_ids[:10]
+    }})),
+    Case("PATCH", "/api/admin/users/{user_id}/role", 4,
+         lambda ctx: (f"/api/admin/users/{ctx.victim_ids[10]}/role", {"json": {"role": "admin"}})),
+    Case("DELETE", "/api/admin/users/{user_id}", 4, lambda ctx: (f"/api/admin/users/{ctx.victim_ids[11]}", {})),
+    Case("GET", "/api/admin/user-deletions/{job_id}", 2, _get("/api/admin/user-deletions/missing")),
+    Case("POST", "/api/admin/user-deletions/{job_id}/retry", 2, _get("/api/admin/user-deletions/missing/retry")),
+    Case("GET", "/api/admin/db/pool", 1, _get("/api/admin/db/pool")),
+    Case("GET", "/api/admin/db/slow-queries", 1, _get("/api/admin/db/slow-queries")),
+    Case("GET", "/api/admin/debug/profiles", 1, _get("/api/admin/debug/profiles")),
+    Case("GET", "/api/admin/debug/profiles/{name}", 1, _get("/api/admin/debug/profiles/missing")),
+    Case("GET", "/api/admin/debug/tracemalloc", 1, _get("/api/admin/debug/tracemalloc")),
+    Case("POST", "/api/admin/debug/tracemalloc/start", 1, _get("/api/admin/debug/tracemalloc/start")),
+    Case("POST", "/api/admin/debug/tracemalloc/snapshots", 1, _get("/api/admin/debug/tracemalloc/snapshots?limit=5")),
+    Case("GET", "/api/admin/debug/tracemalloc/diff", 1, _get("/api/admin/debug/tracemalloc/diff?base=1")),
+    Case("POST", "/api/admin/debug/tracemalloc/stop", 1, _get("/api/admin/debug/tracemalloc/stop")),
+]
+
+
+def statement_shape(statement: str) -> str:
+    words = statement.split()
+    verb = words[0].upper() if words else "?"
+    if verb == "SELECT":
+        match = re.search(r"\bFROM\s+(\w+)", statement, re.I)
+    elif verb in ("INSERT", "DELETE"):
+        match = re.search(r"\b(?:INTO|FROM)\s+(\w+)", statement, re.I)
+    elif verb == "UPDATE":
+        match = re.search(r"^\s*UPDATE\s+(\w+)", statement, re.I)
+    else:
+        match = None
+    return f"{verb} {match.group(1)}" if match else verb
+
+
+def configure_environment(database_dir: str) -> None:
+    # Settings are loaded on first use, so this must run before the app is touched
+    os.environ.update({
+        "SQLITE_DATABASE_PATH": str(Path(database_dir) / "app.db"),
+        "BOOTSTRAP_LOCK_PATH": str(Path(database_dir) / ".bootstrap.lock"),
+        "SLOW_QUERY_LOG_PATH": str(Path(database_dir) / "slow_queries.log"),
+        "AZURE_SQL_SERVER": "",
+        "AZURE_SQL_DATABASE": "",
+        "DB_INSTRUMENTATION_ENABLED": "true",
+        "DB_READ_REPLICA_URLS": "",
+        "ASYNC_DB_ENABLED": "false",
+        "SQLITE_WRITE_QUEUE_ENABLED": "false",
+        "THEME_SAVE_DEBOUNCE_SECONDS": "0",
+        "LOGIN_RATE_LIMIT_ENABLED": "false",
+        "LOG_LEVEL": "WARNING",
+    })
+
+
+def seed(rows: int) -> Context:
+    from app.core.security import get_password_hash
+    from app.db.database import SessionLocal
+    from app.models.resource import Resource
+    from app.models.user import User, UserRole
+
+    hashed = get_password_hash(PASSWORD)
+    with SessionLocal() as db:
+        admin = User(email=ADMIN_EMAIL, hashed_password=hashed, role=UserRole.admin)
+        user = User(email=USER_EMAIL, hashed_password=hashed, role=UserRole.user)
+        victims = [
+            User(email=f"budget-victim{i}@example.com", hashed_password=hashed, role=UserRole.user)
+            for i in range(12)
+        ]
+        db.add_all([admin, user, *victims])
+        db.add_all([
+            User(email=f"budget-filler{i}@example.com", hashed_password=hashed, role=UserRole.user)
+            for i in range(rows)
+        ])
+        db.flush()
+        db.add_all([
+            Resource(user_id=str(owner.id), icon="server", title=f"Row {i}", resource_name=f"row-{i}")
+            for owner in (admin, user, victims[11]) for i in range(rows)
+        ])
+        db.commit()
+        resource = db.query(Resource).filter(Resource.user_id == str(admin.id)).first()
+        return Context(str(admin.id), str(user.id), resource.id, [str(v.id) for v in victims])
+
+
+def run_cases(rows: int, verbose: bool) -> Dict[Tuple[str, str], Tuple[int, Counter, int]]:
+    """Fresh process state and database per dataset size; returns counts and shapes per route"""
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    from app.db.database import get_engine
+    from app.db.instrumentation import current_request_stats
+    from app.main import app
+
+    statements: List[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        # Only statements issued while a request is being served
+        if current_request_stats() is not None:
+            statements.append(statement)
+
+    results = {}
+    with TestClient(app, raise_server_exceptions=False) as client:
+        event.listen(get_engine(), "after_cursor_execute", record)
+        ctx = seed(rows)
+
+        def token(email: str) -> dict:
+            response = client.post("/api/auth/login", json={"email": email, "password": PASSWORD})
+            response.raise_for_status()
+            return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        headers = {False: token(ADMIN_EMAIL), True: token(USER_EMAIL)}
+        for case in CASES:
+            url, kwargs = case.request(ctx)
+            # Warm-up request so cold caches do not count; the second one is measured.
+            # Both are issued for reads; writes run once (they are not repeatable).
+            if case.method == "GET":
+                client.request(case.method, url, headers=headers[case.as_user], **kwargs)
+            del statements[:]
+            response = client.request(case.method, url, headers=headers[case.as_user], **kwargs)
+            shapes = Counter(statement_shape(s) for s in statements)
+            results[(case.method, case.path)] = (len(statements), shapes, response.status_code)
+            if verbose:
+                for statement in statements:
+                    print(f"    {case.method} {case.path}: {' '.join(statement.split())[:160]}")
+        event.remove(get_engine(), "after_cursor_execute", record)
+    return results
+
+
+def app_routes() -> set:
+    from fastapi.routing import APIRoute
+    from app.main import app
+    return {
+        (method, route.path)
+        for route in app.routes if isinstance(route, APIRoute)
+        for method in route.methods
+    }
+
+
+def child_main(rows: int, verbose: bool) -> int:
+    import json
+    results = run_cases(rows, verbose)
+    print(json.dumps({
+        "routes": sorted(map(list, app_routes())),
+        "results": [[m, p, n, dict(shapes), code] for (m, p), (n, shapes, code) in results.items()],
+    }))
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="5,200", help="rows per seeded table, small and large")
+    parser.add_argument("--verbose", action="store_true", help="print every statement")
+    parser.add_argument("--child-rows", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child_rows is not None:
+        with tempfile.TemporaryDirectory() as database_dir:
+            configure_environment(database_dir)
+            return child_main(args.child_rows, args.verbose)
+
+    import json
+    import subprocess
+
+    # Each size runs in its own interpreter: settings, engine and caches are per process
+    runs = {}
+    for rows in [int(size) for size in args.sizes.split(",")]:
+        proc = subprocess.run(
+            [sys.executable, __file__, "--child-rows", str(rows)] + (["--verbose"] if args.verbose else []),
+            capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            sys.exit(f"Run with {rows} rows failed:\n{proc.stderr[-3000:]}")
+        lines = proc.stdout.strip().splitlines()
+        if args.verbose:
+            print("\n".join(lines[:-1]))
+        runs[rows] = json.loads(lines[-1])
+
+    failures = []
+    sizes = sorted(runs)
+    declared = {(case.method, case.path): case for case in CASES}
+    for method, path in sorted(tuple(route) for route in runs[sizes[0]]["routes"]):
+        if (method, path) not in declared:
+            failures.append(f"{method} {path}: no query budget declared")
+
+    measured: Dict[Tuple[str, str], Dict[int, tuple]] = {}
+    for rows in sizes:
+        for method, path, count, shapes, code in runs[rows]["results"]:
+            measured.setdefault((method, path), {})[rows] = (count, shapes, code)
+
+    print(f"{'route':<52} {'budget':>6} " + " ".join(f"{f'n@{rows}':>7}" for rows in sizes) + "  shapes")
+    for case in CASES:
+        per_size = measured[(case.method, case.path)]
+        counts = [per_size[rows][0] for rows in sizes]
+        shapes = per_size[sizes[-1]][1]
+        codes = {per_size[rows][2] for rows in sizes}
+        label = f"{case.method} {case.path}"
+        print(f"{label:<52} {case.budget:>6} " + " ".join(f"{n:>7}" for n in counts) + "  "
+              + ", ".join(f"{shape} x{n}" for shape, n in sorted(shapes.items())))
+        if any(code >= 500 for code in codes):
+            failures.append(f"{label}: server error {sorted(codes)}")
+        if max(counts) > case.budget:
+            failures.append(f"{label}: {max(counts)} statements, budget {case.budget}")
+        if len(set(counts)) > 1:
+            failures.append(f"{label}: statement count depends on data size ({counts})")
+
+    for failure in failures:
+        print(f"FAIL  {failure}")
+    print("OK" if not failures else f"{len(failures)} check(s) failed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())